@@ -67,6 +67,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "mall.profiling.RequestProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -105,6 +106,17 @@ DATABASES = {
     "default": env.db("DATABASE_URL", default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# 예) CACHE_URL=filecache:///var/tmp/django_cache, CACHE_URL=rediscache://127.0.0.1:6379/1
+# 기본값 locmemcache:// 는 프로세스마다 따로라 개발용입니다. 비회원 장바구니, CacheCartStore,
+# 포트원 결제 조회 캐시 무효화는 웹 프로세스와 관리 명령이 같은 캐시를 써야 하므로, 여러 프로세스로
+# 실행할 때는 공유 캐시를 지정하세요. (manage.py check --deploy 가 확인합니다.)
+
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -163,6 +175,106 @@ INTERNAL_IPS = env.list("INTERNAL_IPS", default=["127.0.0.1"])
 PORTONE_SHOP_ID = env.str("PORTONE_SHOP_ID", default="")
 PORTONE_API_KEY = env.str("PORTONE_API_KEY", default="")
 PORTONE_API_SECRET = env.str("PORTONE_API_SECRET", default="")
+PORTONE_API_BASE_URL = env.str("PORTONE_API_BASE_URL", default="https://api.portone.io")
+PORTONE_CONNECT_TIMEOUT = env.float("PORTONE_CONNECT_TIMEOUT", default=3.05)
+PORTONE_READ_TIMEOUT = env.float("PORTONE_READ_TIMEOUT", default=10.0)
+PORTONE_MAX_RETRIES = env.int("PORTONE_MAX_RETRIES", default=2)
+PORTONE_BACKOFF_FACTOR = env.float("PORTONE_BACKOFF_FACTOR", default=0.2)
+PORTONE_BACKOFF_MAX = env.float("PORTONE_BACKOFF_MAX", default=2.0)
+# 호스트당 최대 커넥션 수
+PORTONE_POOL_MAXSIZE = env.int("PORTONE_POOL_MAXSIZE", default=10)
+# 비동기 클라이언트(이벤트 루프당)의 최대 동시 커넥션 수
+PORTONE_ASYNC_MAX_CONNECTIONS = env.int("PORTONE_ASYNC_MAX_CONNECTIONS", default=100)
+# 포트원 결제 조회 캐시 만료 시간(초). 0 이면 캐시하지 않습니다. (mall.portone_cache)
+# 완료 상태의 결제는 바뀔 일이 적으므로 더 오래 캐시합니다.
+PORTONE_PAYMENT_CACHE_TTL = env.float("PORTONE_PAYMENT_CACHE_TTL", default=3.0)
+PORTONE_PAYMENT_CACHE_FINAL_TTL = env.float(
+    "PORTONE_PAYMENT_CACHE_FINAL_TTL", default=60.0
+)
+PORTONE_PAYMENT_CACHE_FINAL_STATUSES = env.list(
+    "PORTONE_PAYMENT_CACHE_FINAL_STATUSES",
+    default=["PAID", "CANCELLED", "PARTIAL_CANCELLED", "FAILED"],
+)
+
+# ASGI 로 실행할 때 결제 뷰(order_pay, order_check, webhook)를 비동기 뷰로 사용합니다.
+MALL_ASYNC_VIEWS = env.bool("MALL_ASYNC_VIEWS", default=False)
+
+# 상품 목록 조각 캐시의 만료 시간 (초)
+PRODUCT_LIST_CACHE_TIMEOUT = env.int("PRODUCT_LIST_CACHE_TIMEOUT", default=60 * 10)
+
+# 상품 목록/주문 목록을 커서(keyset) 방식으로 페이지네이션합니다. (검색 결과 제외)
+MALL_CURSOR_PAGINATION = env.bool("MALL_CURSOR_PAGINATION", default=True)
+
+# 상품 검색 백엔드 (예: mall.search.IContainsSearchBackend)
+# 지정하지 않으면 데이터베이스에 맞춰 PostgreSQL 전문 검색 또는 SQLite FTS5 를 사용합니다.
+MALL_SEARCH_BACKEND = env.str("MALL_SEARCH_BACKEND", default="")
+
+# 상품 이미지 렌디션 (원본은 그대로 두고 형식/너비별 변환본을 만듭니다.)
+# avif 는 Pillow 가 AVIF 를 인코딩할 수 있을 때만 만듭니다. (예: pillow-avif-plugin)
+MALL_IMAGE_RENDITION_FORMATS = env.list(
+    "MALL_IMAGE_RENDITION_FORMATS", default=["avif", "webp", "jpeg"]
+)
+MALL_IMAGE_RENDITION_WIDTHS = env.list(
+    "MALL_IMAGE_RENDITION_WIDTHS", cast=int, default=[150, 300, 600]
+)
+# 상품 목록 등에서 기본으로 사용할 렌디션 너비
+MALL_IMAGE_THUMBNAIL_WIDTH = env.int("MALL_IMAGE_THUMBNAIL_WIDTH", default=300)
+# 업로드 후 웹 프로세스의 백그라운드 스레드에서 렌디션을 만듭니다.
+# 0 이면 generate_image_renditions 명령으로만 만듭니다.
+MALL_IMAGE_RENDITION_WORKERS = env.int("MALL_IMAGE_RENDITION_WORKERS", default=2)
+# 변환 중(RUNNING)인 이미지가 이 시간(초) 안에 끝나지 않으면 프로세스가 종료된 것으로 보고
+# generate_image_renditions 명령이 다시 변환합니다.
+MALL_IMAGE_RENDITION_LEASE_TIMEOUT = env.int(
+    "MALL_IMAGE_RENDITION_LEASE_TIMEOUT", default=60 * 10
+)
+
+# 회원 장바구니 저장소. mall.cart.CacheCartStore 로 지정하면 캐시에 저장하고
+# flush_carts 명령으로 CartProduct 테이블에 모아서 반영합니다. (비회원은 항상 캐시에 저장)
+# 캐시에 저장하는 장바구니는 공유 캐시(CACHE_URL)가 필요합니다.
+MALL_CART_STORE = env.str("MALL_CART_STORE", default="mall.cart.DatabaseCartStore")
+MALL_CART_CACHE_TIMEOUT = env.int("MALL_CART_CACHE_TIMEOUT", default=60 * 60 * 24 * 14)
+
+# 주문 생성 시 차감한 재고를 결제 없이 유지하는 시간(초). 만료된 예약은
+# release_expired_stock 명령으로 해제합니다.
+STOCK_RESERVATION_TTL = env.int("STOCK_RESERVATION_TTL", default=60 * 15)
+
+# 주문당 결제 시도(OrderPayment) 최대 개수. 결제 페이지는 금액이 같은 미결제 시도를 다시 쓰며,
+# 오래된 시도는 cleanup_payment_attempts 명령으로 지웁니다.
+PAYMENT_MAX_ATTEMPTS_PER_ORDER = env.int("PAYMENT_MAX_ATTEMPTS_PER_ORDER", default=10)
+
+# 결제 검증 작업 큐 (process_payment_jobs)
+PAYMENT_JOB_MAX_ATTEMPTS = env.int("PAYMENT_JOB_MAX_ATTEMPTS", default=5)
+PAYMENT_JOB_RETRY_DELAY = env.float("PAYMENT_JOB_RETRY_DELAY", default=5.0)  # 초
+# 처리 중(RUNNING)인 작업이 이 시간(초) 동안 갱신되지 않으면 워커가 종료된 것으로 보고 다시 처리합니다.
+PAYMENT_JOB_LEASE_TIMEOUT = env.int("PAYMENT_JOB_LEASE_TIMEOUT", default=60 * 5)
+
+# 결제 일괄 취소 (process_cancellations)
+PAYMENT_CANCEL_MAX_ATTEMPTS = env.int("PAYMENT_CANCEL_MAX_ATTEMPTS", default=5)
+# 포트원 취소 요청 초당 최대 횟수
+PAYMENT_CANCEL_RATE_LIMIT = env.float("PAYMENT_CANCEL_RATE_LIMIT", default=10.0)
+PAYMENT_CANCEL_RETRY_DELAY = env.float("PAYMENT_CANCEL_RETRY_DELAY", default=5.0)  # 초
+# 처리 중(RUNNING)인 작업이 이 시간(초) 동안 갱신되지 않으면 워커가 종료된 것으로 보고 다시 처리합니다.
+PAYMENT_CANCEL_LEASE_TIMEOUT = env.int("PAYMENT_CANCEL_LEASE_TIMEOUT", default=60 * 5)
+
+# 요청 프로파일링 (mall.profiling). 기록할 요청의 비율(0~1)이며 0 이면 기록하지 않습니다.
+MALL_PROFILING_SAMPLE_RATE = env.float("MALL_PROFILING_SAMPLE_RATE", default=0.0)
+# 히스토그램 버킷 (시간은 초, 개수는 쿼리/포트원 호출 수)
+MALL_PROFILING_DURATION_BUCKETS = [
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+]
+MALL_PROFILING_COUNT_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100, 200]
+# /metrics/ 를 조회할 수 있는 IP
+MALL_METRICS_ALLOWED_IPS = env.list("MALL_METRICS_ALLOWED_IPS", default=["127.0.0.1"])
 
 # CSRF 설정
 CSRF_TRUSTED_ORIGINS = env.list("CSRF_TRUSTED_ORIGINS", default=[])
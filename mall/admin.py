@@ -3,15 +3,41 @@ import json
 from django import forms
 from django.contrib import admin
 from django.forms import formset_factory
+from django.urls import reverse
+from django.utils.html import format_html
 from django_ckeditor_5.widgets import CKEditor5Widget
 from django_json_widget.widgets import JSONEditorWidget
 
+from .cache import bump_catalog_version
 from .forms import SpecificationForm
-from .models import Category, Product, Order, ProductImage, ProductOption
+from .pagination import CursorChangeList, EstimatedCountPaginator
+from .models import (
+    CancellationBatch,
+    Category,
+    Product,
+    Order,
+    OrderStatusEvent,
+    PaymentCancellation,
+    ProductImage,
+    ProductOption,
+    TransitionResult,
+)
+
+
+class OrderStatusEventInline(admin.TabularInline):
+    model = OrderStatusEvent
+    extra = 0
+    fields = ["from_status", "to_status", "changed_by", "reason", "created_at"]
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
+    inlines = [OrderStatusEventInline]
     list_display = ["pk", "name", "total_amount", "status", "created_at"]
     actions = [
         "make_cancel",
@@ -20,51 +46,59 @@ class OrderAdmin(admin.ModelAdmin):
         "mark_as_delivered",
     ]
     list_filter = ["status", "created_at", "updated_at", "user"]
-    search_fields = ["name", "user__username", "user__email"]
+    search_fields = ["display_name", "user__username", "user__email"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     @admin.display(description=f"지정 주문 결제를 취소합니다.")
     def make_cancel(self, request, queryset):
-        for order in queryset:
-            order.cancel("관리자에 의해 취소됨")
+        """포트원 취소 요청은 process_cancellations 워커가 처리하도록 등록만 합니다."""
+        batch = CancellationBatch.enqueue_orders(
+            queryset, "관리자에 의해 취소됨", requested_by=request.user
+        )
+        url = reverse("admin:mall_cancellationbatch_change", args=[batch.pk])
         self.message_user(
-            request, f"{queryset.count()}개의 주문 결제를 취소하였습니다."
+            request,
+            format_html(
+                '{}건의 결제 취소를 요청하였습니다. <a href="{}">진행 상황 보기</a>',
+                batch.total_count,
+                url,
+            ),
         )
 
     @admin.display(description="선택된 주문을 상품 준비 중으로 변경합니다.")
     def mark_as_prepared(self, request, queryset):
-        for order in queryset:
-            try:
-                order.mark_as_prepared()
-                self.message_user(
-                    request,
-                    f"{queryset.count()}개의 주문이 상품 준비 중으로 변경되었습니다.",
-                )
-            except ValueError as e:
-                self.message_user(request, f"주문 {order.pk}: {str(e)}", level="error")
+        result = queryset.mark_as_prepared(changed_by=request.user)
+        self.message_transition(request, result, "상품 준비 중")
 
     @admin.display(description="선택된 주문을 배송 중으로 변경합니다.")
     def mark_as_shipped(self, request, queryset):
-        for order in queryset:
-            try:
-                order.mark_as_shipped()
-                self.message_user(
-                    request,
-                    f"{queryset.count()}개의 주문이 배송 중으로 변경되었습니다.",
-                )
-            except ValueError as e:
-                self.message_user(request, f"주문 {order.pk}: {str(e)}", level="error")
+        result = queryset.mark_as_shipped(changed_by=request.user)
+        self.message_transition(request, result, "배송 중")
 
     @admin.display(description="선택된 주문을 배송 완료로 변경합니다.")
     def mark_as_delivered(self, request, queryset):
-        for order in queryset:
-            try:
-                order.mark_as_delivered()
-                self.message_user(
-                    request,
-                    f"{queryset.count()}개의 주문이 배송 완료로 변경되었습니다.",
-                )
-            except ValueError as e:
-                self.message_user(request, f"주문 {order.pk}: {str(e)}", level="error")
+        result = queryset.mark_as_delivered(changed_by=request.user)
+        self.message_transition(request, result, "배송 완료")
+
+    def message_transition(self, request, result: TransitionResult, label):
+        """변경 결과를 주문별이 아닌 한 번의 메시지로 알립니다."""
+        self.message_user(
+            request, f"{result.transitioned}개의 주문이 {label}(으)로 변경되었습니다."
+        )
+        if result.rejected:
+            pk_list = ", ".join(map(str, result.rejected_pk_list[:20]))
+            if result.rejected > 20:
+                pk_list += " 등"
+            self.message_user(
+                request,
+                f"상태가 맞지 않아 {result.rejected}개의 주문은 변경하지 않았습니다. "
+                f"(주문 {pk_list})",
+                level="warning",
+            )
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
 
     def get_readonly_fields(self, request, obj=None):
         """배송 완료된 주문은 수정 불가하도록 설정"""
@@ -72,6 +106,97 @@ class OrderAdmin(admin.ModelAdmin):
             return self.readonly_fields + ("status",)
         return self.readonly_fields
 
+    def get_form(self, request, obj=None, **kwargs):
+        form = super().get_form(request, obj, **kwargs)
+        if obj is not None and "status" in form.base_fields:
+            # 현재 상태에서 바꿀 수 있는 상태만 고를 수 있게 합니다.
+            form.base_fields["status"].choices = [
+                (value, label)
+                for value, label in Order.Status.choices
+                if value == obj.status or Order.is_allowed_transition(obj.status, value)
+            ]
+        return form
+
+    def save_model(self, request, obj, form, change):
+        """
+        상태는 change_status 로 바꾸고, 나머지는 수정한 항목만 저장합니다.
+
+        전이는 get_form 의 선택지로 검사합니다. 그 뒤 다른 곳에서 상태가 바뀌어 change_status 가
+        실패하면, 다른 항목만 저장하고 성공으로 표시하지 않도록 예외를 그대로 올려 관리자 화면의
+        트랜잭션과 함께 되돌립니다.
+        """
+        if not change:
+            return super().save_model(request, obj, form, change)
+
+        to_status = obj.status
+        obj.status = form.initial.get("status", obj.status)
+        obj.change_status(to_status, changed_by=request.user, reason="관리자 수정")
+        update_fields = [name for name in form.changed_data if name != "status"]
+        if update_fields:
+            obj.save(update_fields=update_fields + ["updated_at"])
+
+
+@admin.register(CancellationBatch)
+class CancellationBatchAdmin(admin.ModelAdmin):
+    list_display = [
+        "pk",
+        "reason",
+        "requested_by",
+        "progress_link",
+        "succeeded_count",
+        "failed_count",
+        "created_at",
+        "finished_at",
+    ]
+    list_select_related = ["requested_by"]
+    fields = [
+        "reason",
+        "requested_by",
+        "progress_link",
+        "succeeded_count",
+        "failed_count",
+        "created_at",
+        "finished_at",
+    ]
+    readonly_fields = fields
+
+    @admin.display(description="진행")
+    def progress_link(self, obj):
+        url = reverse("admin:mall_paymentcancellation_changelist")
+        return format_html(
+            '<a href="{}?batch__id__exact={}">{}</a>', url, obj.pk, obj.progress
+        )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PaymentCancellation)
+class PaymentCancellationAdmin(admin.ModelAdmin):
+    list_display = [
+        "pk",
+        "batch",
+        "payment",
+        "amount",
+        "status",
+        "attempts",
+        "error_code",
+        "error_message",
+        "updated_at",
+    ]
+    list_filter = ["status", "error_code", "batch"]
+    list_select_related = ["batch", "payment"]
+    raw_id_fields = ["batch", "payment"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
 # Register your models here.
 @admin.register(Category)
@@ -84,13 +209,14 @@ class CategoryAdmin(admin.ModelAdmin):
 class ProductImageInline(admin.TabularInline):
     model = ProductImage
     extra = 1  # 기본적으로 추가할 수 있는 이미지 필드 수
-    fields = ["image"]
+    fields = ["image", "rendition_status"]
+    readonly_fields = ["rendition_status"]
 
 
 class ProductOptionInline(admin.TabularInline):
     model = ProductOption
     extra = 1  # 기본적으로 추가할 수 있는 옵션 필드 수
-    fields = ["name", "additional_price"]
+    fields = ["name", "additional_price", "stock"]
 
 
 class ProductAdminForm(forms.ModelForm):
@@ -108,13 +234,15 @@ class ProductAdminForm(forms.ModelForm):
 class ProductAdmin(admin.ModelAdmin):
     form = ProductAdminForm  # 폼 설정
     inlines = [ProductImageInline, ProductOptionInline]
-    list_display = ["name", "category", "price", "status"]
+    list_display = ["name", "category", "price", "stock", "status"]
     list_filter = ["category", "status", "created_at", "updated_at"]
     search_fields = ["name"]
-    list_editable = ["price", "status"]
+    list_editable = ["price", "stock", "status"]
     list_per_page = 10
     list_max_show_all = 100
     list_select_related = ["category"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
         (
             "상품 정보",
@@ -124,6 +252,7 @@ class ProductAdmin(admin.ModelAdmin):
                     "name",
                     "description",
                     "price",
+                    "stock",
                     "status",
                     "specifications",
                     "presentation_image",
@@ -133,12 +262,21 @@ class ProductAdmin(admin.ModelAdmin):
     )
     actions = ["make_sold_out", "make_obsolete"]
 
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+    @staticmethod
+    def _set_status(queryset, status):
+        queryset.update(status=status)
+        # update() 는 post_save 시그널을 보내지 않으므로 직접 무효화합니다.
+        bump_catalog_version()
+
     def make_sold_out(self, request, queryset):
-        queryset.update(status=Product.Status.SOLD_OUT)
+        self._set_status(queryset, Product.Status.SOLD_OUT)
 
     make_sold_out.short_description = "선택된 상품을 품절로 변경"
 
     def make_obsolete(self, request, queryset):
-        queryset.update(status=Product.Status.OBSOLETE)
+        self._set_status(queryset, Product.Status.OBSOLETE)
 
     make_obsolete.short_description = "선택된 상품을 단종으로 변경"
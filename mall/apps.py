@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class MallConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "mall"
+
+    def ready(self):
+        from mall import checks, profiling, signals  # noqa: F401
+        from mall.search import reinstall_missing_search_triggers
+
+        post_migrate.connect(reinstall_missing_search_triggers, sender=self)
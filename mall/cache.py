@@ -0,0 +1,30 @@
+"""
+상품 목록 캐시.
+
+상품 목록 조각 캐시의 키에 카탈로그 버전을 포함시키고, 상품/이미지/분류가 바뀌면 버전을
+올려 이전 캐시를 한 번에 무효화합니다. 이전 버전의 캐시는 만료 시간이 지나면 사라집니다.
+"""
+
+import time
+
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = "mall:catalog_version"
+
+
+def get_catalog_version() -> int:
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # 캐시가 비워진 뒤에 예전 버전 번호를 다시 쓰지 않도록 현재 시각으로 시작합니다.
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, time.time_ns())
+    return version
+
+
+def bump_catalog_version() -> int:
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(CATALOG_VERSION_KEY, version, timeout=None)
+        return version
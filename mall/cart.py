@@ -0,0 +1,426 @@
+"""
+장바구니 서비스.
+
+장바구니는 자주 바뀌고 대부분 주문까지 가지 않으므로, 저장소를 설정(MALL_CART_STORE)으로
+고를 수 있게 합니다.
+
+- DatabaseCartStore : CartProduct 테이블에 바로 저장합니다.
+- CacheCartStore : 장바구니마다 캐시 키 하나(상품/옵션별 수량 dict)에 저장하고, 회원의
+  장바구니는 flush_carts 명령으로 CartProduct 테이블에 모아서 반영(write-behind)합니다.
+
+비회원 장바구니는 설정과 관계없이 세션별 CacheCartStore 를 사용하며, 로그인하면 회원의
+장바구니에 합칩니다.
+
+CacheCartStore(비회원 장바구니 포함)는 웹 프로세스들과 flush_carts 가 같은 캐시를 읽고 써야 하므로
+여러 프로세스가 공유하는 캐시(CACHE_URL)가 필요합니다. (mall.checks 가 확인합니다.)
+
+DatabaseCartStore 의 장바구니 담기는 조회 후 수량을 더해 저장(read-modify-write)하면 동시에
+들어온 요청(더블 클릭 등)의 수량이 유실되거나 unique_user_product_option 제약에 걸리므로,
+상품/옵션 확인과 수량 증가를 하나의 INSERT ... ON CONFLICT DO UPDATE 문으로 처리합니다.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F, Q
+from django.utils.module_loading import import_string
+
+from mall.models import CartProduct, Product, ProductOption
+
+logger = logging.getLogger(__name__)
+
+# (상품 pk, 옵션 pk)
+CartLineKey = Tuple[int, Optional[int]]
+
+SESSION_CART_ID_KEY = "cart_id"
+CACHE_KEY_PREFIX = "mall:cart"
+DIRTY_CART_SET_KEY = f"{CACHE_KEY_PREFIX}:dirty"
+
+
+@dataclass
+class CartLine:
+    """CacheCartStore 의 장바구니 상품. CartProduct 와 같은 속성을 제공합니다."""
+
+    product: Product
+    option: Optional[ProductOption]
+    quantity: int
+
+    @property
+    def unit_price(self) -> int:
+        return self.product.price + (self.option.additional_price if self.option else 0)
+
+    @property
+    def total_price(self) -> int:
+        return self.unit_price * self.quantity
+
+    @property
+    def amount(self) -> int:
+        return self.total_price
+
+
+class BaseCartStore:
+    def add(self, product_pk, option_pk, quantity: int = 1) -> Optional[int]:
+        """
+        장바구니에 상품을 담고, 담긴 뒤의 수량을 반환합니다.
+
+        판매 중인 상품이 아니거나 옵션이 상품의 옵션이 아니면 담지 않고 None 을 반환합니다.
+        """
+        raise NotImplementedError
+
+    def set_quantity(self, product_pk, option_pk, quantity: int):
+        raise NotImplementedError
+
+    def remove(self, key_list: Iterable[CartLineKey]):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def get_quantities(self) -> Dict[CartLineKey, int]:
+        raise NotImplementedError
+
+    def get_lines(self, for_update=False) -> list:
+        """
+        장바구니 상품 목록을 상품/옵션과 함께 반환합니다.
+
+        for_update=True 이면 주문을 만들 목록으로 상품 pk 순서로 반환합니다. 상품 행은
+        잠그지 않으며, 저장소에 따라 장바구니 행을 잠급니다. (트랜잭션 안에서 호출해야 합니다.)
+        """
+        raise NotImplementedError
+
+    def get_total(self, line_list) -> int:
+        """get_lines() 로 조회한 장바구니 상품 목록의 전체 금액"""
+        return sum(line.amount for line in line_list)
+
+
+class DatabaseCartStore(BaseCartStore):
+    def __init__(self, user):
+        self.user = user
+
+    @classmethod
+    def for_user(cls, user) -> "DatabaseCartStore":
+        return cls(user)
+
+    def get_queryset(self):
+        return CartProduct.objects.filter(user=self.user)
+
+    def filter_keys(self, key_list: Iterable[CartLineKey]):
+        condition = Q()
+        for product_pk, option_pk in key_list:
+            condition |= Q(product_id=product_pk, option_id=option_pk)
+        if not condition:
+            return self.get_queryset().none()
+        return self.get_queryset().filter(condition)
+
+    def add(self, product_pk, option_pk, quantity=1):
+        return add_product(self.user, product_pk, option_pk, quantity)
+
+    def set_quantity(self, product_pk, option_pk, quantity):
+        self.filter_keys([(product_pk, option_pk)]).update(quantity=quantity)
+
+    def remove(self, key_list):
+        self.filter_keys(key_list).delete()
+
+    def clear(self):
+        self.get_queryset().delete()
+
+    def get_quantities(self):
+        return {
+            (product_pk, option_pk): quantity
+            for product_pk, option_pk, quantity in self.get_queryset().values_list(
+                "product_id", "option_id", "quantity"
+            )
+        }
+
+    def get_lines(self, for_update=False):
+        qs = self.get_queryset().select_related("product", "option")
+        if for_update:
+            # 교착 상태를 피하기 위해 항상 상품 pk 순서로 잠급니다.
+            return list(qs.select_for_update(of=("self",)).order_by("product_id", "pk"))
+        return list(qs.with_amount().order_by("product__name", "pk"))
+
+    def get_total(self, line_list):
+        # with_amount() 의 cart_total 은 모든 행에 같은 값이 붙어 있습니다.
+        if line_list and hasattr(line_list[0], "cart_total"):
+            return line_list[0].cart_total
+        return super().get_total(line_list)
+
+
+class CacheCartStore(BaseCartStore):
+    """
+    캐시에 저장하는 장바구니.
+
+    수량 dict 를 읽고 고쳐 쓰는 동안 cache.add() 로 만든 짧은 잠금을 잡아, 동시에 들어온
+    요청의 수량이 유실되지 않게 합니다. 회원의 장바구니는 캐시에 없으면 CartProduct 에서
+    읽어 오고, 바뀌면 flush_carts 명령이 CartProduct 에 반영하도록 표시합니다.
+    """
+
+    def __init__(self, cart_id: str, user=None):
+        self.cart_id = cart_id
+        self.user = user
+        self.cache_key = f"{CACHE_KEY_PREFIX}:{cart_id}"
+
+    @classmethod
+    def for_user(cls, user) -> "CacheCartStore":
+        return cls(f"user:{user.pk}", user=user)
+
+    @classmethod
+    def for_session(cls, session_cart_id: str) -> "CacheCartStore":
+        return cls(f"session:{session_cart_id}")
+
+    @staticmethod
+    def encode_key(product_pk, option_pk) -> str:
+        return f"{product_pk}:{option_pk or ''}"
+
+    @staticmethod
+    def decode_key(key: str) -> CartLineKey:
+        product_pk, option_pk = key.split(":")
+        return int(product_pk), int(option_pk) if option_pk else None
+
+    def load(self) -> Dict[str, int]:
+        data = cache.get(self.cache_key)
+        if data is None:
+            data = {}
+            if self.user is not None:
+                # 캐시에서 만료된 회원 장바구니는 CartProduct 에 반영된 내용으로 복원합니다.
+                data = {
+                    self.encode_key(*key): quantity
+                    for key, quantity in DatabaseCartStore(self.user)
+                    .get_quantities()
+                    .items()
+                }
+                cache.set(self.cache_key, data, settings.MALL_CART_CACHE_TIMEOUT)
+        return data
+
+    def save(self, data: Dict[str, int]):
+        cache.set(self.cache_key, data, settings.MALL_CART_CACHE_TIMEOUT)
+        if self.user is not None:
+            mark_dirty(self.user.pk)
+
+    @contextmanager
+    def update(self):
+        """잠금을 잡고 수량 dict 를 읽어 고친 뒤 저장합니다."""
+        with cache_lock(self.cache_key):
+            data = self.load()
+            yield data
+            self.save(data)
+
+    def add(self, product_pk, option_pk, quantity=1):
+        if quantity < 1:
+            raise ValueError("수량은 1 이상이어야 합니다.")
+        is_valid = ProductOption.objects.filter(
+            pk=option_pk, product_id=product_pk, product__status=Product.Status.ACTIVE
+        ).exists()
+        if not is_valid:
+            return None
+
+        key = self.encode_key(product_pk, option_pk)
+        with self.update() as data:
+            data[key] = data.get(key, 0) + quantity
+            return data[key]
+
+    def set_quantity(self, product_pk, option_pk, quantity):
+        key = self.encode_key(product_pk, option_pk)
+        with self.update() as data:
+            if key in data:
+                data[key] = quantity
+
+    def remove(self, key_list):
+        with self.update() as data:
+            for product_pk, option_pk in key_list:
+                data.pop(self.encode_key(product_pk, option_pk), None)
+
+    def clear(self):
+        with self.update() as data:
+            data.clear()
+
+    def get_quantities(self):
+        return {self.decode_key(key): quantity for key, quantity in self.load().items()}
+
+    def get_lines(self, for_update=False):
+        quantity_dict = self.get_quantities()
+        product_qs = Product.objects.filter(
+            pk__in={product_pk for product_pk, __ in quantity_dict}
+        )
+        product_dict = {product.pk: product for product in product_qs}
+        option_dict = ProductOption.objects.in_bulk(
+            [option_pk for __, option_pk in quantity_dict if option_pk]
+        )
+
+        line_list = []
+        for (product_pk, option_pk), quantity in quantity_dict.items():
+            product = product_dict.get(product_pk)
+            option = option_dict.get(option_pk)
+            # 그 사이 삭제된 상품/옵션은 제외합니다.
+            if product is None or (option_pk and option is None):
+                continue
+            line_list.append(CartLine(product, option, quantity))
+
+        if for_update:
+            line_list.sort(key=lambda line: line.product.pk)
+        else:
+            line_list.sort(key=lambda line: line.product.name)
+        return line_list
+
+    def flush(self):
+        """회원 장바구니의 현재 내용을 CartProduct 테이블에 반영합니다."""
+        with cache_lock(self.cache_key):
+            quantity_dict = self.get_quantities()
+            with transaction.atomic():
+                CartProduct.objects.filter(user=self.user).delete()
+                CartProduct.objects.bulk_create(
+                    CartProduct(
+                        user=self.user,
+                        product_id=product_pk,
+                        option_id=option_pk,
+                        quantity=quantity,
+                    )
+                    for (product_pk, option_pk), quantity in quantity_dict.items()
+                )
+
+
+@contextmanager
+def cache_lock(key: str, timeout: float = 5, wait: float = 2):
+    """
+    cache.add() 로 짧은 잠금을 잡습니다.
+
+    잠금을 잡은 프로세스가 죽어도 timeout 뒤에는 풀립니다. wait 동안 잡지 못하면 경고를 남기고
+    잠금 없이 진행합니다.
+    """
+    lock_key = f"{key}:lock"
+    token = uuid4().hex
+    deadline = time.monotonic() + wait
+    acquired = cache.add(lock_key, token, timeout)
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(0.005)
+        acquired = cache.add(lock_key, token, timeout)
+    if not acquired:
+        logger.warning("캐시 잠금을 잡지 못했습니다: %s", lock_key)
+    try:
+        yield
+    finally:
+        if acquired and cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def mark_dirty(user_pk):
+    with cache_lock(DIRTY_CART_SET_KEY):
+        user_pk_set = cache.get(DIRTY_CART_SET_KEY) or set()
+        user_pk_set.add(user_pk)
+        cache.set(DIRTY_CART_SET_KEY, user_pk_set, None)
+
+
+def pop_dirty_user_pks() -> set:
+    with cache_lock(DIRTY_CART_SET_KEY):
+        user_pk_set = cache.get(DIRTY_CART_SET_KEY) or set()
+        cache.delete(DIRTY_CART_SET_KEY)
+    return user_pk_set
+
+
+def get_user_cart(user) -> BaseCartStore:
+    store_class = import_string(settings.MALL_CART_STORE)
+    return store_class.for_user(user)
+
+
+def get_cart(request) -> BaseCartStore:
+    """요청한 사용자의 장바구니를 반환합니다. 비회원은 세션의 장바구니를 사용합니다."""
+    if request.user.is_authenticated:
+        return get_user_cart(request.user)
+
+    session_cart_id = request.session.get(SESSION_CART_ID_KEY)
+    if session_cart_id is None:
+        session_cart_id = request.session[SESSION_CART_ID_KEY] = uuid4().hex
+    return CacheCartStore.for_session(session_cart_id)
+
+
+def merge_session_cart(request, user):
+    """로그인 전에 담은 비회원 장바구니를 회원 장바구니에 합칩니다."""
+    session_cart_id = request.session.pop(SESSION_CART_ID_KEY, None)
+    if session_cart_id is None:
+        return
+
+    session_cart = CacheCartStore.for_session(session_cart_id)
+    quantity_dict = session_cart.get_quantities()
+    if quantity_dict:
+        user_cart = get_user_cart(user)
+        for (product_pk, option_pk), quantity in quantity_dict.items():
+            # 그 사이 판매가 중지된 상품은 합치지 않습니다.
+            user_cart.add(product_pk, option_pk, quantity)
+    cache.delete(session_cart.cache_key)
+
+
+def add_product(user, product_pk, option_pk, quantity: int = 1) -> Optional[int]:
+    """
+    CartProduct 테이블의 장바구니에 상품을 담고, 담긴 뒤의 수량을 반환합니다.
+
+    판매 중인 상품이 아니거나 옵션이 상품의 옵션이 아니면 담지 않고 None 을 반환합니다.
+    """
+    if quantity < 1:
+        raise ValueError("수량은 1 이상이어야 합니다.")
+
+    using = router.db_for_write(CartProduct)
+    connection = connections[using]
+    if connection.features.supports_update_conflicts_with_target:
+        return _upsert(connection, user.pk, product_pk, option_pk, quantity)
+    return _add_product_fallback(user, product_pk, option_pk, quantity)
+
+
+def _upsert(connection, user_pk, product_pk, option_pk, quantity) -> Optional[int]:
+    qn = connection.ops.quote_name
+    cart_table = qn(CartProduct._meta.db_table)
+    product_table = qn(Product._meta.db_table)
+    option_table = qn(ProductOption._meta.db_table)
+
+    # 상품/옵션 조건을 만족하지 않으면 SELECT 결과가 없어 아무것도 INSERT 하지 않습니다.
+    # (SQLite 는 INSERT ... SELECT 뒤의 ON CONFLICT 를 구분하기 위해 WHERE 절이 필요합니다.)
+    sql = f"""
+        INSERT INTO {cart_table} (user_id, product_id, option_id, quantity)
+        SELECT %s, p.id, o.id, %s
+        FROM {product_table} p
+        INNER JOIN {option_table} o ON o.product_id = p.id
+        WHERE p.id = %s AND p.status = %s AND o.id = %s
+        ON CONFLICT (user_id, product_id, option_id)
+        DO UPDATE SET quantity = {cart_table}.quantity + EXCLUDED.quantity
+        RETURNING quantity
+    """
+    params = [user_pk, quantity, product_pk, Product.Status.ACTIVE, option_pk]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _add_product_fallback(user, product_pk, option_pk, quantity) -> Optional[int]:
+    """ON CONFLICT 를 지원하지 않는 데이터베이스용. 조건부 UPDATE 후 없으면 INSERT 합니다."""
+    option_qs = ProductOption.objects.filter(
+        pk=option_pk, product_id=product_pk, product__status=Product.Status.ACTIVE
+    )
+    if not option_qs.exists():
+        return None
+
+    cart_product_qs = CartProduct.objects.filter(
+        user=user, product_id=product_pk, option_id=option_pk
+    )
+    for __ in range(2):
+        if cart_product_qs.update(quantity=F("quantity") + quantity):
+            return cart_product_qs.values_list("quantity", flat=True).first()
+        try:
+            with transaction.atomic():
+                CartProduct.objects.create(
+                    user=user,
+                    product_id=product_pk,
+                    option_id=option_pk,
+                    quantity=quantity,
+                )
+            return quantity
+        except IntegrityError:
+            # 동시에 들어온 요청이 먼저 INSERT 한 경우 UPDATE 를 다시 시도합니다.
+            continue
+    raise IntegrityError("장바구니에 상품을 담지 못했습니다.")
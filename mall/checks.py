@@ -0,0 +1,66 @@
+"""
+시스템 체크 (manage.py check).
+
+비회원 장바구니, CacheCartStore, 캐시 세션은 여러 프로세스(웹 워커, flush_carts)가 같은
+캐시를 읽고 써야 합니다. 프로세스마다 따로인 캐시(기본값인 locmemcache://)를 쓰면 다른 워커로
+간 요청에서 장바구니가 사라지고, flush_carts 는 반영할 장바구니를 찾지 못합니다.
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+# 프로세스 사이에 공유되지 않는 캐시 백엔드
+NON_SHARED_CACHE_BACKEND_SET = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+# cached_db 는 데이터베이스에도 저장하므로 제외합니다.
+CACHE_SESSION_ENGINE = "django.contrib.sessions.backends.cache"
+
+SHARED_CACHE_HINT = (
+    "CACHE_URL 로 여러 프로세스가 공유하는 캐시(예: rediscache://)를 지정하세요."
+)
+
+
+def is_shared_cache() -> bool:
+    return settings.CACHES["default"]["BACKEND"] not in NON_SHARED_CACHE_BACKEND_SET
+
+
+@register(Tags.caches)
+def check_cart_store_cache(app_configs, **kwargs):
+    """CacheCartStore 는 flush_carts 가 다른 프로세스에서 실행되므로 항상 공유 캐시가 필요합니다."""
+    if settings.MALL_CART_STORE != "mall.cart.CacheCartStore" or is_shared_cache():
+        return []
+    return [
+        Error(
+            "MALL_CART_STORE=mall.cart.CacheCartStore 는 공유 캐시가 필요합니다. "
+            "flush_carts 가 웹 프로세스의 장바구니를 읽지 못해 CartProduct 에 반영되지 않습니다.",
+            hint=SHARED_CACHE_HINT,
+            id="mall.E001",
+        )
+    ]
+
+
+@register(Tags.caches, deploy=True)
+def check_anonymous_cart_cache(app_configs, **kwargs):
+    """비회원 장바구니(와 캐시 세션)는 웹 프로세스가 여러 개일 때 공유 캐시가 필요합니다."""
+    if is_shared_cache():
+        return []
+    warning_list = [
+        Warning(
+            "비회원 장바구니는 캐시에 저장하므로, 웹 프로세스가 여러 개이면 다른 프로세스로 간 "
+            "요청에서 장바구니가 사라집니다.",
+            hint=SHARED_CACHE_HINT,
+            id="mall.W001",
+        )
+    ]
+    if settings.SESSION_ENGINE == CACHE_SESSION_ENGINE:
+        warning_list.append(
+            Warning(
+                f"SESSION_ENGINE={CACHE_SESSION_ENGINE} 의 세션이 프로세스마다 따로 저장됩니다.",
+                hint=SHARED_CACHE_HINT,
+                id="mall.W002",
+            )
+        )
+    return warning_list
@@ -1,12 +1,18 @@
-import json
 import functools
+import hashlib
+import json
+import logging
+from uuid import UUID
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.http import HttpResponseForbidden, HttpResponse, HttpRequest
-from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
 from PaymentPractice import settings
-from mall.models import OrderPayment
+from mall.models import PortOneWebhookEvent
+
+logger = logging.getLogger(__name__)
 
 
 def deny_from_untrusted_hosts(allowed_ip_list):
@@ -15,12 +21,23 @@ def deny_from_untrusted_hosts(allowed_ip_list):
         return client_ip
 
     def decorator(view_func):
-        @functools.wraps(view_func)
-        def wrapper(request, *args, **kwargs):
-            client_ip = request.META.get("REMOTE_ADDR")
-            if client_ip not in allowed_ip_list:
-                return HttpResponseForbidden("허용되지 않은 IP에서의 요청입니다.")
-            return view_func(request, *args, **kwargs)
+        if iscoroutinefunction(view_func):
+
+            @functools.wraps(view_func)
+            async def wrapper(request, *args, **kwargs):
+                client_ip = request.META.get("REMOTE_ADDR")
+                if client_ip not in allowed_ip_list:
+                    return HttpResponseForbidden("허용되지 않은 IP에서의 요청입니다.")
+                return await view_func(request, *args, **kwargs)
+
+        else:
+
+            @functools.wraps(view_func)
+            def wrapper(request, *args, **kwargs):
+                client_ip = request.META.get("REMOTE_ADDR")
+                if client_ip not in allowed_ip_list:
+                    return HttpResponseForbidden("허용되지 않은 IP에서의 요청입니다.")
+                return view_func(request, *args, **kwargs)
 
         return wrapper
 
@@ -31,15 +48,82 @@ def deny_from_untrusted_hosts(allowed_ip_list):
 @csrf_exempt
 @deny_from_untrusted_hosts(settings.ALLOWED_WEBHOOK_IPS)
 def portone_webhook(request):
-    # 요청의 IP 주소를 확인
-    payload = json.loads(request.body)
-    print(payload)
-    merchant_uid = payload.get("data").get("paymentId")
+    event, error_response = parse_webhook_event(request)
+    if error_response is not None:
+        return error_response
+
+    # 포트원 조회와 주문 상태 갱신은 process_payment_jobs 워커가 처리합니다.
+    if not PortOneWebhookEvent.ingest(event):
+        log_duplicate_webhook(event)
+    return HttpResponse("ok")
 
-    if not merchant_uid:
-        return HttpResponse("merchant_uid 인자가 누락되었습니다.", status=400)
 
-    payment = get_object_or_404(OrderPayment, uid=merchant_uid)
-    payment.portone_check()
-    print("payment.is_paid_ok", payment.is_paid_ok)
+@require_POST
+@csrf_exempt
+@deny_from_untrusted_hosts(settings.ALLOWED_WEBHOOK_IPS)
+async def async_portone_webhook(request):
+    """portone_webhook 의 비동기 버전입니다. (MALL_ASYNC_VIEWS)"""
+    event, error_response = parse_webhook_event(request)
+    if error_response is not None:
+        return error_response
+
+    if not await sync_to_async(PortOneWebhookEvent.ingest)(event):
+        log_duplicate_webhook(event)
     return HttpResponse("ok")
+
+
+def get_webhook_event_id(request) -> str:
+    """포트원이 재전송해도 같은 값인 webhook-id 헤더를, 없으면 본문의 해시를 사용합니다."""
+    webhook_id = request.headers.get("webhook-id")
+    if webhook_id:
+        return webhook_id[:100]
+    return f"sha256:{hashlib.sha256(request.body).hexdigest()}"
+
+
+def parse_webhook_event(request):
+    """웹훅 요청을 PortOneWebhookEvent 로 만듭니다. (이벤트, 오류 응답) 을 반환합니다."""
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return None, HttpResponse("본문이 JSON 형식이 아닙니다.", status=400)
+
+    event_id = get_webhook_event_id(request)
+    data = payload.get("data") if isinstance(payload, dict) else None
+    merchant_uid = data.get("paymentId") if isinstance(data, dict) else None
+    event_type = str(payload.get("type", "")) if isinstance(payload, dict) else ""
+    logger.info(
+        "포트원 웹훅 수신: event_id=%s type=%s merchant_uid=%s",
+        event_id,
+        event_type,
+        merchant_uid,
+        extra={
+            "event_id": event_id,
+            "event_type": event_type,
+            "merchant_uid": merchant_uid,
+        },
+    )
+
+    if not merchant_uid:
+        return None, HttpResponse("merchant_uid 인자가 누락되었습니다.", status=400)
+
+    try:
+        merchant_uid = UUID(merchant_uid)
+    except (TypeError, ValueError):
+        return None, HttpResponse("merchant_uid 형식이 올바르지 않습니다.", status=400)
+
+    event = PortOneWebhookEvent(
+        event_id=event_id,
+        event_type=event_type[:50],
+        merchant_uid=merchant_uid,
+        payload=payload,
+    )
+    return event, None
+
+
+def log_duplicate_webhook(event):
+    logger.info(
+        "이미 받은 포트원 웹훅입니다: event_id=%s merchant_uid=%s",
+        event.event_id,
+        event.merchant_uid,
+        extra={"event_id": event.event_id, "merchant_uid": str(event.merchant_uid)},
+    )
@@ -1,12 +1,12 @@
 from django import forms
 
-from mall.models import CartProduct, Comment, ProductOption
+from mall.models import Comment, ProductOption
 
 
-class CartProductForm(forms.ModelForm):
-    class Meta:
-        model = CartProduct
-        fields = ["quantity"]
+class CartLineForm(forms.Form):
+    product_id = forms.IntegerField(widget=forms.HiddenInput)
+    option_id = forms.IntegerField(widget=forms.HiddenInput, required=False)
+    quantity = forms.IntegerField(min_value=1)
 
 
 class CommentForm(forms.ModelForm):
@@ -0,0 +1,105 @@
+"""
+상품 이미지 변환.
+
+원본 이미지는 그대로 두고, 설정에 지정한 형식(WebP/AVIF/JPEG)과 너비별로 렌디션을 만듭니다.
+변환 함수는 프로세스 풀에서 실행할 수 있도록 모듈 최상위 함수로 두고, 장고 설정/모델에
+의존하지 않습니다.
+"""
+
+import logging
+from io import BytesIO
+from typing import List, NamedTuple, Tuple
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# 형식별 (PIL 형식 이름, MIME 타입, 확장자, 저장 옵션)
+FORMAT_DICT = {
+    "avif": ("AVIF", "image/avif", "avif", {"quality": 60}),
+    "webp": ("WEBP", "image/webp", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", "jpg", {"quality": 85, "optimize": True}),
+}
+
+# <picture> 에서 먼저 고를 형식 순서. jpeg 는 <img> 의 기본 이미지로 사용합니다.
+FORMAT_PREFERENCE = ["avif", "webp", "jpeg"]
+
+# 지원하지 않는다고 이미 경고한 형식
+_unsupported_format_set = set()
+
+
+class RenderedImage(NamedTuple):
+    format: str
+    width: int
+    height: int
+    content: bytes
+
+
+def is_format_supported(format: str) -> bool:
+    """설치된 Pillow 가 인코딩할 수 있는 형식인지 확인합니다. (AVIF 는 플러그인이 필요합니다.)"""
+    if format not in FORMAT_DICT:
+        return False
+    Image.init()
+    return FORMAT_DICT[format][0] in Image.SAVE
+
+
+def get_rendition_spec_list() -> List[Tuple[str, int]]:
+    """설정의 렌디션 형식 x 너비 목록을 반환합니다. 지원하지 않는 형식은 제외합니다."""
+    from django.conf import settings
+
+    format_list = []
+    for format in settings.MALL_IMAGE_RENDITION_FORMATS:
+        if is_format_supported(format):
+            format_list.append(format)
+        elif format not in _unsupported_format_set:
+            _unsupported_format_set.add(format)
+            logger.warning("이미지 형식 %s 을(를) 지원하지 않아 제외합니다.", format)
+    return [
+        (format, width)
+        for format in format_list
+        for width in sorted(set(settings.MALL_IMAGE_RENDITION_WIDTHS))
+    ]
+
+
+def render_renditions(
+    data: bytes, spec_list: List[Tuple[str, int]]
+) -> List[RenderedImage]:
+    """
+    이미지를 (형식, 너비) 목록대로 변환합니다.
+
+    원본보다 큰 너비는 원본 너비로 만들며, 같은 크기가 되는 렌디션은 한 번만 만듭니다.
+    """
+    max_width = max((width for __, width in spec_list), default=0)
+    rendered_list = []
+    with Image.open(BytesIO(data)) as original:
+        # JPEG 원본은 디코딩할 때부터 축소해 큰 원본의 디코딩 비용을 줄입니다.
+        original.draft(
+            "RGB", (max_width, max_width * original.height // original.width)
+        )
+        # 휴대폰 사진의 EXIF 회전 정보를 반영합니다.
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        resized_dict = {}
+        for format, width in spec_list:
+            width = min(width, image.width)
+            if (format, width) in {(r.format, r.width) for r in rendered_list}:
+                continue
+            if width not in resized_dict:
+                height = max(1, round(image.height * width / image.width))
+                resized_dict[width] = image.resize(
+                    (width, height), Image.Resampling.LANCZOS, reducing_gap=3.0
+                )
+            resized = resized_dict[width]
+
+            pil_format, __, __, save_kwargs = FORMAT_DICT[format]
+            # JPEG 는 투명도(RGBA)를 지원하지 않습니다.
+            if pil_format == "JPEG" and resized.mode == "RGBA":
+                resized = resized.convert("RGB")
+            output = BytesIO()
+            resized.save(output, format=pil_format, **save_kwargs)
+            rendered_list.append(
+                RenderedImage(format, width, resized.height, output.getvalue())
+            )
+    return rendered_list
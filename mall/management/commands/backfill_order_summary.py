@@ -0,0 +1,46 @@
+from django.core.management import BaseCommand
+from django.db.models import Prefetch
+
+from mall.models import Order, OrderedProduct
+
+
+class Command(BaseCommand):
+    help = "요약 컬럼(상품 수, 첫 상품, 주문명)이 비어있는 기존 주문을 채웁니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        order_qs = (
+            Order.objects.filter(display_name="")
+            .only("pk")
+            .prefetch_related(
+                Prefetch(
+                    "orderedproduct_set",
+                    queryset=OrderedProduct.objects.only(
+                        "order_id", "product_id", "name"
+                    ),
+                )
+            )
+            .order_by("pk")
+        )
+
+        last_pk = 0
+        total = 0
+        while True:
+            order_list = list(order_qs.filter(pk__gt=last_pk)[: options["chunk_size"]])
+            if not order_list:
+                break
+
+            for order in order_list:
+                order.set_summary(list(order.orderedproduct_set.all()))
+            Order.objects.bulk_update(
+                order_list,
+                ["item_count", "first_product", "first_product_name", "display_name"],
+            )
+
+            last_pk = order_list[-1].pk
+            total += len(order_list)
+            self.stdout.write(f"pk <= {last_pk}: {total}건 처리")
+
+        self.stdout.write(self.style.SUCCESS(f"주문 요약 채우기 완료: {total}건"))
@@ -0,0 +1,132 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management import BaseCommand
+from django.db import connections
+from django.test import override_settings
+
+from accounts.models import User
+from mall import portone_cache
+from mall.management.commands.bench_portone import percentile
+from mall.models import Order, OrderPayment
+from mall.portone_stub import run_stub_process
+
+BENCH_USERNAME = "bench-checkout"
+
+
+class Command(BaseCommand):
+    help = (
+        "포트원 응답 지연을 흉내 낸 스텁 서버로 order_check 의 결제 검증 경로를 "
+        "동기(스레드 워커)와 비동기(단일 이벤트 루프) 방식으로 비교합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--payments", type=int, default=300)
+        parser.add_argument(
+            "--latency", type=float, default=0.3, help="포트원 응답 지연(초)"
+        )
+        parser.add_argument(
+            "--sync-workers",
+            type=int,
+            default=8,
+            help="동기 방식의 동시 처리 수 (WSGI 워커 x 스레드 수)",
+        )
+        parser.add_argument(
+            "--async-connections",
+            type=int,
+            default=300,
+            help="비동기 클라이언트의 최대 동시 커넥션 수",
+        )
+        parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+
+    def handle(self, *args, **options):
+        payment_pk_list = self.create_payments(options["payments"])
+        try:
+            with run_stub_process(
+                latency=options["latency"], default_status="PAID", default_amount=1000
+            ) as stub_url, override_settings(
+                PORTONE_API_BASE_URL=stub_url,
+                PORTONE_API_SECRET="bench",
+                PORTONE_POOL_MAXSIZE=options["sync_workers"],
+                PORTONE_ASYNC_MAX_CONNECTIONS=options["async_connections"],
+            ):
+                if options["mode"] in ("sync", "both"):
+                    self.clear_payment_cache(payment_pk_list)
+                    self.report("sync", self.run_sync(payment_pk_list, options))
+                if options["mode"] in ("async", "both"):
+                    self.clear_payment_cache(payment_pk_list)
+                    self.report("async", asyncio.run(self.run_async(payment_pk_list)))
+        finally:
+            Order.objects.filter(user__username=BENCH_USERNAME).delete()
+
+    def create_payments(self, size):
+        user, __ = User.objects.get_or_create(username=BENCH_USERNAME)
+        order_list = Order.objects.bulk_create(
+            [Order(user=user, total_amount=1000) for __ in range(size)]
+        )
+        OrderPayment.objects.bulk_create(
+            [
+                OrderPayment(
+                    order=order,
+                    name="bench",
+                    desired_amount=order.total_amount,
+                    buyer_name=user.username,
+                    buyer_email="",
+                )
+                for order in order_list
+            ]
+        )
+        return list(
+            OrderPayment.objects.filter(order__user=user).values_list("pk", flat=True)
+        )
+
+    @staticmethod
+    def clear_payment_cache(payment_pk_list):
+        # 앞선 방식이 캐시한 결제 내역을 지워야 포트원 응답 지연을 다시 측정합니다.
+        cache.delete_many(
+            [
+                portone_cache.get_cache_key(uid)
+                for uid in OrderPayment.objects.filter(
+                    pk__in=payment_pk_list
+                ).values_list("uid", flat=True)
+            ]
+        )
+
+    def run_sync(self, payment_pk_list, options):
+        def check(pk):
+            started = time.perf_counter()
+            payment = OrderPayment.objects.select_related("order").get(pk=pk)
+            payment.portone_check()
+            elapsed = time.perf_counter() - started
+            connections.close_all()
+            return elapsed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["sync_workers"]) as executor:
+            elapsed_list = list(executor.map(check, payment_pk_list))
+        return elapsed_list, time.perf_counter() - started
+
+    async def run_async(self, payment_pk_list):
+        async def check(pk):
+            started = time.perf_counter()
+            payment = await OrderPayment.objects.select_related("order").aget(pk=pk)
+            await payment.aportone_check()
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        elapsed_list = await asyncio.gather(*(check(pk) for pk in payment_pk_list))
+        return list(elapsed_list), time.perf_counter() - started
+
+    def report(self, label, result):
+        elapsed_list, total_elapsed = result
+        elapsed_list = sorted(elapsed_list)
+        self.stdout.write(
+            f"{label:>5}: {len(elapsed_list)}건 {total_elapsed:.2f}s "
+            f"throughput={len(elapsed_list) / total_elapsed:.1f}건/s "
+            f"p50={percentile(elapsed_list, 50) * 1000:.0f}ms "
+            f"p99={percentile(elapsed_list, 99) * 1000:.0f}ms "
+            f"mean={statistics.mean(elapsed_list) * 1000:.0f}ms"
+        )
@@ -0,0 +1,133 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import BaseCommand
+from django.db import DatabaseError, connection
+from django.db.models import Sum
+
+from accounts.models import User
+from mall.cart import DatabaseCartStore
+from mall.management.commands.bench_portone import percentile
+from mall.models import (
+    CartProduct,
+    Category,
+    Order,
+    OutOfStockError,
+    Product,
+    StockReservation,
+)
+
+BENCH_USERNAME_PREFIX = "bench-flash-sale-"
+BENCH_CATEGORY_NAME = "bench-flash-sale"
+
+
+class Command(BaseCommand):
+    help = (
+        "재고가 적은 상품을 많은 구매자가 동시에 주문할 때(플래시 세일) "
+        "초과 판매 여부와 주문 생성 지연 시간을 측정합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buyers", type=int, default=300, help="구매자 수")
+        parser.add_argument("--stock", type=int, default=10, help="상품 재고")
+        parser.add_argument("--quantity", type=int, default=1, help="구매자별 수량")
+        parser.add_argument("--concurrency", type=int, default=50)
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            self.stderr.write(
+                "SQLite 는 쓰기 트랜잭션을 데이터베이스 단위로 잠그므로, "
+                "행 단위 경합은 PostgreSQL 에서 측정해야 합니다."
+            )
+
+        category, __ = Category.objects.get_or_create(name=BENCH_CATEGORY_NAME)
+        product = Product.objects.create(
+            category=category,
+            name="bench-flash-sale",
+            description="",
+            price=1000,
+            stock=options["stock"],
+        )
+        user_list = User.objects.bulk_create(
+            [
+                User(username=f"{BENCH_USERNAME_PREFIX}{i}")
+                for i in range(options["buyers"])
+            ]
+        )
+        CartProduct.objects.bulk_create(
+            [
+                CartProduct(user=user, product=product, quantity=options["quantity"])
+                for user in user_list
+            ]
+        )
+        try:
+            result = self.run(user_list, options["concurrency"])
+            self.report(product, options, result)
+        finally:
+            Order.objects.filter(user__in=user_list).delete()
+            CartProduct.objects.filter(user__in=user_list).delete()
+            User.objects.filter(pk__in=[user.pk for user in user_list]).delete()
+            product.delete()
+            category.delete()
+
+    def run(self, user_list, concurrency):
+        def buy(user):
+            started = time.perf_counter()
+            try:
+                Order.create_from_cart(user, DatabaseCartStore(user))
+                result = "ordered"
+            except OutOfStockError:
+                result = "sold_out"
+            except DatabaseError as e:
+                result = f"error: {e}"
+            finally:
+                connection.close()
+            return result, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            result_list = list(executor.map(buy, user_list))
+        return result_list, time.perf_counter() - started
+
+    def report(self, product, options, result):
+        result_list, elapsed = result
+        ordered_count = sum(1 for status, __ in result_list if status == "ordered")
+        sold_out_count = sum(1 for status, __ in result_list if status == "sold_out")
+        error_list = [
+            status for status, __ in result_list if status.startswith("error")
+        ]
+        elapsed_list = sorted(seconds for __, seconds in result_list)
+
+        product.refresh_from_db(fields=["stock"])
+        reserved = (
+            StockReservation.objects.filter(product=product).aggregate(
+                total=Sum("quantity")
+            )["total"]
+            or 0
+        )
+        self.stdout.write(
+            f"구매자 {len(result_list)}명, 동시 {options['concurrency']}: "
+            f"주문 {ordered_count}건, 품절 {sold_out_count}건, 오류 {len(error_list)}건, "
+            f"{elapsed:.2f}s"
+        )
+        self.stdout.write(
+            f"p50={percentile(elapsed_list, 50) * 1000:.1f}ms "
+            f"p99={percentile(elapsed_list, 99) * 1000:.1f}ms "
+            f"mean={statistics.mean(elapsed_list) * 1000:.1f}ms"
+        )
+        for error in sorted(set(error_list))[:5]:
+            self.stderr.write(error)
+
+        expected_stock = options["stock"] - ordered_count * options["quantity"]
+        if product.stock == expected_stock and reserved <= options["stock"]:
+            self.stdout.write(
+                self.style.SUCCESS(f"초과 판매 없음: 남은 재고 {product.stock}")
+            )
+        else:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"재고 불일치: 남은 재고 {product.stock}, "
+                    f"예상 {expected_stock}, 예약 {reserved}"
+                )
+            )
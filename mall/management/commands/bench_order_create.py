@@ -0,0 +1,96 @@
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from mall.cart import DatabaseCartStore
+from mall.management.commands.bench_portone import percentile
+from mall.models import CartProduct, Category, Order, Product, ProductOption
+
+BENCH_USERNAME = "bench-order-create"
+BENCH_CATEGORY_NAME = "bench-order-create"
+
+
+class Command(BaseCommand):
+    help = (
+        "장바구니 크기별로 Order.create_from_cart 의 소요 시간과 쿼리 수를 측정합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[1, 50, 500],
+            help="장바구니 상품 수",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        user, __ = User.objects.get_or_create(username=BENCH_USERNAME)
+        category, __ = Category.objects.get_or_create(name=BENCH_CATEGORY_NAME)
+        try:
+            for size in options["sizes"]:
+                self.create_cart(user, category, size)
+                self.report(size, self.run(user, options["repeat"]))
+        finally:
+            Order.objects.filter(user=user).delete()
+            CartProduct.objects.filter(user=user).delete()
+            Product.objects.filter(category=category).delete()
+            category.delete()
+
+    def create_cart(self, user, category, size):
+        CartProduct.objects.filter(user=user).delete()
+        product_list = Product.objects.filter(category=category)[:size]
+        missing = size - len(product_list)
+        if missing > 0:
+            new_product_list = Product.objects.bulk_create(
+                [
+                    Product(
+                        category=category,
+                        name=f"bench-{i}",
+                        description="",
+                        price=1000,
+                    )
+                    for i in range(missing)
+                ]
+            )
+            ProductOption.objects.bulk_create(
+                [
+                    ProductOption(product=product, name="bench", additional_price=500)
+                    for product in new_product_list
+                ]
+            )
+        CartProduct.objects.bulk_create(
+            [
+                CartProduct(user=user, product=option.product, option=option)
+                for option in ProductOption.objects.filter(
+                    product__category=category
+                ).select_related("product")[:size]
+            ]
+        )
+
+    def run(self, user, repeat):
+        elapsed_list = []
+        for __ in range(repeat):
+            # 매번 같은 장바구니로 주문하도록 생성한 주문은 롤백합니다.
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                with transaction.atomic():
+                    Order.create_from_cart(user, DatabaseCartStore(user))
+                    elapsed_list.append(time.perf_counter() - started)
+                    transaction.set_rollback(True)
+        return elapsed_list, len(context.captured_queries)
+
+    def report(self, size, result):
+        elapsed_list, num_queries = result
+        elapsed_list = sorted(elapsed_list)
+        self.stdout.write(
+            f"{size:>5}개: queries={num_queries} "
+            f"p50={percentile(elapsed_list, 50) * 1000:.1f}ms "
+            f"p99={percentile(elapsed_list, 99) * 1000:.1f}ms "
+            f"mean={statistics.mean(elapsed_list) * 1000:.1f}ms"
+        )
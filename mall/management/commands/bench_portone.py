@@ -0,0 +1,118 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+import requests
+from django.core.cache import cache
+from django.core.management import BaseCommand
+from django.test.utils import override_settings
+
+from mall import portone_cache
+from mall.portone import PortOneClient
+from mall.portone_stub import PortOneStubServer
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = "포트원 결제 조회 호출의 지연 시간(p50/p99)을 측정합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--duplicates",
+            type=int,
+            default=1,
+            help="결제건마다 조회하는 횟수 (예: 리다이렉트, 웹훅, 새로고침이면 3)",
+        )
+        parser.add_argument(
+            "--latency", type=float, default=0.0, help="스텁 서버 응답 지연(초)"
+        )
+        parser.add_argument(
+            "--base-url",
+            default=None,
+            help="지정하지 않으면 로컬 스텁 서버를 띄워서 측정합니다.",
+        )
+
+    def handle(self, *args, **options):
+        if options["base_url"]:
+            self.run(options["base_url"], options)
+        else:
+            with PortOneStubServer(latency=options["latency"]) as server:
+                self.run(server.url, options)
+
+    def run(self, base_url, options):
+        client = PortOneClient(
+            api_secret="bench",
+            base_url=base_url,
+            pool_maxsize=options["concurrency"],
+        )
+
+        def pooled_call(payment_id):
+            client.get_payment(payment_id)
+
+        def cached_call(payment_id):
+            portone_cache.get_payment(payment_id)
+
+        def bare_call(payment_id):
+            requests.get(
+                f"{base_url}/payments/{payment_id}",
+                headers={"Authorization": "PortOne bench"},
+            ).json()
+
+        try:
+            for label, func in [
+                ("requests.get", bare_call),
+                ("PortOneClient", pooled_call),
+            ]:
+                self.report(label, self.measure(func, options))
+
+            cache.clear()
+            portone_cache.reset_cache_stats()
+            with override_settings(
+                PORTONE_API_BASE_URL=base_url,
+                PORTONE_POOL_MAXSIZE=options["concurrency"],
+            ):
+                self.report("portone_cache", self.measure(cached_call, options))
+            stats = portone_cache.get_cache_stats()
+            self.stdout.write(
+                f"{'':>14}  hits={stats['hits']} misses={stats['misses']} "
+                f"coalesced={stats['coalesced']} hit_ratio={stats['hit_ratio']:.2f}"
+            )
+        finally:
+            client.close()
+
+    def measure(self, func, options):
+        def timed(payment_id):
+            started = time.perf_counter()
+            func(payment_id)
+            return time.perf_counter() - started
+
+        duplicates = max(1, options["duplicates"])
+        unique_ids = [uuid4().hex for __ in range(options["requests"] // duplicates)]
+        # 같은 결제건의 조회가 가까운 시점에 몰리도록 이어서 배치합니다.
+        payment_ids = [
+            payment_id for payment_id in unique_ids for __ in range(duplicates)
+        ]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            elapsed_list = sorted(executor.map(timed, payment_ids))
+        total_elapsed = time.perf_counter() - started
+        return elapsed_list, total_elapsed
+
+    def report(self, label, result):
+        elapsed_list, total_elapsed = result
+        self.stdout.write(
+            f"{label:>14}: "
+            f"p50={percentile(elapsed_list, 50) * 1000:.2f}ms "
+            f"p99={percentile(elapsed_list, 99) * 1000:.2f}ms "
+            f"mean={statistics.mean(elapsed_list) * 1000:.2f}ms "
+            f"throughput={len(elapsed_list) / total_elapsed:.1f}req/s"
+        )
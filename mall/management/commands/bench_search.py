@@ -0,0 +1,130 @@
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand
+
+from mall.management.commands.bench_portone import percentile
+from mall.models import Category, Product
+from mall.search import (
+    AutoSearchBackend,
+    IContainsSearchBackend,
+    get_search_backend,
+)
+
+BENCH_CATEGORY_NAME = "bench-search"
+
+WORD_LIST = [
+    "유기농",
+    "무농약",
+    "국내산",
+    "제주",
+    "햇",
+    "사과",
+    "감귤",
+    "배",
+    "고구마",
+    "감자",
+    "양파",
+    "한우",
+    "등심",
+    "닭가슴살",
+    "현미",
+    "찹쌀",
+    "선물세트",
+    "프리미엄",
+    "특대",
+    "가정용",
+]
+
+# 실제 카탈로그처럼 검색어가 일부 상품에만 일치하도록 두 음절 단어를 만들어 어휘를 늘립니다.
+SYLLABLE_LIST = list(
+    "가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무"
+)
+VOCABULARY = WORD_LIST + [a + b for a in SYLLABLE_LIST for b in SYLLABLE_LIST]
+
+QUERY_LIST = ["사과", "제주 감귤", "한우 등심", "선물세트", "유기농 현미", "가정용"]
+
+
+class Command(BaseCommand):
+    help = (
+        "상품 수별로 전문 검색 백엔드와 상품명 부분 일치(icontains) 검색을 비교합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--page-size", type=int, default=4)
+        parser.add_argument(
+            "--keep", action="store_true", help="생성한 벤치마크 상품을 남겨둡니다."
+        )
+
+    def handle(self, *args, **options):
+        category, __ = Category.objects.get_or_create(name=BENCH_CATEGORY_NAME)
+        backend = get_search_backend()
+        if isinstance(backend, AutoSearchBackend):
+            backend = backend.backend
+        backend_list = [
+            ("icontains", IContainsSearchBackend()),
+            (type(backend).__name__, backend),
+        ]
+        try:
+            for size in options["sizes"]:
+                self.fill_products(category, size)
+                product_qs = Product.objects.filter(category=category)
+                for label, backend in backend_list:
+                    self.report(size, label, self.run(backend, product_qs, options))
+        finally:
+            if not options["keep"]:
+                Product.objects.filter(category=category).delete()
+                category.delete()
+
+    def fill_products(self, category, size):
+        exists = Product.objects.filter(category=category).count()
+        rand = random.Random(exists)
+        batch_size = 5000
+        for start in range(exists, size, batch_size):
+            product_list = []
+            for i in range(start, min(start + batch_size, size)):
+                name = " ".join(rand.sample(VOCABULARY, 3))
+                product = Product(
+                    category=category,
+                    name=name,
+                    description=f"<p>{' '.join(rand.sample(VOCABULARY, 8))}</p>",
+                    price=1000,
+                    specifications={"원산지": rand.choice(["국내산", "수입산"])},
+                )
+                product.update_search_document()
+                product_list.append(product)
+            Product.objects.bulk_create(product_list)
+            self.stdout.write(
+                f"상품 {start + len(product_list)}/{size}개 생성", ending="\r"
+            )
+        self.stdout.write("")
+
+    def run(self, backend, product_qs, options):
+        # 상품을 대량으로 추가한 직후의 첫 검색은 캐시가 비어 있어 느리므로 한 번 먼저 실행합니다.
+        for query in QUERY_LIST:
+            list(backend.search(product_qs, query)[: options["page_size"]])
+
+        elapsed_list = []
+        for __ in range(options["repeat"]):
+            for query in QUERY_LIST:
+                started = time.perf_counter()
+                # 상품 목록 페이지와 같이 전체 개수와 첫 페이지를 조회합니다.
+                qs = backend.search(product_qs, query)
+                qs.count()
+                list(qs[: options["page_size"]])
+                elapsed_list.append(time.perf_counter() - started)
+        return elapsed_list
+
+    def report(self, size, label, elapsed_list):
+        elapsed_list = sorted(elapsed_list)
+        self.stdout.write(
+            f"{size:>9}개 {label:>24}: "
+            f"p50={percentile(elapsed_list, 50) * 1000:.1f}ms "
+            f"p99={percentile(elapsed_list, 99) * 1000:.1f}ms "
+            f"mean={statistics.mean(elapsed_list) * 1000:.1f}ms"
+        )
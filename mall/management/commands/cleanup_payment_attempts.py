@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from mall.models import OrderPayment
+
+
+class Command(BaseCommand):
+    help = "결제되지 않은 채 오래된 결제 시도(미결제/결제실패)를 나눠서 지웁니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=60 * 24,
+            help="생성된 지 N분이 지난 결제 시도만 지웁니다. (reconcile_payments 의 대사 대상보다 오래된 것)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="지울 결제 시도 수만 출력"
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(minutes=options["older_than"])
+        qs = OrderPayment.objects.filter(
+            pay_status__in=[
+                OrderPayment.PayStatus.READY,
+                OrderPayment.PayStatus.FAILED,
+            ],
+            is_paid_ok=False,
+            created_at__lt=cutoff,
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"지울 결제 시도: {qs.count()}건")
+            return
+
+        deleted_total = 0
+        while True:
+            # 한 번에 많은 행을 지우면 잠금이 오래 유지되므로 pk 순서로 나눠 지웁니다.
+            pk_list = list(
+                qs.order_by("pk").values_list("pk", flat=True)[: options["batch_size"]]
+            )
+            if not pk_list:
+                break
+            deleted_count, __ = OrderPayment.objects.filter(pk__in=pk_list).delete()
+            deleted_total += deleted_count
+            self.stdout.write(f"pk <= {pk_list[-1]}: {deleted_total}건 삭제")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"결제 시도 정리 완료: {deleted_total}건 삭제")
+        )
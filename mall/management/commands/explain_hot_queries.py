@@ -0,0 +1,154 @@
+import re
+from uuid import uuid4
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from mall.models import (
+    CartProduct,
+    Order,
+    OrderPayment,
+    PaymentVerificationJob,
+    Product,
+    StockReservation,
+)
+
+# SQLite: "SCAN mall_order" (인덱스 없이 전체 읽기), "USE TEMP B-TREE FOR ORDER BY" (정렬)
+# PostgreSQL: "Seq Scan on mall_order", "Sort"
+FULL_SCAN_RE_DICT = {
+    "sqlite": re.compile(r"\bSCAN (\w+)$", re.MULTILINE),
+    "postgresql": re.compile(r"\bSeq Scan on (\w+)"),
+}
+SORT_RE_DICT = {
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR ORDER BY"),
+    "postgresql": re.compile(r"\bSort\b"),
+}
+
+
+def get_hot_query_list():
+    """(이름, 설명, 쿼리셋, 인덱스 순서로 읽어야 하는지) 목록"""
+    user_id = User.objects.values_list("pk", flat=True).first() or 0
+    last_product_pk = Product.objects.values_list("pk", flat=True).first() or 0
+    return [
+        (
+            "order_list",
+            "사용자의 주문 목록 (최신순)",
+            Order.objects.filter(user_id=user_id).with_summary().order_by("-pk")[:10],
+            True,
+        ),
+        (
+            "product_list",
+            "판매 중인 상품 목록 (최신순)",
+            Product.objects.filter(status=Product.Status.ACTIVE).select_related(
+                "category"
+            )[:5],
+            True,
+        ),
+        (
+            "product_list_cursor",
+            "판매 중인 상품 목록 다음 페이지 (커서)",
+            Product.objects.filter(
+                status=Product.Status.ACTIVE, pk__lt=last_product_pk
+            ).values_list("pk", flat=True)[:5],
+            True,
+        ),
+        (
+            "cart",
+            "사용자의 장바구니 (상품명순)",
+            CartProduct.objects.filter(user_id=user_id)
+            .select_related("product", "option")
+            .with_amount()
+            .order_by("product__name", "pk"),
+            False,
+        ),
+        (
+            "payment_by_uid",
+            "웹훅/결제 검증 작업의 결제건 조회",
+            OrderPayment.objects.filter(uid=uuid4()),
+            False,
+        ),
+        (
+            "payment_job_claim",
+            "처리할 결제 검증 작업",
+            PaymentVerificationJob.objects.filter(
+                status=PaymentVerificationJob.Status.PENDING,
+                available_at__lte=timezone.now(),
+            ).values_list("pk", flat=True)[:10],
+            False,
+        ),
+        (
+            "expired_stock",
+            "만료된 재고 예약",
+            StockReservation.objects.filter(
+                status=StockReservation.Status.RESERVED,
+                expires_at__lte=timezone.now(),
+            ),
+            False,
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = "주요 조회 쿼리의 실행 계획을 출력합니다. (--check 로 인덱스를 쓰지 않는 쿼리를 찾습니다.)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="출력할 쿼리 이름 (기본: 전체)")
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="실제로 실행해 걸린 시간도 출력합니다. (PostgreSQL)",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="전체 테이블을 읽거나 따로 정렬하는 쿼리가 있으면 실패합니다.",
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        explain_options = {}
+        if options["analyze"]:
+            if vendor == "postgresql":
+                explain_options = {"analyze": True, "buffers": True}
+            else:
+                self.stderr.write(f"{vendor} 에서는 --analyze 를 지원하지 않습니다.")
+
+        hot_query_list = get_hot_query_list()
+        if options["names"]:
+            unknown_name_set = set(options["names"]) - {
+                name for name, *__ in hot_query_list
+            }
+            if unknown_name_set:
+                raise CommandError(f"알 수 없는 쿼리: {', '.join(unknown_name_set)}")
+            hot_query_list = [q for q in hot_query_list if q[0] in options["names"]]
+
+        problem_list = []
+        for name, description, qs, sorted_by_index in hot_query_list:
+            plan = self.explain(qs, explain_options, options["check"])
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name}: {description}"))
+            self.stdout.write(plan)
+            self.stdout.write("")
+
+            if vendor not in FULL_SCAN_RE_DICT:
+                continue
+            for table in FULL_SCAN_RE_DICT[vendor].findall(plan):
+                problem_list.append(f"{name}: {table} 전체 읽기")
+            if sorted_by_index and SORT_RE_DICT[vendor].search(plan):
+                problem_list.append(f"{name}: 인덱스 순서로 읽지 않고 정렬")
+
+        if options["check"]:
+            if problem_list:
+                raise CommandError("\n".join(problem_list))
+            self.stdout.write(self.style.SUCCESS("모든 쿼리가 인덱스를 사용합니다."))
+
+    @staticmethod
+    def explain(qs, explain_options, check) -> str:
+        if not (check and connection.vendor == "postgresql"):
+            return qs.explain(**explain_options)
+        # 행이 적은 테이블은 인덱스가 있어도 전체 읽기를 고르므로, 인덱스를 쓸 수 있는지만 확인합니다.
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            return qs.explain(**explain_options)
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management import BaseCommand
+
+from accounts.models import User
+from mall.cart import CacheCartStore, mark_dirty, pop_dirty_user_pks
+
+
+class Command(BaseCommand):
+    help = "캐시에 저장된 회원 장바구니(CacheCartStore)의 변경 내용을 CartProduct 테이블에 반영합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="반영 주기(초). 0 이면 한 번만 반영하고 종료",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            flushed_count = self.flush()
+            if flushed_count:
+                self.stdout.write(f"장바구니 {flushed_count}개를 반영했습니다.")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    def flush(self) -> int:
+        user_pk_set = pop_dirty_user_pks()
+        flushed_count = 0
+        for user in User.objects.filter(pk__in=user_pk_set):
+            try:
+                CacheCartStore.for_user(user).flush()
+            except Exception as e:
+                # 다음 실행에서 다시 반영합니다.
+                self.stderr.write(f"장바구니 반영 실패 (user={user.pk}): {e}")
+                mark_dirty(user.pk)
+            else:
+                flushed_count += 1
+        return flushed_count
@@ -0,0 +1,94 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management import BaseCommand
+
+from mall.imaging import get_rendition_spec_list, render_renditions
+from mall.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = "상품 이미지의 렌디션(형식/너비별 변환본)을 만듭니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="이미지 변환 프로세스 수",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--retry-failed", action="store_true", help="실패한 이미지도 다시 변환"
+        )
+        # 변환 중에 프로세스가 종료되어 RUNNING 으로 남은 이미지는 임대 시간
+        # (MALL_IMAGE_RENDITION_LEASE_TIMEOUT)이 지나면 항상 다시 변환합니다.
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="모든 이미지를 다시 변환 (렌디션 설정을 바꾼 경우)",
+        )
+
+    def handle(self, *args, **options):
+        Status = ProductImage.RenditionStatus
+        if options["all"]:
+            status_list = Status.values
+        elif options["retry_failed"]:
+            status_list = [Status.PENDING, Status.FAILED]
+        else:
+            status_list = [Status.PENDING]
+
+        spec_list = get_rendition_spec_list()
+        done_count = failed_count = 0
+        last_pk = 0
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            while True:
+                pk_list = list(
+                    ProductImage.objects.filter(
+                        ProductImage.get_claimable_q(status_list), pk__gt=last_pk
+                    )
+                    .order_by("pk")
+                    .values_list("pk", flat=True)[: options["batch_size"]]
+                )
+                if not pk_list:
+                    break
+                last_pk = pk_list[-1]
+
+                claimed_pk_list = [
+                    pk for pk in pk_list if ProductImage.claim(pk, status_list)
+                ]
+                future_list = []
+                for product_image in ProductImage.objects.filter(
+                    pk__in=claimed_pk_list
+                ):
+                    try:
+                        data = product_image.read_image()
+                    except OSError as e:
+                        self.stderr.write(f"{product_image.image.name}: {e}")
+                        product_image.mark_rendition_failed()
+                        failed_count += 1
+                        continue
+                    future_list.append(
+                        (
+                            product_image,
+                            executor.submit(render_renditions, data, spec_list),
+                        )
+                    )
+
+                for product_image, future in future_list:
+                    try:
+                        product_image.save_renditions(future.result())
+                    except Exception as e:
+                        self.stderr.write(f"{product_image.image.name}: {e}")
+                        product_image.mark_rendition_failed()
+                        failed_count += 1
+                    else:
+                        done_count += 1
+
+                self.stdout.write(f"완료 {done_count}개, 실패 {failed_count}개")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"렌디션 생성 완료: {done_count}개 (실패 {failed_count}개)"
+            )
+        )
@@ -1,14 +1,26 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
 import requests
-from django.core.management import BaseCommand
 from django.core.files.base import ContentFile
-from PIL import Image
-from io import BytesIO
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from requests.adapters import HTTPAdapter
 
-from mall.models import Category, Product, ProductImage
+from mall.cache import bump_catalog_version
+from mall.imaging import get_rendition_spec_list, render_renditions
+from mall.models import Category, Product, ProductImage, ProductImageRendition
 
 BASE_URL = "https://raw.githubusercontent.com/pyhub-kr/dump-data/main/django-shopping-with-iamport/"
 
+DEFAULT_CATEGORY_NAME = "미분류"
+
 
 @dataclass
 class Item:
@@ -19,58 +31,286 @@ class Item:
     desc: str
     photo_path: str
 
+    @property
+    def source_key(self) -> str:
+        return f"{self.category_name or DEFAULT_CATEGORY_NAME}/{self.name}"
+
+
+def is_url(location: str) -> bool:
+    return location.startswith(("http://", "https://"))
+
 
 class Command(BaseCommand):
-    help = "Load products from JSON file"
+    help = "상품 목록(JSON)을 가져와 상품과 이미지를 일괄 등록/갱신합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--manifest",
+            default=BASE_URL + "product-list.json",
+            help="상품 목록 JSON 의 파일 경로 또는 URL",
+        )
+        parser.add_argument(
+            "--photo-base",
+            help="photo_path 의 기준 경로 또는 URL (기본: 상품 목록이 있는 위치)",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--download-workers", type=int, default=16)
+        parser.add_argument(
+            "--image-workers",
+            type=int,
+            default=os.cpu_count(),
+            help="이미지 변환 프로세스 수",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default="load_products.checkpoint.json",
+            help="진행 상황을 저장할 파일 (중단 후 이어서 실행)",
+        )
+        parser.add_argument(
+            "--reset", action="store_true", help="체크포인트를 무시하고 처음부터"
+        )
 
     def handle(self, *args, **options):
-        json_url = BASE_URL + "product-list.json"
-        item_dict_list = requests.get(json_url).json()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=options["download_workers"]
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
-        item_list = [Item(**item) for item in item_dict_list]
+        manifest = options["manifest"]
+        manifest_data = self.read(manifest)
+        manifest_hash = hashlib.sha256(manifest_data).hexdigest()
+        item_list = [Item(**item) for item in json.loads(manifest_data)]
 
-        category_name_set = {item.category_name for item in item_list}
+        photo_base = options["photo_base"]
+        if photo_base is None:
+            if is_url(manifest):
+                photo_base = manifest.rsplit("/", 1)[0] + "/"
+            else:
+                photo_base = str(Path(manifest).resolve().parent)
+        self.photo_base = photo_base
 
-        category_dict = {}
-        for category_name in category_name_set:
-            category, __ = Category.objects.get_or_create(
-                name=category_name or "미분류"
+        checkpoint_path = options["checkpoint"]
+        checkpoint = {} if options["reset"] else self.load_checkpoint(checkpoint_path)
+        if checkpoint.get("manifest_hash") != manifest_hash:
+            checkpoint = {}
+        start = checkpoint.get("next_index", 0)
+        if start:
+            self.stdout.write(
+                f"체크포인트에서 이어서 실행합니다. ({start}번째 상품부터)"
             )
-            category_dict[category.name] = category
 
-        from tqdm import tqdm
+        category_dict = self.get_category_dict(item_list)
+        self.adopt_existing_products(item_list, category_dict)
 
-        for item in tqdm(item_list):
-            category: Category = category_dict[item.category_name or "미분류"]
-            product, is_created = Product.objects.get_or_create(
-                category=category,
-                name=item.name,
-                defaults={
-                    "description": item.desc,
-                    "price": item.price,
-                },
+        batch_size = options["batch_size"]
+        with ThreadPoolExecutor(
+            max_workers=options["download_workers"]
+        ) as download_executor, ProcessPoolExecutor(
+            max_workers=options["image_workers"]
+        ) as image_executor:
+            for batch_start in range(start, len(item_list), batch_size):
+                batch = item_list[batch_start : batch_start + batch_size]
+                image_count = self.import_batch(
+                    batch, category_dict, download_executor, image_executor
+                )
+                next_index = batch_start + len(batch)
+                self.save_checkpoint(
+                    checkpoint_path,
+                    {"manifest_hash": manifest_hash, "next_index": next_index},
+                )
+                self.stdout.write(
+                    f"{next_index}/{len(item_list)}: 상품 {len(batch)}개, "
+                    f"새 이미지 {image_count}개"
+                )
+
+        # bulk_create 는 시그널을 보내지 않으므로 상품 목록 캐시를 직접 무효화합니다.
+        bump_catalog_version()
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(f"상품 {len(item_list)}개 가져오기 완료"))
+
+    def read(self, location: str) -> bytes:
+        if is_url(location):
+            response = self.session.get(location, timeout=(3.05, 30))
+            response.raise_for_status()
+            return response.content
+        try:
+            with open(location, "rb") as f:
+                return f.read()
+        except OSError as e:
+            raise CommandError(f"{location} 을(를) 읽을 수 없습니다: {e}") from e
+
+    def get_photo_location(self, item: Item) -> str:
+        if is_url(self.photo_base):
+            return self.photo_base + item.photo_path
+        return os.path.join(self.photo_base, item.photo_path)
+
+    def get_category_dict(self, item_list: List[Item]) -> Dict[str, Category]:
+        category_name_set = {
+            item.category_name or DEFAULT_CATEGORY_NAME for item in item_list
+        }
+        Category.objects.bulk_create(
+            [Category(name=name) for name in category_name_set],
+            ignore_conflicts=True,
+        )
+        return Category.objects.in_bulk(category_name_set, field_name="name")
+
+    def adopt_existing_products(self, item_list, category_dict):
+        """source_key 없이 등록된 예전 상품(분류+상품명 일치)에 source_key 를 채워 중복 등록을 막습니다."""
+        key_dict = {
+            (
+                category_dict[item.category_name or DEFAULT_CATEGORY_NAME].pk,
+                item.name,
+            ): (item.source_key)
+            for item in item_list
+        }
+        taken_key_set = set(
+            Product.objects.filter(source_key__isnull=False).values_list(
+                "source_key", flat=True
             )
-            print(f"Product created: {item.photo_path}")
-            photo_url = BASE_URL + item.photo_path
-            filename = photo_url.rsplit("/", 1)[-1]
-            photo_data = requests.get(photo_url).content
-
-            # 이미지 데이터를 PIL Image로 변환
-            image = Image.open(BytesIO(photo_data))
-
-            # 이미지가 P 또는 RGBA 모드인 경우, RGB로 변환
-            if image.mode in ("P", "RGBA"):
-                image = image.convert("RGB")
-
-            # 이미지를 BytesIO에 저장하여 ContentFile로 변환
-            image_io = BytesIO()
-            image.save(image_io, format="JPEG")
-            image_io.seek(0)
-
-            # ProductImage에 이미지 저장
-            product_image = ProductImage(
-                product=product,
+        )
+        product_list = []
+        for product in Product.objects.filter(source_key__isnull=True).only(
+            "pk", "category_id", "name"
+        ):
+            source_key = key_dict.get((product.category_id, product.name))
+            if source_key and source_key not in taken_key_set:
+                product.source_key = source_key
+                taken_key_set.add(source_key)
+                product_list.append(product)
+        Product.objects.bulk_update(product_list, ["source_key"], batch_size=1000)
+
+    def import_batch(
+        self, batch: List[Item], category_dict, download_executor, image_executor
+    ) -> int:
+        # 같은 상품이 목록에 여러 번 있으면 마지막 항목을 사용합니다.
+        item_dict = {item.source_key: item for item in batch}
+
+        product_list = []
+        for item in item_dict.values():
+            product = Product(
+                category=category_dict[item.category_name or DEFAULT_CATEGORY_NAME],
+                name=item.name,
+                description=item.desc,
+                price=item.price,
+                source_key=item.source_key,
             )
-            product_image.image.save(
-                name=filename, content=ContentFile(image_io.read()), save=True
+            product.update_search_document()
+            product_list.append(product)
+
+        # 이미지 내려받기, 변환, 파일 저장은 모두 트랜잭션 밖에서 처리하고 트랜잭션에서는
+        # DB 에만 씁니다. (SQLite 는 쓰기 트랜잭션 동안 DB 전체가 잠깁니다.)
+        data_list = list(download_executor.map(self.download, item_dict.values()))
+
+        checksum_set = set(
+            ProductImage.objects.filter(product__source_key__in=item_dict).values_list(
+                "product__source_key", "checksum"
             )
+        )
+        changed_list = []
+        for item, data in zip(item_dict.values(), data_list):
+            if data is None:
+                continue
+            checksum = hashlib.sha256(data).hexdigest()
+            if (item.source_key, checksum) not in checksum_set:
+                changed_list.append((item, data, checksum))
+
+        # 원본은 그대로 저장하고, 렌디션은 프로세스 풀에서 만듭니다.
+        spec_list = get_rendition_spec_list()
+        future_list = [
+            image_executor.submit(render_renditions, data, spec_list)
+            for __, data, __ in changed_list
+        ]
+        # 변환하지 못한 이미지는 건너뛰어, 한 장 때문에 배치 전체가 실패하지 않게 합니다.
+        rendered_changed_list = []
+        for (item, data, checksum), future in zip(changed_list, future_list):
+            try:
+                rendered_list = future.result()
+            except Exception as e:
+                location = self.get_photo_location(item)
+                self.stderr.write(f"이미지를 변환하지 못했습니다 ({location}): {e}")
+                continue
+            rendered_changed_list.append((item, data, checksum, rendered_list))
+        changed_list = rendered_changed_list
+
+        image_field = ProductImage._meta.get_field("image")
+        product_image_list = []
+        rendition_list = []
+        try:
+            for item, data, checksum, rendered_list in changed_list:
+                product_image = ProductImage(
+                    image=default_storage.save(
+                        image_field.generate_filename(None, Path(item.photo_path).name),
+                        ContentFile(data),
+                    ),
+                    checksum=checksum,
+                    rendition_status=ProductImage.RenditionStatus.DONE,
+                )
+                product_image_list.append(product_image)
+                rendition_list.extend(product_image.build_renditions(rendered_list))
+
+            with transaction.atomic():
+                Product.objects.bulk_create(
+                    product_list,
+                    update_conflicts=True,
+                    unique_fields=["source_key"],
+                    update_fields=[
+                        "category",
+                        "name",
+                        "description",
+                        "price",
+                        "search_document",
+                        "updated_at",
+                    ],
+                )
+                product_pk_dict = dict(
+                    Product.objects.filter(source_key__in=item_dict).values_list(
+                        "source_key", "pk"
+                    )
+                )
+                changed_product_pk_set = {
+                    product_pk_dict[item.source_key] for item, *__ in changed_list
+                }
+
+                # 이미지가 바뀐 상품은 예전에 가져온 이미지를 지웁니다. (관리자가 올린 이미지는 유지)
+                ProductImage.objects.filter(
+                    product_id__in=changed_product_pk_set
+                ).exclude(checksum="").delete()
+                for product_image, (item, *__) in zip(product_image_list, changed_list):
+                    product_image.product_id = product_pk_dict[item.source_key]
+                ProductImage.objects.bulk_create(product_image_list)
+                ProductImageRendition.objects.bulk_create(rendition_list)
+                # bulk_create 는 시그널을 보내지 않으므로 대표 이미지를 직접 갱신합니다.
+                Product.refresh_primary_images(changed_product_pk_set)
+        except BaseException:
+            # DB 에 저장하지 못한 이미지 파일을 남기지 않습니다.
+            for product_image in product_image_list:
+                product_image.image.delete(save=False)
+            for rendition in rendition_list:
+                rendition.file.delete(save=False)
+            raise
+
+        return len(product_image_list)
+
+    def download(self, item: Item) -> Optional[bytes]:
+        location = self.get_photo_location(item)
+        try:
+            return self.read(location)
+        except (requests.RequestException, CommandError) as e:
+            self.stderr.write(f"이미지를 가져오지 못했습니다 ({location}): {e}")
+            return None
+
+    def load_checkpoint(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save_checkpoint(self, path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,39 @@
+from django.core.management import BaseCommand
+
+from mall.portone_stub import PortOneStubServer
+
+
+class Command(BaseCommand):
+    help = (
+        "로컬 포트원 API 스텁 서버를 실행합니다. (PORTONE_API_BASE_URL 로 지정해 사용)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--latency", type=float, default=0.0, help="응답 지연 시간(초)"
+        )
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0, help="503 응답 비율 (0~1)"
+        )
+        parser.add_argument("--status", default="PAID", help="기본 결제 상태")
+        parser.add_argument("--amount", type=int, default=0, help="기본 결제 금액")
+
+    def handle(self, *args, **options):
+        server = PortOneStubServer(
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+            default_status=options["status"],
+            default_amount=options["amount"],
+            verbose=options["verbosity"] > 1,
+        )
+        self.stdout.write(f"포트원 스텁 서버 실행 중: {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,85 @@
+import multiprocessing
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from mall.models import CancellationBatch, PaymentCancellation
+from mall.workers import RateLimiter, run_cancellation_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "관리자가 요청한 결제 취소 작업을 포트원 호출 수를 제한하며 동시에 처리합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="워커 스레드 수")
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=settings.PAYMENT_CANCEL_RATE_LIMIT,
+            help="포트원 취소 요청 초당 최대 횟수 (0 이면 제한 없음)",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0, help="빈 큐 확인 주기(초)"
+        )
+        parser.add_argument(
+            "--stats-interval", type=float, default=10.0, help="진행 상황 출력 주기(초)"
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="대기 중인 작업을 모두 처리하면 종료"
+        )
+
+    def handle(self, *args, **options):
+        requeued_count = PaymentCancellation.requeue_stale()
+        if requeued_count:
+            self.stdout.write(
+                f"처리 중에 멈춘 작업 {requeued_count}건을 다시 처리합니다."
+            )
+
+        stop_event = threading.Event()
+        processed_counter = multiprocessing.Value("i", 0)
+        worker_kwargs = {
+            "stop_event": stop_event,
+            "processed_counter": processed_counter,
+            "rate_limiter": RateLimiter(options["rate"]),
+            "poll_interval": options["poll_interval"],
+            "once": options["once"],
+        }
+        worker_list = [
+            threading.Thread(target=run_cancellation_worker, kwargs=worker_kwargs)
+            for __ in range(options["workers"])
+        ]
+        for worker in worker_list:
+            worker.start()
+
+        started_at = last_reported_at = time.monotonic()
+        try:
+            while any(worker.is_alive() for worker in worker_list):
+                for worker in worker_list:
+                    worker.join(timeout=options["stats_interval"] / len(worker_list))
+
+                now = time.monotonic()
+                if now - last_reported_at >= options["stats_interval"]:
+                    self.write_batch_progress()
+                    last_reported_at = now
+        except KeyboardInterrupt:
+            self.stdout.write("종료 중입니다...")
+            stop_event.set()
+            for worker in worker_list:
+                worker.join()
+
+        elapsed = time.monotonic() - started_at
+        self.stdout.write(
+            f"처리 완료: {processed_counter.value}건, "
+            f"평균 {processed_counter.value / elapsed:.1f}건/초"
+        )
+
+    def write_batch_progress(self):
+        for batch in CancellationBatch.objects.filter(finished_at=None).order_by("pk"):
+            self.stdout.write(
+                f"batch={batch.pk} progress={batch.progress} "
+                f"succeeded={batch.succeeded_count} failed={batch.failed_count}"
+            )
@@ -0,0 +1,116 @@
+import multiprocessing
+import threading
+import time
+
+from django.core.management import BaseCommand
+from django.db import connections
+
+from mall.models import PaymentVerificationJob
+from mall.portone_cache import get_cache_stats
+from mall.workers import run_payment_worker, run_payment_worker_process
+
+
+class Command(BaseCommand):
+    help = "웹훅으로 쌓인 결제 검증 작업을 처리합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="워커 수")
+        parser.add_argument(
+            "--mode", choices=["thread", "process"], default="thread", help="워커 방식"
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0, help="빈 큐 확인 주기(초)"
+        )
+        parser.add_argument(
+            "--stats-interval", type=float, default=10.0, help="지표 출력 주기(초)"
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="대기 중인 작업을 모두 처리하면 종료"
+        )
+        parser.add_argument(
+            "--stats", action="store_true", help="큐 상태만 출력하고 종료"
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.write_queue_stats()
+            return
+
+        requeued_count = PaymentVerificationJob.requeue_stale()
+        if requeued_count:
+            self.stdout.write(
+                f"처리 중에 멈춘 작업 {requeued_count}건을 다시 처리합니다."
+            )
+
+        stop_event = multiprocessing.Event()
+        processed_counter = multiprocessing.Value("i", 0)
+        worker_kwargs = {
+            "stop_event": stop_event,
+            "processed_counter": processed_counter,
+            "poll_interval": options["poll_interval"],
+            "once": options["once"],
+        }
+
+        if options["mode"] == "process":
+            # 부모 프로세스의 DB 연결을 자식 프로세스와 공유하지 않도록 닫습니다.
+            connections.close_all()
+            worker_list = [
+                multiprocessing.Process(
+                    target=run_payment_worker_process, kwargs=worker_kwargs
+                )
+                for __ in range(options["workers"])
+            ]
+        else:
+            worker_list = [
+                threading.Thread(target=run_payment_worker, kwargs=worker_kwargs)
+                for __ in range(options["workers"])
+            ]
+
+        for worker in worker_list:
+            worker.start()
+
+        started_at = last_reported_at = time.monotonic()
+        last_processed = 0
+        try:
+            while any(worker.is_alive() for worker in worker_list):
+                for worker in worker_list:
+                    worker.join(timeout=options["stats_interval"] / len(worker_list))
+
+                now = time.monotonic()
+                if now - last_reported_at >= options["stats_interval"]:
+                    processed = processed_counter.value
+                    drain_rate = (processed - last_processed) / (now - last_reported_at)
+                    # 프로세스 워커의 포트원 조회 캐시 통계는 각 프로세스에 있습니다.
+                    self.write_queue_stats(
+                        drain_rate, with_cache_stats=options["mode"] == "thread"
+                    )
+                    last_reported_at, last_processed = now, processed
+        except KeyboardInterrupt:
+            self.stdout.write("종료 중입니다...")
+            stop_event.set()
+            for worker in worker_list:
+                worker.join()
+
+        elapsed = time.monotonic() - started_at
+        self.stdout.write(
+            f"처리 완료: {processed_counter.value}건, "
+            f"평균 {processed_counter.value / elapsed:.1f}건/초"
+        )
+
+    def write_queue_stats(self, drain_rate=None, with_cache_stats=False):
+        stats = PaymentVerificationJob.queue_stats()
+        message = (
+            f"queue_depth={stats['PENDING']} running={stats['RUNNING']} "
+            f"done={stats['DONE']} failed={stats['FAILED']} "
+            f"oldest_pending={stats['oldest_pending_seconds']:.1f}s"
+        )
+        if drain_rate is not None:
+            message += f" drain_rate={drain_rate:.1f}/s"
+        if with_cache_stats:
+            cache_stats = get_cache_stats()
+            message += (
+                f" portone_cache_hits={cache_stats['hits']}"
+                f" portone_cache_misses={cache_stats['misses']}"
+                f" portone_cache_coalesced={cache_stats['coalesced']}"
+            )
+        self.stdout.write(message)
@@ -0,0 +1,43 @@
+from django.core.management import BaseCommand
+from django.db import connection
+
+from mall.models import Product
+from mall.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = "상품의 search_document 를 다시 계산하고 검색 인덱스를 다시 만듭니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        product_qs = Product.objects.only(
+            "pk", "name", "description", "specifications", "search_document"
+        ).order_by("pk")
+
+        last_pk = 0
+        total = 0
+        while True:
+            product_list = list(
+                product_qs.filter(pk__gt=last_pk)[: options["chunk_size"]]
+            )
+            if not product_list:
+                break
+
+            changed_list = []
+            for product in product_list:
+                search_document = product.search_document
+                product.update_search_document()
+                if product.search_document != search_document:
+                    changed_list.append(product)
+            Product.objects.bulk_update(changed_list, ["search_document"])
+
+            last_pk = product_list[-1].pk
+            total += len(product_list)
+            self.stdout.write(f"pk <= {last_pk}: {total}건 처리")
+
+        with connection.schema_editor() as schema_editor:
+            install_search_index(schema_editor, Product)
+
+        self.stdout.write(self.style.SUCCESS(f"검색 인덱스 재생성 완료: {total}건"))
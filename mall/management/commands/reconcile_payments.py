@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from mall.models import OrderPayment
+from mall.portone import PortOneError, get_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATUSES = [
+    OrderPayment.PayStatus.READY,
+    OrderPayment.PayStatus.VIRTUAL_ACCOUNT_ISSUED,
+]
+
+
+def fetch_payment_meta(client, payment):
+    """포트원 결제 내역을 조회합니다. 실패하면 로그를 남기고 None 을 반환합니다."""
+    try:
+        return client.get_payment(payment.merchant_uid)
+    except PortOneError as e:
+        logger.warning("포트원 결제 조회 실패 (%s): %s", payment.merchant_uid, e)
+        return None
+
+
+class Command(BaseCommand):
+    help = "미결제/가상계좌 상태로 남은 결제건을 포트원 결제 내역과 대사합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=OrderPayment.PayStatus.values,
+            help="대사할 결제 상태 (여러 번 지정 가능, 기본: READY, VIRTUAL_ACCOUNT_ISSUED)",
+        )
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=10,
+            help="생성된 지 N분이 지난 결제건만 대사합니다.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--workers", type=int, default=8, help="포트원 동시 조회 수"
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default="reconcile_payments.checkpoint.json",
+            help="진행 상황을 저장할 파일 (중단 후 이어서 실행)",
+        )
+        parser.add_argument(
+            "--reset", action="store_true", help="체크포인트를 무시하고 처음부터"
+        )
+
+    def handle(self, *args, **options):
+        status_list = options["status"] or DEFAULT_STATUSES
+        checkpoint_path = options["checkpoint"]
+        checkpoint = {} if options["reset"] else self.load_checkpoint(checkpoint_path)
+        if checkpoint.get("status_list") != sorted(status_list):
+            checkpoint = {}
+
+        last_pk = checkpoint.get("last_pk", 0)
+        total = checkpoint.get("total", 0)
+        changed_total = checkpoint.get("changed", 0)
+        failed_total = checkpoint.get("failed", 0)
+        if last_pk:
+            self.stdout.write(f"체크포인트에서 이어서 실행합니다. (pk > {last_pk})")
+
+        cutoff = timezone.now() - timedelta(minutes=options["older_than"])
+        base_qs = (
+            OrderPayment.objects.filter(
+                pay_status__in=status_list, created_at__lt=cutoff
+            )
+            .select_related("order")
+            .defer("meta")
+            .order_by("pk")
+        )
+
+        client = get_client()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            while True:
+                payment_list = list(
+                    base_qs.filter(pk__gt=last_pk)[: options["chunk_size"]]
+                )
+                if not payment_list:
+                    break
+
+                meta_list = executor.map(
+                    lambda payment: fetch_payment_meta(client, payment), payment_list
+                )
+                payment_meta_list = [
+                    (payment, meta)
+                    for payment, meta in zip(payment_list, meta_list)
+                    if meta is not None
+                ]
+                changed_total += OrderPayment.bulk_apply_portone_meta(payment_meta_list)
+
+                last_pk = payment_list[-1].pk
+                total += len(payment_list)
+                failed_total += len(payment_list) - len(payment_meta_list)
+                self.save_checkpoint(
+                    checkpoint_path,
+                    {
+                        "status_list": sorted(status_list),
+                        "last_pk": last_pk,
+                        "total": total,
+                        "changed": changed_total,
+                        "failed": failed_total,
+                    },
+                )
+                self.stdout.write(
+                    f"pk <= {last_pk}: 대사 {total}건, "
+                    f"주문 상태 변경 {changed_total}건, 조회 실패 {failed_total}건"
+                )
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(f"대사 완료: {total}건"))
+
+    def load_checkpoint(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save_checkpoint(self, path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
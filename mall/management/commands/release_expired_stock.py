@@ -0,0 +1,26 @@
+import time
+
+from django.core.management import BaseCommand
+
+from mall.models import StockReservation
+
+
+class Command(BaseCommand):
+    help = "결제되지 않고 만료된 재고 예약을 해제하고 재고를 돌려놓습니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="확인 주기(초). 0 이면 한 번만 해제하고 종료",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released_count = StockReservation.release_expired()
+            if released_count:
+                self.stdout.write(f"재고 예약 {released_count}개를 해제했습니다.")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+
+from mall.management.commands.reconcile_payments import fetch_payment_meta
+from mall.models import OrderPayment, PaymentVerificationJob, PortOneWebhookEvent
+from mall.portone import get_client
+
+
+class Command(BaseCommand):
+    help = "저장된 포트원 웹훅 이벤트를 다시 처리합니다. (결제건별로 한 번씩 검증)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="이 시각 이후에 받은 이벤트만 처리합니다. (ISO 8601, 예: 2024-05-01T09:00)",
+        )
+        parser.add_argument(
+            "--type", dest="event_type", help="이벤트 종류 (예: Transaction.Paid)"
+        )
+        parser.add_argument(
+            "--event-id", action="append", help="이벤트 식별자 (여러 번 지정 가능)"
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--workers", type=int, default=8, help="포트원 동시 조회 수"
+        )
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="직접 검증하지 않고 결제 검증 작업 큐(process_payment_jobs)에 등록",
+        )
+
+    def handle(self, *args, **options):
+        event_qs = PortOneWebhookEvent.objects.order_by("pk")
+        if options["since"]:
+            event_qs = event_qs.filter(received_at__gte=self.parse_since(options))
+        if options["event_type"]:
+            event_qs = event_qs.filter(event_type=options["event_type"])
+        if options["event_id"]:
+            event_qs = event_qs.filter(event_id__in=options["event_id"])
+
+        # 같은 결제건의 이벤트가 여러 개여도 포트원에서 최신 결제 내역을 조회하므로 한 번만 처리합니다.
+        seen_merchant_uid_set = set()
+        event_total = changed_total = failed_total = 0
+        last_pk = 0
+        client = get_client()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            while True:
+                event_list = list(
+                    event_qs.filter(pk__gt=last_pk).only("pk", "merchant_uid")[
+                        : options["chunk_size"]
+                    ]
+                )
+                if not event_list:
+                    break
+                last_pk = event_list[-1].pk
+                event_total += len(event_list)
+
+                merchant_uid_set = {
+                    event.merchant_uid for event in event_list
+                } - seen_merchant_uid_set
+                seen_merchant_uid_set |= merchant_uid_set
+
+                if options["enqueue"]:
+                    for merchant_uid in merchant_uid_set:
+                        PaymentVerificationJob.enqueue(merchant_uid)
+                    continue
+
+                payment_list = list(
+                    OrderPayment.objects.filter(uid__in=merchant_uid_set)
+                    .select_related("order")
+                    .defer("meta")
+                )
+                meta_list = executor.map(
+                    lambda payment: fetch_payment_meta(client, payment), payment_list
+                )
+                payment_meta_list = [
+                    (payment, meta)
+                    for payment, meta in zip(payment_list, meta_list)
+                    if meta is not None
+                ]
+                changed_total += OrderPayment.bulk_apply_portone_meta(payment_meta_list)
+                failed_total += len(merchant_uid_set) - len(payment_meta_list)
+                self.stdout.write(
+                    f"pk <= {last_pk}: 이벤트 {event_total}건, "
+                    f"주문 상태 변경 {changed_total}건, 실패 {failed_total}건"
+                )
+
+        if options["enqueue"]:
+            message = f"결제건 {len(seen_merchant_uid_set)}개를 작업 큐에 등록했습니다."
+        else:
+            message = f"결제건 {len(seen_merchant_uid_set)}개를 다시 검증했습니다."
+        self.stdout.write(
+            self.style.SUCCESS(f"이벤트 {event_total}건 재처리 완료: {message}")
+        )
+
+    def parse_since(self, options):
+        try:
+            since = datetime.fromisoformat(options["since"])
+        except ValueError:
+            raise CommandError("--since 는 ISO 8601 형식이어야 합니다.")
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
@@ -0,0 +1,101 @@
+import csv
+import sys
+
+from django.core.management import BaseCommand, CommandError
+
+from mall.models import Order
+
+# 변경할 상태별 OrderQuerySet 메서드
+TRANSITION_METHOD_DICT = {
+    Order.Status.PREPARED_PRODUCT: "mark_as_prepared",
+    Order.Status.SHIPPED: "mark_as_shipped",
+    Order.Status.DELIVERED: "mark_as_delivered",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "CSV 파일의 주문들을 한 번에 상품 준비 중/배송 중/배송 완료 상태로 변경합니다."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help="주문 번호가 들어 있는 CSV 파일 (- 이면 표준 입력)"
+        )
+        parser.add_argument(
+            "--to",
+            required=True,
+            choices=[status.value for status in TRANSITION_METHOD_DICT],
+            help="변경할 상태",
+        )
+        parser.add_argument(
+            "--column", default="order_id", help="주문 번호 컬럼 이름 (기본: order_id)"
+        )
+        parser.add_argument("--reason", default="", help="변경 이력에 남길 사유")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--rejected-output",
+            help="상태가 맞지 않거나 없는 주문 번호를 저장할 CSV 파일",
+        )
+
+    def handle(self, *args, **options):
+        pk_list = self.read_pk_list(options["path"], options["column"])
+        method_name = TRANSITION_METHOD_DICT[options["to"]]
+
+        transitioned_total = 0
+        rejected_pk_list = []
+        missing_pk_list = []
+        batch_size = options["batch_size"]
+        for start in range(0, len(pk_list), batch_size):
+            batch = pk_list[start : start + batch_size]
+            result = getattr(Order.objects.filter(pk__in=batch), method_name)(
+                reason=options["reason"]
+            )
+            transitioned_total += result.transitioned
+            rejected_pk_list.extend(result.rejected_pk_list)
+            if result.transitioned + result.rejected < len(batch):
+                found_pk_set = set(
+                    Order.objects.filter(pk__in=batch).values_list("pk", flat=True)
+                )
+                missing_pk_list.extend(pk for pk in batch if pk not in found_pk_set)
+            self.stdout.write(
+                f"{start + len(batch)}/{len(pk_list)}: 변경 {transitioned_total}건, "
+                f"거부 {len(rejected_pk_list)}건, 없음 {len(missing_pk_list)}건"
+            )
+
+        if options["rejected_output"]:
+            with open(options["rejected_output"], "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow([options["column"], "reason"])
+                writer.writerows((pk, "status") for pk in rejected_pk_list)
+                writer.writerows((pk, "missing") for pk in missing_pk_list)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"주문 {transitioned_total}건을 {Order.Status(options['to']).label}(으)로 "
+                f"변경했습니다. (거부 {len(rejected_pk_list)}건, 없음 {len(missing_pk_list)}건)"
+            )
+        )
+
+    def read_pk_list(self, path, column):
+        f = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8-sig")
+        try:
+            reader = csv.DictReader(f)
+            if column not in (reader.fieldnames or []):
+                raise CommandError(f"CSV 에 {column} 컬럼이 없습니다.")
+            pk_list = []
+            for line_no, row in enumerate(reader, start=2):
+                value = (row[column] or "").strip()
+                if not value:
+                    continue
+                try:
+                    pk_list.append(int(value))
+                except ValueError:
+                    raise CommandError(
+                        f"{line_no}번째 줄: 주문 번호가 아닙니다. ({value})"
+                    )
+        finally:
+            if f is not sys.stdin:
+                f.close()
+        # 같은 주문이 여러 번 있으면 한 번만 변경합니다.
+        return list(dict.fromkeys(pk_list))
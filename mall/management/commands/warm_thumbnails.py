@@ -0,0 +1,57 @@
+import os
+
+from django.core.management import BaseCommand, call_command
+
+from mall.models import Product
+
+
+class Command(BaseCommand):
+    help = "상품 이미지의 렌디션을 미리 만들고, 상품의 대표 이미지/썸네일 정보를 다시 계산합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="이미지 변환 프로세스 수",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--retry-failed", action="store_true", help="실패한 이미지도 다시 변환"
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="모든 이미지를 다시 변환 (렌디션 설정을 바꾼 경우)",
+        )
+
+    def handle(self, *args, **options):
+        call_command(
+            "generate_image_renditions",
+            workers=options["workers"],
+            retry_failed=options["retry_failed"],
+            all=options["all"],
+            stdout=self.stdout,
+            stderr=self.stderr,
+        )
+
+        # 렌디션 생성과 별개로, 저장된 썸네일 정보가 어긋난 상품(MEDIA_URL 변경 등)도 바로잡습니다.
+        chunk_size = options["chunk_size"]
+        refreshed_count = 0
+        last_pk = 0
+        while True:
+            pk_list = list(
+                Product.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:chunk_size]
+            )
+            if not pk_list:
+                break
+            refreshed_count += Product.refresh_primary_images(pk_list)
+            last_pk = pk_list[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"상품 {refreshed_count}개의 썸네일 정보를 갱신했습니다."
+            )
+        )
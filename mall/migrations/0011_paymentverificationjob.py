@@ -0,0 +1,84 @@
+# Generated by Django 5.1 on 2026-10-18 14:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0010_remove_cartproduct_unique_user_product_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PaymentVerificationJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("merchant_uid", models.UUIDField(verbose_name="쇼핑몰 결제식별자")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "대기"),
+                            ("RUNNING", "처리 중"),
+                            ("DONE", "완료"),
+                            ("FAILED", "실패"),
+                        ],
+                        default="PENDING",
+                        max_length=7,
+                        verbose_name="처리상태",
+                    ),
+                ),
+                (
+                    "notified_count",
+                    models.PositiveIntegerField(
+                        default=1, verbose_name="웹훅 수신 횟수"
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="처리 시도 횟수"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, verbose_name="마지막 오류"),
+                ),
+                (
+                    "available_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="처리 가능 시각"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "결제 검증 작업",
+                "verbose_name_plural": "결제 검증 작업",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "available_at"],
+                        name="mall_paymen_status_01213b_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("status", "PENDING")),
+                        fields=("merchant_uid",),
+                        name="unique_pending_payment_job",
+                    )
+                ],
+            },
+        ),
+    ]
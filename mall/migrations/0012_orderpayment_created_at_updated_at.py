@@ -0,0 +1,47 @@
+# Generated by Django 5.1 on 2026-10-18 15:20
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_created_at_from_order(apps, schema_editor):
+    # 기존 결제건은 생성 시각을 알 수 없으므로 주문 시각으로 채웁니다. 마이그레이션 시각으로
+    # 두면 reconcile_payments --older-than 이 오래된 결제건을 모두 건너뜁니다.
+    Order = apps.get_model("mall", "Order")
+    OrderPayment = apps.get_model("mall", "OrderPayment")
+    OrderPayment.objects.update(
+        created_at=Subquery(
+            Order.objects.filter(pk=OuterRef("order_id")).values("created_at")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0011_paymentverificationjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderpayment",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="orderpayment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(fill_created_at_from_order, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="orderpayment",
+            index=models.Index(
+                fields=["pay_status", "id"], name="mall_orderpay_status_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1 on 2026-10-18 15:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0012_orderpayment_created_at_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="display_name",
+            field=models.CharField(blank=True, max_length=120, verbose_name="주문명"),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="first_product",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="mall.product",
+            ),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="first_product_name",
+            field=models.CharField(
+                blank=True, max_length=100, verbose_name="첫 상품명"
+            ),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="주문 상품 수"),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1 on 2026-10-18 15:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0013_order_summary"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="orderedproduct",
+            name="unique_order_product",
+        ),
+        migrations.AddField(
+            model_name="orderedproduct",
+            name="option",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="mall.productoption",
+            ),
+        ),
+        migrations.AddField(
+            model_name="orderedproduct",
+            name="option_name",
+            field=models.CharField(
+                blank=True,
+                help_text="주문 시점의 옵션명을 저장합니다.",
+                max_length=100,
+                verbose_name="옵션명",
+            ),
+        ),
+        migrations.AddField(
+            model_name="orderedproduct",
+            name="option_price",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="주문 시점의 옵션 추가금액을 저장합니다.",
+                verbose_name="옵션 추가금액",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="orderedproduct",
+            constraint=models.UniqueConstraint(
+                fields=("order", "product", "option"),
+                name="unique_order_product_option",
+            ),
+        ),
+    ]
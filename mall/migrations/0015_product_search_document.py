@@ -0,0 +1,50 @@
+# Generated by Django 5.1 on 2026-10-18 15:07
+
+from django.db import migrations, models
+
+from mall.search import (
+    build_search_document,
+    install_search_index,
+    uninstall_search_index,
+)
+
+
+def fill_search_document(apps, schema_editor):
+    Product = apps.get_model("mall", "Product")
+    product_list = []
+    for product in Product.objects.only(
+        "pk", "name", "description", "specifications"
+    ).iterator(chunk_size=1000):
+        product.search_document = build_search_document(
+            product.name, product.description, product.specifications
+        )
+        product_list.append(product)
+        if len(product_list) >= 1000:
+            Product.objects.bulk_update(product_list, ["search_document"])
+            product_list = []
+    Product.objects.bulk_update(product_list, ["search_document"])
+
+
+def create_search_index(apps, schema_editor):
+    install_search_index(schema_editor, apps.get_model("mall", "Product"))
+
+
+def drop_search_index(apps, schema_editor):
+    uninstall_search_index(schema_editor, apps.get_model("mall", "Product"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0014_orderedproduct_option"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_document",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1 on 2026-10-18 15:23
+
+from django.db import migrations, models
+
+from mall.search import install_search_index
+
+
+def reinstall_search_index(apps, schema_editor):
+    # SQLite 는 unique 컬럼을 추가할 때 테이블을 다시 만들면서 FTS 트리거를 삭제합니다.
+    install_search_index(schema_editor, apps.get_model("mall", "Product"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0015_product_search_document"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="source_key",
+            field=models.CharField(
+                blank=True, editable=False, max_length=255, null=True, unique=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="checksum",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(reinstall_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1 on 2026-10-18 15:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0016_product_source_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productimage",
+            name="rendition_status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "대기"),
+                    ("RUNNING", "변환 중"),
+                    ("DONE", "완료"),
+                    ("FAILED", "실패"),
+                ],
+                db_index=True,
+                default="PENDING",
+                editable=False,
+                max_length=7,
+                verbose_name="렌디션 상태",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ProductImageRendition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("format", models.CharField(max_length=4)),
+                ("width", models.PositiveIntegerField()),
+                ("height", models.PositiveIntegerField()),
+                ("size", models.PositiveIntegerField(verbose_name="파일 크기(byte)")),
+                (
+                    "file",
+                    models.FileField(upload_to="mall/product/renditions/%Y/%m/%d"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "image",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="renditions",
+                        to="mall.productimage",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "상품 이미지 렌디션",
+                "verbose_name_plural": "상품 이미지 렌디션",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("image", "format", "width"),
+                        name="unique_product_image_rendition",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.1 on 2026-10-18 15:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Min
+
+from mall.search import install_search_index
+
+
+def fill_primary_image(apps, schema_editor):
+    # 기존 이미지는 렌디션이 아직 없으므로 원본 URL 로 채웁니다.
+    # warm_thumbnails 명령을 실행하면 렌디션을 만들고 썸네일 정보를 다시 계산합니다.
+    Product = apps.get_model("mall", "Product")
+    ProductImage = apps.get_model("mall", "ProductImage")
+    storage = ProductImage._meta.get_field("image").storage
+
+    first_image_pk_list = (
+        ProductImage.objects.values("product_id")
+        .annotate(first_pk=Min("pk"))
+        .values_list("first_pk", flat=True)
+    )
+    product_list = []
+    for product_image in ProductImage.objects.filter(
+        pk__in=first_image_pk_list
+    ).iterator(chunk_size=1000):
+        product_list.append(
+            Product(
+                pk=product_image.product_id,
+                primary_image_id=product_image.pk,
+                thumbnail_url=storage.url(product_image.image.name),
+            )
+        )
+        if len(product_list) >= 1000:
+            Product.objects.bulk_update(
+                product_list, ["primary_image", "thumbnail_url"]
+            )
+            product_list = []
+    Product.objects.bulk_update(product_list, ["primary_image", "thumbnail_url"])
+
+
+def reinstall_search_index(apps, schema_editor):
+    # SQLite 는 기본값이 있는 컬럼을 추가할 때 테이블을 다시 만들면서 FTS 트리거를 삭제합니다.
+    install_search_index(schema_editor, apps.get_model("mall", "Product"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0017_productimagerendition"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="primary_image",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="mall.productimage",
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="thumbnail_height",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="thumbnail_sources",
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="thumbnail_url",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="thumbnail_width",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_primary_image, migrations.RunPython.noop),
+        migrations.RunPython(reinstall_search_index, migrations.RunPython.noop),
+    ]
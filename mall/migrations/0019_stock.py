@@ -0,0 +1,94 @@
+# Generated by Django 5.1 on 2026-10-18 15:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0018_product_primary_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="stock",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="재고"
+            ),
+        ),
+        migrations.AddField(
+            model_name="productoption",
+            name="stock",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="재고"
+            ),
+        ),
+        migrations.CreateModel(
+            name="StockReservation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.PositiveIntegerField(verbose_name="수량")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("RESERVED", "예약"),
+                            ("COMMITTED", "확정"),
+                            ("RELEASED", "해제"),
+                        ],
+                        default="RESERVED",
+                        max_length=9,
+                        verbose_name="상태",
+                    ),
+                ),
+                ("expires_at", models.DateTimeField(verbose_name="만료 시각")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "option",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="mall.productoption",
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stock_reservations",
+                        to="mall.order",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="mall.product",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "expires_at"],
+                        name="mall_stockres_status_exp_idx",
+                    )
+                ],
+            },
+        ),
+    ]
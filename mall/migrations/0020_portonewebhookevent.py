@@ -0,0 +1,52 @@
+# Generated by Django 5.1 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0019_stock"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PortOneWebhookEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "event_id",
+                    models.CharField(
+                        help_text="webhook-id 헤더. 없으면 본문의 sha256 입니다.",
+                        max_length=100,
+                        unique=True,
+                        verbose_name="이벤트 식별자",
+                    ),
+                ),
+                (
+                    "event_type",
+                    models.CharField(
+                        blank=True, max_length=50, verbose_name="이벤트 종류"
+                    ),
+                ),
+                (
+                    "merchant_uid",
+                    models.UUIDField(db_index=True, verbose_name="쇼핑몰 결제식별자"),
+                ),
+                ("payload", models.JSONField(verbose_name="본문")),
+                ("received_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                "verbose_name": "포트원 웹훅 이벤트",
+                "verbose_name_plural": "포트원 웹훅 이벤트",
+            },
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.1 on 2026-10-18 15:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0020_portonewebhookevent"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrderStatusEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "from_status",
+                    models.CharField(
+                        choices=[
+                            ("REQUSETED", "주문 요청"),
+                            ("FAILED_PAYMENT", "결제 실패"),
+                            ("PAID", "결제 완료"),
+                            ("PREPARED_PRODUCT", "상품 준비 중"),
+                            ("SHIPPED", "배송 중"),
+                            ("DELIVERED", "배송 완료"),
+                            ("CANCELLED", "주문 취소"),
+                        ],
+                        max_length=16,
+                        verbose_name="이전 상태",
+                    ),
+                ),
+                (
+                    "to_status",
+                    models.CharField(
+                        choices=[
+                            ("REQUSETED", "주문 요청"),
+                            ("FAILED_PAYMENT", "결제 실패"),
+                            ("PAID", "결제 완료"),
+                            ("PREPARED_PRODUCT", "상품 준비 중"),
+                            ("SHIPPED", "배송 중"),
+                            ("DELIVERED", "배송 완료"),
+                            ("CANCELLED", "주문 취소"),
+                        ],
+                        max_length=16,
+                        verbose_name="변경 상태",
+                    ),
+                ),
+                (
+                    "reason",
+                    models.CharField(blank=True, max_length=200, verbose_name="사유"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "changed_by",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="변경한 사용자",
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_events",
+                        to="mall.order",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "주문 상태 변경 이력",
+                "verbose_name_plural": "주문 상태 변경 이력",
+                "ordering": ["pk"],
+            },
+        ),
+    ]
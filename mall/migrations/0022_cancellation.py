@@ -0,0 +1,195 @@
+# Generated by Django 5.1 on 2026-10-18 15:53
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0021_orderstatusevent"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderpayment",
+            name="cancelled_amount",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="취소금액"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="orderpayment",
+            name="pay_status",
+            field=models.CharField(
+                choices=[
+                    ("READY", "미결제"),
+                    ("PAID", "결제완료"),
+                    ("CANCELLED", "결제취소"),
+                    ("PARTIAL_CANCELLED", "부분취소"),
+                    ("FAILED", "결제실패"),
+                    ("VIRTUAL_ACCOUNT_ISSUED", "가상계좌"),
+                ],
+                default="READY",
+                max_length=22,
+                verbose_name="결제상태",
+            ),
+        ),
+        migrations.CreateModel(
+            name="CancellationBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("reason", models.CharField(max_length=200, verbose_name="취소 사유")),
+                (
+                    "total_count",
+                    models.PositiveIntegerField(default=0, verbose_name="전체 건수"),
+                ),
+                (
+                    "succeeded_count",
+                    models.PositiveIntegerField(default=0, verbose_name="성공 건수"),
+                ),
+                (
+                    "failed_count",
+                    models.PositiveIntegerField(default=0, verbose_name="실패 건수"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="완료 시각"
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="요청자",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "결제 취소 묶음",
+                "verbose_name_plural": "결제 취소 묶음",
+            },
+        ),
+        migrations.CreateModel(
+            name="PaymentCancellation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="비어 있으면 남은 금액 전체",
+                        null=True,
+                        verbose_name="취소 금액",
+                    ),
+                ),
+                (
+                    "cancelled_amount_before",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        editable=False,
+                        null=True,
+                        verbose_name="취소 전 취소금액",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "대기"),
+                            ("RUNNING", "처리 중"),
+                            ("SUCCEEDED", "성공"),
+                            ("FAILED", "실패"),
+                        ],
+                        default="PENDING",
+                        max_length=9,
+                        verbose_name="처리상태",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="처리 시도 횟수"
+                    ),
+                ),
+                (
+                    "error_code",
+                    models.CharField(
+                        blank=True, max_length=50, verbose_name="오류 코드"
+                    ),
+                ),
+                (
+                    "error_message",
+                    models.TextField(blank=True, verbose_name="오류 내용"),
+                ),
+                (
+                    "available_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="처리 가능 시각"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "batch",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cancellations",
+                        to="mall.cancellationbatch",
+                    ),
+                ),
+                (
+                    "payment",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="mall.orderpayment",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "결제 취소 작업",
+                "verbose_name_plural": "결제 취소 작업",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "available_at"],
+                        name="mall_paymen_status_1976b9_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("status__in", ["PENDING", "RUNNING"])),
+                        fields=("payment",),
+                        name="unique_active_payment_cancellation",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1 on 2026-10-18 15:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0022_cancellation"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="버전"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="orderstatusevent",
+            index=models.Index(
+                fields=["created_at"], name="mall_orders_created_3c1c84_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="orderstatusevent",
+            index=models.Index(
+                fields=["to_status", "created_at"],
+                name="mall_orders_to_stat_ee946a_idx",
+            ),
+        ),
+    ]
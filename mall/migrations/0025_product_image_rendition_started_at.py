@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0024_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productimage",
+            name="rendition_started_at",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
@@ -1,23 +1,80 @@
 import logging
+import os
+from collections import defaultdict
+from datetime import timedelta
 from uuid import uuid4
-from typing import List
+from typing import TYPE_CHECKING, List, NamedTuple, Optional
 
-import requests
-from PIL import Image
+from asgiref.sync import sync_to_async
+from django.core.files.base import ContentFile
 from django.core.validators import MinValueValidator
-from django.db import models
-from django.db.models import UniqueConstraint, QuerySet
+from django.db import IntegrityError, models, transaction
+from django.db.models import (
+    Count,
+    F,
+    Min,
+    Q,
+    Sum,
+    UniqueConstraint,
+    Window,
+)
+from django.db.models.functions import Coalesce
 from django.http import Http404
 from django.urls import reverse
+from django.utils import timezone
 from django_ckeditor_5.fields import CKEditor5Field
-from iamport import Iamport
 
 from PaymentPractice import settings
 from accounts.models import User
+from mall.cache import bump_catalog_version
+from mall.imaging import FORMAT_DICT, FORMAT_PREFERENCE, RenderedImage
+from mall import portone_cache
+from mall.portone import RETRY_STATUS_CODES, PortOneError, get_client
+from mall.search import build_search_document
+
+if TYPE_CHECKING:
+    from mall.cart import BaseCartStore
 
 logger = logging.getLogger(__name__)
 
 
+class PaymentAttemptLimitError(Exception):
+    """주문의 결제 시도 횟수가 한도(PAYMENT_MAX_ATTEMPTS_PER_ORDER)에 도달했습니다."""
+
+
+class PaymentCancelError(ValueError):
+    """포트원이 결제 취소를 거절했습니다. code 는 포트원 오류 종류(type)입니다."""
+
+    def __init__(self, message, status_code, code=""):
+        self.status_code = status_code
+        self.code = code
+        super().__init__(message)
+
+    @property
+    def is_retryable(self) -> bool:
+        return self.status_code in RETRY_STATUS_CODES
+
+
+class OrderStatusTransitionError(ValueError):
+    """주문 상태 전이표(Order.TRANSITIONS)에 없는 상태 변경입니다."""
+
+    def __init__(self, from_status, to_status):
+        self.from_status = from_status
+        self.to_status = to_status
+        super().__init__(
+            f"{Order.Status(from_status).label} 상태의 주문은 "
+            f"{Order.Status(to_status).label} 상태로 변경할 수 없습니다."
+        )
+
+
+class OutOfStockError(Exception):
+    """주문할 상품의 재고가 부족합니다."""
+
+    def __init__(self, name):
+        self.name = name
+        super().__init__(f"{name} 의 재고가 부족합니다.")
+
+
 # Create your models here.
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -59,21 +116,121 @@ class Product(models.Model):
         choices=Status.choices, default=Status.ACTIVE, max_length=1
     )  # 제품 상태
     specifications = models.JSONField("제품 사양", default=dict)  # 제품 사양
+    # 판매 가능한 재고 수량. 비어 있으면 재고를 관리하지 않습니다. (StockReservation 참고)
+    stock = models.PositiveIntegerField("재고", null=True, blank=True)
     presentation_image = models.ImageField(
         upload_to="mall/product/presentation/%Y/%m/%d",
         blank=True,
         null=True,
         verbose_name="Presentation 이미지",
     )
+    # 검색 인덱스용 토큰 (mall.search 참고)
+    search_document = models.TextField(blank=True, editable=False)
+    # 외부 상품 목록(load_products)에서 가져온 상품의 식별자
+    source_key = models.CharField(
+        max_length=255, unique=True, null=True, blank=True, editable=False
+    )
+    # 대표 이미지(가장 먼저 등록한 이미지)와 목록용 썸네일 정보.
+    # 상품 목록에서 이미지를 따로 조회하지 않도록 저장해두며, 상품 이미지가 바뀌면
+    # refresh_primary_images() 로 다시 계산합니다. (mall.signals 참고)
+    primary_image = models.ForeignKey(
+        "ProductImage",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+    )
+    thumbnail_url = models.CharField(max_length=255, blank=True, editable=False)
+    thumbnail_width = models.PositiveIntegerField(null=True, editable=False)
+    thumbnail_height = models.PositiveIntegerField(null=True, editable=False)
+    # <picture> 의 <source> 목록 [{"type": ..., "srcset": ...}, ...]
+    thumbnail_sources = models.JSONField(default=list, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    PRIMARY_IMAGE_FIELDS = [
+        "primary_image",
+        "thumbnail_url",
+        "thumbnail_width",
+        "thumbnail_height",
+        "thumbnail_sources",
+    ]
+
     def __str__(self):
         return f"<{self.pk}> {self.name}"
 
+    def set_primary_image(self, product_image: Optional["ProductImage"]):
+        """대표 이미지와 썸네일 정보를 채웁니다. 저장은 하지 않습니다."""
+        self.primary_image = product_image
+        if product_image is None:
+            self.thumbnail_url = ""
+            self.thumbnail_width = self.thumbnail_height = None
+            self.thumbnail_sources = []
+            return
+
+        rendition = product_image.get_thumbnail_rendition()
+        if rendition is None:
+            # 렌디션을 만들기 전에는 원본을 보여줍니다.
+            self.thumbnail_url = product_image.image.url
+            self.thumbnail_width = self.thumbnail_height = None
+        else:
+            self.thumbnail_url = rendition.file.url
+            self.thumbnail_width = rendition.width
+            self.thumbnail_height = rendition.height
+        self.thumbnail_sources = product_image.picture_sources
+
+    @classmethod
+    def refresh_primary_images(cls, product_pk_list) -> int:
+        """상품들의 대표 이미지와 썸네일 정보를 다시 계산해 저장합니다. 저장한 상품 수를 반환합니다."""
+        product_pk_list = list(product_pk_list)
+        first_image_pk_list = (
+            ProductImage.objects.filter(product_id__in=product_pk_list)
+            .values("product_id")
+            .annotate(first_pk=Min("pk"))
+            .values_list("first_pk", flat=True)
+        )
+        first_image_dict = {
+            product_image.product_id: product_image
+            for product_image in ProductImage.objects.filter(
+                pk__in=list(first_image_pk_list)
+            ).prefetch_related("renditions")
+        }
+
+        product_list = list(cls.objects.filter(pk__in=product_pk_list).only("pk"))
+        for product in product_list:
+            product.set_primary_image(first_image_dict.get(product.pk))
+        # bulk_update 는 시그널을 보내지 않으므로 상품 목록 캐시를 직접 무효화합니다.
+        cls.objects.bulk_update(product_list, cls.PRIMARY_IMAGE_FIELDS, batch_size=500)
+        bump_catalog_version()
+        return len(product_list)
+
+    def update_search_document(self):
+        """search_document 를 갱신합니다. bulk_create/bulk_update 전에 직접 호출해야 합니다."""
+        self.search_document = build_search_document(
+            self.name, self.description, self.specifications
+        )
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.update_search_document()
+        elif {"name", "description", "specifications"} & set(update_fields):
+            self.update_search_document()
+            kwargs["update_fields"] = {*update_fields, "search_document"}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = verbose_name_plural = "상품"
         ordering = ["-pk"]
+        indexes = [
+            # 상품 목록 : 판매 중인 상품만 최신순(커서 페이지네이션)으로 읽습니다.
+            models.Index(
+                fields=["-id"],
+                condition=Q(status="a"),
+                name="mall_product_active_id_idx",
+            ),
+        ]
 
 
 class ProductOption(models.Model):
@@ -82,35 +239,205 @@ class ProductOption(models.Model):
     )
     name = models.CharField(max_length=100)  # 옵션 이름 (예: 색상, 크기 등)
     additional_price = models.PositiveIntegerField(default=0)  # 추가 금액
+    # 옵션별 재고 수량. 비어 있으면 상품 재고만 관리합니다.
+    stock = models.PositiveIntegerField("재고", null=True, blank=True)
 
     def __str__(self):
         return f"{self.product.name} - {self.name} (+{self.additional_price}원)"
 
 
 class ProductImage(models.Model):
+    class RenditionStatus(models.TextChoices):
+        PENDING = "PENDING", "대기"
+        RUNNING = "RUNNING", "변환 중"
+        DONE = "DONE", "완료"
+        FAILED = "FAILED", "실패"
+
     product = models.ForeignKey(
         Product, related_name="images", on_delete=models.CASCADE
     )
+    # 업로드한 원본. 화면에는 렌디션(ProductImageRendition)을 사용합니다.
     image = models.ImageField(upload_to="mall/product/images/%Y/%m/%d")
+    # load_products 로 가져온 원본 이미지의 SHA-256. 같은 이미지는 다시 처리하지 않습니다.
+    checksum = models.CharField(max_length=64, blank=True, editable=False)
+    rendition_status = models.CharField(
+        "렌디션 상태",
+        choices=RenditionStatus.choices,
+        default=RenditionStatus.PENDING,
+        max_length=7,
+        editable=False,
+        db_index=True,
+    )
+    # 변환을 선점한 시각. 변환 중에 프로세스가 종료된 이미지를 찾는 데 씁니다.
+    rendition_started_at = models.DateTimeField(null=True, editable=False)
 
     def save(self, *args, **kwargs):
+        # 새 파일이 업로드된 경우에만 렌디션을 다시 만듭니다.
+        is_new_file = bool(self.image) and not self.image._committed
+        if is_new_file:
+            self.rendition_status = self.RenditionStatus.PENDING
         super().save(*args, **kwargs)
 
-        img = Image.open(self.image.path)
+        if is_new_file:
+            # 이미지 변환은 요청 밖(렌디션 워커)에서 처리합니다.
+            from mall.workers import submit_image_renditions
 
-        if img.height > 300 or img.width > 300:
-            output_size = (300, 300)
-            img.thumbnail(output_size)
-            img.save(self.image.path)
+            pk = self.pk
+            transaction.on_commit(lambda: submit_image_renditions(pk))
 
     def __str__(self):
         return f"Image for {self.product.name}"
 
+    @classmethod
+    def get_claimable_q(cls, status_list=(RenditionStatus.PENDING,)) -> Q:
+        """
+        선점할 수 있는 이미지의 조건.
+
+        status_list 의 상태와 함께, MALL_IMAGE_RENDITION_LEASE_TIMEOUT(초)이 지나도록 끝나지 않은
+        RUNNING 이미지(변환 중에 프로세스가 종료된 경우)를 포함합니다.
+        """
+        stale_before = timezone.now() - timedelta(
+            seconds=settings.MALL_IMAGE_RENDITION_LEASE_TIMEOUT
+        )
+        return Q(rendition_status__in=status_list) | Q(
+            Q(rendition_started_at__lt=stale_before) | Q(rendition_started_at=None),
+            rendition_status=cls.RenditionStatus.RUNNING,
+        )
+
+    @classmethod
+    def claim(cls, pk, status_list=(RenditionStatus.PENDING,)) -> bool:
+        """
+        렌디션 변환을 선점합니다.
+
+        상태 조건부 UPDATE 로 선점하므로 웹 프로세스의 워커와 generate_image_renditions 명령이
+        같은 이미지를 동시에 변환하지 않습니다.
+        """
+        return bool(
+            cls.objects.filter(cls.get_claimable_q(status_list), pk=pk).update(
+                rendition_status=cls.RenditionStatus.RUNNING,
+                rendition_started_at=timezone.now(),
+            )
+        )
+
+    def read_image(self) -> bytes:
+        with self.image.open("rb") as f:
+            return f.read()
+
+    def build_renditions(
+        self, rendered_list: List["RenderedImage"]
+    ) -> List["ProductImageRendition"]:
+        """변환한 이미지 파일을 저장하고, 저장 전의 렌디션 목록을 반환합니다."""
+        stem = os.path.splitext(os.path.basename(self.image.name))[0]
+        rendition_list = []
+        for rendered in rendered_list:
+            rendition = ProductImageRendition(
+                image=self,
+                format=rendered.format,
+                width=rendered.width,
+                height=rendered.height,
+                size=len(rendered.content),
+            )
+            extension = FORMAT_DICT[rendered.format][2]
+            rendition.file.save(
+                f"{stem}_{rendered.width}w.{extension}",
+                ContentFile(rendered.content),
+                save=False,
+            )
+            rendition_list.append(rendition)
+        return rendition_list
+
+    def save_renditions(self, rendered_list: List["RenderedImage"]):
+        """변환한 이미지를 저장하고 기존 렌디션을 교체합니다."""
+        rendition_list = self.build_renditions(rendered_list)
+        with transaction.atomic():
+            old_rendition_list = list(self.renditions.all())
+            self.renditions.all().delete()
+            ProductImageRendition.objects.bulk_create(rendition_list)
+            self.rendition_status = self.RenditionStatus.DONE
+            ProductImage.objects.filter(pk=self.pk).update(
+                rendition_status=self.rendition_status
+            )
+        for rendition in old_rendition_list:
+            rendition.file.delete(save=False)
+
+        # 상품의 썸네일 정보에 렌디션을 반영합니다.
+        Product.refresh_primary_images([self.product_id])
+
+    def mark_rendition_failed(self):
+        self.rendition_status = self.RenditionStatus.FAILED
+        ProductImage.objects.filter(pk=self.pk).update(
+            rendition_status=self.rendition_status
+        )
+
+    def get_renditions(self, format) -> List["ProductImageRendition"]:
+        # prefetch_related("images__renditions") 한 결과를 사용하도록 .all() 에서 고릅니다.
+        return sorted(
+            (r for r in self.renditions.all() if r.format == format),
+            key=lambda r: r.width,
+        )
+
+    def get_thumbnail_rendition(self) -> Optional["ProductImageRendition"]:
+        """목록용 JPEG 렌디션 (MALL_IMAGE_THUMBNAIL_WIDTH 이상 중 가장 작은 것)"""
+        rendition_list = self.get_renditions("jpeg")
+        for rendition in rendition_list:
+            if rendition.width >= settings.MALL_IMAGE_THUMBNAIL_WIDTH:
+                return rendition
+        return rendition_list[-1] if rendition_list else None
+
+    @property
+    def thumbnail_url(self) -> str:
+        """목록용 렌디션의 URL. 렌디션이 아직 없으면 원본 URL 을 반환합니다."""
+        rendition = self.get_thumbnail_rendition()
+        return rendition.file.url if rendition else self.image.url
+
+    @property
+    def picture_sources(self) -> List[dict]:
+        """<picture> 의 <source> 목록 (선호하는 형식 순서)"""
+        source_list = []
+        for format in FORMAT_PREFERENCE:
+            rendition_list = self.get_renditions(format)
+            if rendition_list:
+                source_list.append(
+                    {
+                        "type": FORMAT_DICT[format][1],
+                        "srcset": ", ".join(
+                            f"{r.file.url} {r.width}w" for r in rendition_list
+                        ),
+                    }
+                )
+        return source_list
+
     class Meta:
         verbose_name = "상품 이미지"
         verbose_name_plural = "상품 이미지"
 
 
+class ProductImageRendition(models.Model):
+    """상품 이미지의 형식/너비별 변환본"""
+
+    image = models.ForeignKey(
+        ProductImage, related_name="renditions", on_delete=models.CASCADE
+    )
+    format = models.CharField(max_length=4)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    size = models.PositiveIntegerField("파일 크기(byte)")
+    file = models.FileField(upload_to="mall/product/renditions/%Y/%m/%d")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.image_id} {self.format} {self.width}w"
+
+    class Meta:
+        verbose_name = verbose_name_plural = "상품 이미지 렌디션"
+        constraints = [
+            UniqueConstraint(
+                fields=["image", "format", "width"],
+                name="unique_product_image_rendition",
+            )
+        ]
+
+
 class Comment(models.Model):
     product = models.ForeignKey(
         Product, on_delete=models.CASCADE, related_name="comments"
@@ -123,11 +450,29 @@ class Comment(models.Model):
         return f"{self.user.name}의 댓글: {self.content}"
 
 
+class CartProductQuerySet(models.QuerySet):
+    def with_amount(self):
+        """
+        장바구니 상품별 금액(line_amount)과 장바구니 전체 금액(cart_total)을 SQL 로 계산합니다.
+
+        cart_total 은 윈도 함수로 모든 행에 같은 값을 붙이므로 합계를 따로 조회하지 않습니다.
+        """
+        line_amount = (
+            F("product__price") + Coalesce(F("option__additional_price"), 0)
+        ) * F("quantity")
+        return self.annotate(
+            line_amount=line_amount,
+            cart_total=Window(Sum(line_amount)),
+        )
+
+
 class CartProduct(models.Model):
+    # 사용자별 조회는 unique_user_product_option 인덱스를 사용합니다.
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         db_constraint=False,
+        db_index=False,
         related_name="cart_products_set",
     )
     product = models.ForeignKey(Product, on_delete=models.CASCADE, db_constraint=False)
@@ -136,9 +481,18 @@ class CartProduct(models.Model):
     )  # 새로운 필드 추가
     quantity = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
 
+    objects = CartProductQuerySet.as_manager()
+
+    @property
+    def unit_price(self):
+        return self.product.price + (self.option.additional_price if self.option else 0)
+
     @property
     def total_price(self):
-        return (self.product.price + self.option.additional_price) * self.quantity
+        # with_amount() 로 조회했으면 SQL 로 계산한 금액을 사용합니다.
+        if hasattr(self, "line_amount"):
+            return self.line_amount
+        return self.unit_price * self.quantity
 
     @property
     def amount(self):
@@ -156,6 +510,199 @@ class CartProduct(models.Model):
         ]
 
 
+class _StatusConflict(Exception):
+    pass
+
+
+class TransitionResult(NamedTuple):
+    transitioned: int
+    rejected: int
+    # 상태가 맞지 않아 변경하지 않은 주문 pk
+    rejected_pk_list: List[int]
+    transitioned_pk_list: List[int]
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_summary(self):
+        """주문 목록 표시에 필요한 첫 상품의 썸네일 URL 을 함께 조회합니다."""
+        return self.annotate(
+            first_product_thumbnail_url=F("first_product__thumbnail_url"),
+        )
+
+    def compare_and_set_status(
+        self, pk, version, from_status, to_status, updated_at=None
+    ) -> bool:
+        """주문을 읽은 뒤 아무도 바꾸지 않았을 때(version 이 그대로일 때)만 상태를 바꿉니다."""
+        return bool(
+            self.filter(pk=pk, version=version, status=from_status).update(
+                status=to_status,
+                version=F("version") + 1,
+                updated_at=updated_at or timezone.now(),
+            )
+        )
+
+    def get_status_rows(self):
+        # 관리자 검색처럼 조인/DISTINCT 가 있는 쿼리셋도 주문 행만 읽도록 pk 서브쿼리로 조회합니다.
+        return list(
+            self.model.objects.filter(pk__in=self.values("pk"))
+            .order_by("pk")
+            .values_list("pk", "status", "version")
+        )
+
+    def transition(
+        self, from_status, to_status, changed_by=None, reason=""
+    ) -> TransitionResult:
+        """
+        from_status 인 주문만 to_status 로 바꾸고 변경 이력을 함께 저장합니다.
+
+        주문을 하나씩 save() 하지 않으므로 post_save 시그널을 보내지 않습니다.
+        """
+        if not Order.is_allowed_transition(from_status, to_status):
+            raise OrderStatusTransitionError(from_status, to_status)
+
+        with transaction.atomic(using=self.db):
+            row_list = self.get_status_rows()
+            rejected_pk_list = [
+                pk for pk, status, version in row_list if status != from_status
+            ]
+            transitioned_pk_list = self._apply_transition(
+                [row for row in row_list if row[1] == from_status],
+                to_status,
+                rejected_pk_list,
+                changed_by,
+                reason,
+            )
+        return TransitionResult(
+            len(transitioned_pk_list),
+            len(rejected_pk_list),
+            sorted(rejected_pk_list),
+            transitioned_pk_list,
+        )
+
+    def change_status(self, to_status, changed_by=None, reason="") -> TransitionResult:
+        """
+        주문마다 현재 상태에서 to_status 로 바꿀 수 있으면(전이표 기준) 바꿉니다.
+
+        이미 to_status 인 주문은 바꾸지도, 거절하지도 않습니다.
+        """
+        with transaction.atomic(using=self.db):
+            row_list = self.get_status_rows()
+            rejected_pk_list = []
+            allowed_row_list = []
+            for row in row_list:
+                if row[1] == to_status:
+                    continue
+                if Order.is_allowed_transition(row[1], to_status):
+                    allowed_row_list.append(row)
+                else:
+                    rejected_pk_list.append(row[0])
+            transitioned_pk_list = self._apply_transition(
+                allowed_row_list, to_status, rejected_pk_list, changed_by, reason
+            )
+        return TransitionResult(
+            len(transitioned_pk_list),
+            len(rejected_pk_list),
+            sorted(rejected_pk_list),
+            transitioned_pk_list,
+        )
+
+    def _apply_transition(
+        self, row_list, to_status, rejected_pk_list, changed_by, reason
+    ) -> List[int]:
+        """
+        (pk, 상태, version) 목록의 주문을 to_status 로 바꾸고 바꾼 주문 pk 목록을 반환합니다.
+
+        행을 잠그지 않고 읽은 version 을 조건으로 이전 상태별로 한 번씩 UPDATE 합니다. 그 사이
+        다른 곳에서 바꾼 주문이 있으면 그 UPDATE 를 되돌리고 주문별로 다시 시도하므로, 이력은
+        실제로 바꾼 주문에만 남습니다. 바꾸지 못한 주문은 rejected_pk_list 에 더합니다.
+        """
+        version_dict_by_status = defaultdict(dict)
+        for pk, status, version in row_list:
+            version_dict_by_status[status][pk] = version
+
+        event_list = []
+        for from_status, version_dict in version_dict_by_status.items():
+            try:
+                pk_list = self._bulk_compare_and_set_status(
+                    version_dict, from_status, to_status
+                )
+            except _StatusConflict:
+                pk_list = []
+                for pk, version in version_dict.items():
+                    if self._retry_compare_and_set_status(
+                        pk, version, from_status, to_status
+                    ):
+                        pk_list.append(pk)
+                    else:
+                        rejected_pk_list.append(pk)
+            event_list += [
+                OrderStatusEvent(
+                    order_id=pk,
+                    from_status=from_status,
+                    to_status=to_status,
+                    changed_by=changed_by,
+                    reason=reason,
+                )
+                for pk in pk_list
+            ]
+        OrderStatusEvent.objects.bulk_create(event_list)
+        return [event.order_id for event in event_list]
+
+    def _bulk_compare_and_set_status(self, version_dict, from_status, to_status):
+        # 주문마다 조건을 두지 않도록 같은 version 끼리 묶습니다. (version 은 대부분 몇 가지뿐입니다.)
+        pk_list_by_version = defaultdict(list)
+        for pk, version in version_dict.items():
+            pk_list_by_version[version].append(pk)
+        condition = Q()
+        for version, pk_list in pk_list_by_version.items():
+            condition |= Q(version=version, pk__in=pk_list)
+
+        with transaction.atomic(using=self.db):
+            transitioned = self.model.objects.filter(
+                condition, status=from_status
+            ).update(
+                status=to_status,
+                version=F("version") + 1,
+                updated_at=timezone.now(),
+            )
+            if transitioned != len(version_dict):
+                # 어느 주문이 바뀌었는지 알 수 없으므로 되돌리고 주문별로 처리합니다.
+                raise _StatusConflict()
+        return list(version_dict)
+
+    def _retry_compare_and_set_status(self, pk, version, from_status, to_status):
+        """version 만 바뀌고 상태가 그대로면 다시 읽은 version 으로 재시도합니다."""
+        while True:
+            if self.model.objects.compare_and_set_status(
+                pk, version, from_status, to_status
+            ):
+                return True
+            row = (
+                self.model.objects.filter(pk=pk)
+                .values_list("status", "version")
+                .first()
+            )
+            if row is None or row[0] != from_status:
+                return False
+            version = row[1]
+
+    def mark_as_prepared(self, **kwargs) -> TransitionResult:
+        """결제 완료 상태인 주문을 상품 준비 중 상태로 변경합니다."""
+        return self.transition(
+            Order.Status.PAID, Order.Status.PREPARED_PRODUCT, **kwargs
+        )
+
+    def mark_as_shipped(self, **kwargs) -> TransitionResult:
+        """상품 준비 중 상태인 주문을 배송 중 상태로 변경합니다."""
+        return self.transition(
+            Order.Status.PREPARED_PRODUCT, Order.Status.SHIPPED, **kwargs
+        )
+
+    def mark_as_delivered(self, **kwargs) -> TransitionResult:
+        """배송 중 상태인 주문을 배송 완료 상태로 변경합니다."""
+        return self.transition(Order.Status.SHIPPED, Order.Status.DELIVERED, **kwargs)
+
+
 class Order(models.Model):
     class Status(models.TextChoices):
         REQUSETED = (
@@ -187,16 +734,48 @@ class Order(models.Model):
             "주문 취소",
         )
 
+    # 상태별로 변경할 수 있는 다음 상태. 여기에 없는 변경(예: 늦게 도착한 결제 완료 웹훅이
+    # 배송 중인 주문을 결제 완료로 되돌리는 것)은 거절합니다.
+    TRANSITIONS = {
+        Status.REQUSETED: {Status.PAID, Status.FAILED_PAYMENT, Status.CANCELLED},
+        Status.FAILED_PAYMENT: {Status.PAID, Status.CANCELLED},
+        Status.PAID: {Status.PREPARED_PRODUCT, Status.CANCELLED},
+        Status.PREPARED_PRODUCT: {Status.SHIPPED, Status.CANCELLED},
+        Status.SHIPPED: {Status.DELIVERED, Status.CANCELLED},
+        # 반품 후 환불
+        Status.DELIVERED: {Status.CANCELLED},
+        Status.CANCELLED: set(),
+    }
+
     uid = models.UUIDField(default=uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False)
+    # 사용자별 조회는 (user, id) 인덱스를 사용합니다.
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_constraint=False, db_index=False
+    )
     total_amount = models.PositiveIntegerField()
     status = models.CharField(
         "진행상태", choices=Status.choices, default=Status.REQUSETED, max_length=16
     )
+    # 상태를 바꿀 때마다 1씩 올립니다. (compare-and-set)
+    version = models.PositiveIntegerField("버전", default=0, editable=False)
     product_set = models.ManyToManyField(Product, through="OrderedProduct", blank=False)
+    # 주문 목록/관리자 화면에서 OrderedProduct 를 조회하지 않도록 주문 생성 시점에 채워둡니다.
+    item_count = models.PositiveIntegerField("주문 상품 수", default=0)
+    first_product = models.ForeignKey(
+        Product,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        related_name="+",
+    )
+    first_product_name = models.CharField("첫 상품명", max_length=100, blank=True)
+    display_name = models.CharField("주문명", max_length=120, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OrderQuerySet.as_manager()
+
     def get_absolute_url(self) -> str:
         return reverse("order_detail", args=[self.pk])
 
@@ -207,70 +786,211 @@ class Order(models.Model):
         for payment in self.orderpayment_set.all():
             payment.cancel(reason=reason)
 
-    def mark_as_prepared(self):
+    @classmethod
+    def is_allowed_transition(cls, from_status, to_status) -> bool:
+        return to_status in cls.TRANSITIONS.get(from_status, ())
+
+    def change_status(self, to_status, changed_by=None, reason="") -> bool:
+        """
+        주문 상태를 전이표(TRANSITIONS)에 따라 바꾸고 변경 이력을 남깁니다.
+
+        행을 잠그지 않고, 읽은 뒤 아무도 바꾸지 않았을 때만 UPDATE 합니다. 그 사이 다른 곳에서
+        바꿨으면 최신 상태를 다시 읽어 전이를 다시 검사합니다. 이미 to_status 이면 False 를,
+        바꿨으면 True 를 반환하고, 허용되지 않는 변경이면 OrderStatusTransitionError 가 발생합니다.
+        """
+        while self.status != to_status:
+            if not self.is_allowed_transition(self.status, to_status):
+                raise OrderStatusTransitionError(self.status, to_status)
+
+            now = timezone.now()
+            with transaction.atomic():
+                changed = Order.objects.compare_and_set_status(
+                    self.pk, self.version, self.status, to_status, now
+                )
+                if changed:
+                    OrderStatusEvent.objects.create(
+                        order=self,
+                        from_status=self.status,
+                        to_status=to_status,
+                        changed_by=changed_by,
+                        reason=reason,
+                    )
+            if changed:
+                self.status = to_status
+                self.version += 1
+                self.updated_at = now
+                return True
+            self.refresh_from_db(fields=["status", "version", "updated_at"])
+        return False
+
+    def _transition(self, method_name, error_message, **kwargs):
+        result = getattr(Order.objects.filter(pk=self.pk), method_name)(**kwargs)
+        if not result.transitioned:
+            raise ValueError(error_message)
+        self.refresh_from_db(fields=["status", "version", "updated_at"])
+
+    def mark_as_prepared(self, **kwargs):
         """주문을 상품 준비 중 상태로 변경합니다."""
-        if self.status != self.Status.PAID:
-            raise ValueError(
-                "결제 완료 상태인 주문만 상품 준비 중 상태로 변경할 수 있습니다."
-            )
-        self.status = self.Status.PREPARED_PRODUCT
-        self.save()
+        self._transition(
+            "mark_as_prepared",
+            "결제 완료 상태인 주문만 상품 준비 중 상태로 변경할 수 있습니다.",
+            **kwargs,
+        )
 
-    def mark_as_shipped(self):
+    def mark_as_shipped(self, **kwargs):
         """주문을 배송 중 상태로 변경합니다."""
-        if self.status != self.Status.PREPARED_PRODUCT:
-            raise ValueError(
-                "상품 준비 중 상태인 주문만 배송 중 상태로 변경할 수 있습니다."
-            )
-        self.status = self.Status.SHIPPED
-        self.save()
+        self._transition(
+            "mark_as_shipped",
+            "상품 준비 중 상태인 주문만 배송 중 상태로 변경할 수 있습니다.",
+            **kwargs,
+        )
 
-    def mark_as_delivered(self):
+    def mark_as_delivered(self, **kwargs):
         """주문을 배송 완료 상태로 변경합니다."""
-        if self.status != self.Status.SHIPPED:
-            raise ValueError(
-                "배송 중 상태인 주문만 배송 완료 상태로 변경할 수 있습니다."
-            )
-        self.status = self.Status.DELIVERED
-        self.save()
+        self._transition(
+            "mark_as_delivered",
+            "배송 중 상태인 주문만 배송 완료 상태로 변경할 수 있습니다.",
+            **kwargs,
+        )
 
     @property
     def name(self):
+        if self.display_name:
+            return self.display_name
+
+        # 요약 컬럼이 채워지지 않은 주문 (backfill_order_summary 실행 전)
         first_product = self.product_set.first()
         if first_product is None:
-            return "주문 상품 없음"
+            return self.get_summary_name(None, 0)
         size = self.product_set.all().count()
+        return self.get_summary_name(first_product.name, size)
+
+    async def aget_name(self):
+        """name 의 비동기 버전입니다."""
+        if self.display_name:
+            return self.display_name
+
+        first_product = await self.product_set.afirst()
+        if first_product is None:
+            return self.get_summary_name(None, 0)
+        size = await self.product_set.all().acount()
+        return self.get_summary_name(first_product.name, size)
+
+    @property
+    def first_product_image_url(self):
+        """with_summary() 로 조회한 주문의 첫 상품 썸네일 URL 입니다."""
+        return self.first_product_thumbnail_url or None
+
+    @staticmethod
+    def get_summary_name(first_product_name, size):
+        if first_product_name is None:
+            return "주문 상품 없음"
         if size < 2:
-            return first_product.name
-        return f"{first_product.name} 외 {size - 1}건"
+            return first_product_name
+        return f"{first_product_name} 외 {size - 1}건"
+
+    def set_summary(self, ordered_product_list: List["OrderedProduct"]):
+        """주문 상품 목록으로 요약 컬럼을 채웁니다. 저장은 하지 않습니다."""
+        # 상품 기본 정렬(-pk)과 같은 기준으로 첫 상품을 고릅니다.
+        first_ordered_product = max(
+            ordered_product_list,
+            key=lambda ordered_product: ordered_product.product_id,
+            default=None,
+        )
+        self.item_count = len(ordered_product_list)
+        if first_ordered_product is None:
+            self.first_product = None
+            self.first_product_name = ""
+        else:
+            self.first_product_id = first_ordered_product.product_id
+            self.first_product_name = first_ordered_product.name
+        self.display_name = self.get_summary_name(
+            self.first_product_name or None, self.item_count
+        )
 
     @classmethod
-    def create_from_cart(
-        cls, user: User, cart_product_qs: QuerySet[CartProduct]
-    ) -> "Order":
-        cart_product_list: List[CartProduct] = list(cart_product_qs)
-        total_amount = sum(cart_product.amount for cart_product in cart_product_list)
-        order = cls.objects.create(user=user, total_amount=total_amount)
+    @transaction.atomic
+    def create_from_cart(cls, user: User, cart: "BaseCartStore") -> "Order":
+        # 장바구니 상품/옵션을 한 번에 조회합니다. 인기 상품의 주문이 상품 행 잠금을 기다리며
+        # 줄을 서지 않도록 상품 행은 잠그지 않고, 재고는 마지막에 조건부 UPDATE 로 차감합니다.
+        # (DatabaseCartStore 는 장바구니 행을 잠가 중복 주문을 막습니다.)
+        cart_product_list = cart.get_lines(for_update=True)
+        order = cls(user=user, total_amount=0)
 
         ordered_product_list = []
         for cart_product in cart_product_list:
             product = cart_product.product
+            option = cart_product.option
             ordered_product = OrderedProduct(
                 order=order,
                 product=product,
                 name=product.name,
                 price=product.price,
+                option=option,
+                option_name=option.name if option else "",
+                option_price=option.additional_price if option else 0,
                 quantity=cart_product.quantity,
             )
             ordered_product_list.append(ordered_product)
 
+        order.total_amount = sum(
+            ordered_product.amount for ordered_product in ordered_product_list
+        )
+        order.set_summary(ordered_product_list)
+        order.save()
         OrderedProduct.objects.bulk_create(ordered_product_list)
+        # 차감한 재고 행은 트랜잭션이 끝날 때까지 잠기므로, 잠금 시간이 짧도록 마지막에 차감합니다.
+        StockReservation.reserve(order, cart_product_list)
 
         return order
 
     class Meta:
         ordering = ["-pk"]
         verbose_name = verbose_name_plural = "주문"
+        indexes = [
+            # 주문 목록 : 사용자의 주문을 최신순으로 읽습니다.
+            models.Index(fields=["user", "-id"], name="mall_order_user_id_idx"),
+        ]
+
+
+class OrderStatusEvent(models.Model):
+    """주문 상태 변경 이력 (Order.change_status / OrderQuerySet.transition 으로 바꾼 상태)"""
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="status_events",
+    )
+    from_status = models.CharField(
+        "이전 상태", choices=Order.Status.choices, max_length=16
+    )
+    to_status = models.CharField(
+        "변경 상태", choices=Order.Status.choices, max_length=16
+    )
+    changed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        related_name="+",
+        verbose_name="변경한 사용자",
+    )
+    reason = models.CharField("사유", max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"주문 {self.order_id}: {self.from_status} -> {self.to_status}"
+
+    class Meta:
+        ordering = ["pk"]
+        verbose_name = verbose_name_plural = "주문 상태 변경 이력"
+        indexes = [
+            # 기간별 변경 이력 / 기간 내 특정 상태로 바뀐 주문 조회
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["to_status", "created_at"]),
+        ]
 
 
 class OrderedProduct(models.Model):
@@ -282,13 +1002,244 @@ class OrderedProduct(models.Model):
     price = models.PositiveIntegerField(
         "상품가격", help_text="주문 시점의 상품가격을 저장합니다."
     )
+    option = models.ForeignKey(
+        ProductOption,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+    )
+    option_name = models.CharField(
+        "옵션명",
+        max_length=100,
+        blank=True,
+        help_text="주문 시점의 옵션명을 저장합니다.",
+    )
+    option_price = models.PositiveIntegerField(
+        "옵션 추가금액",
+        default=0,
+        help_text="주문 시점의 옵션 추가금액을 저장합니다.",
+    )
     quantity = models.PositiveIntegerField("수량")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @property
+    def unit_price(self):
+        return self.price + self.option_price
+
+    @property
+    def amount(self):
+        return self.unit_price * self.quantity
+
     class Meta:
         constraints = [
-            UniqueConstraint(fields=["order", "product"], name="unique_order_product")
+            UniqueConstraint(
+                fields=["order", "product", "option"],
+                name="unique_order_product_option",
+            )
+        ]
+
+
+class StockReservation(models.Model):
+    """
+    주문 생성 시 차감한 재고.
+
+    상품/옵션 재고마다 한 행을 만듭니다. 결제가 완료되면 확정하고, 결제 실패/취소 또는
+    만료(release_expired_stock 명령) 시 해제하면서 재고를 돌려놓습니다.
+    """
+
+    class Status(models.TextChoices):
+        RESERVED = "RESERVED", "예약"
+        COMMITTED = "COMMITTED", "확정"
+        RELEASED = "RELEASED", "해제"
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="stock_reservations",
+    )
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, db_constraint=False)
+    # 비어 있으면 상품 재고를, 지정하면 옵션 재고를 차감한 예약입니다.
+    option = models.ForeignKey(
+        ProductOption,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_constraint=False,
+    )
+    quantity = models.PositiveIntegerField("수량")
+    status = models.CharField(
+        "상태", choices=Status.choices, default=Status.RESERVED, max_length=9
+    )
+    expires_at = models.DateTimeField("만료 시각")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"<{self.pk}> 주문 {self.order_id} x{self.quantity} ({self.status})"
+
+    def get_stock_queryset(self) -> models.QuerySet:
+        if self.option_id:
+            return ProductOption.objects.filter(pk=self.option_id)
+        return Product.objects.filter(pk=self.product_id)
+
+    @staticmethod
+    def take_stock(qs: models.QuerySet, quantity) -> bool:
+        """
+        재고가 충분하면 차감하고 True 를 반환합니다.
+
+        재고 확인과 차감을 조건부 UPDATE 한 문장으로 처리하므로 행을 미리 잠그지 않아도
+        동시에 주문해도 재고가 음수가 되지 않습니다.
+        """
+        return bool(qs.filter(stock__gte=quantity).update(stock=F("stock") - quantity))
+
+    @classmethod
+    def reserve(cls, order: Order, line_list) -> List["StockReservation"]:
+        """
+        장바구니 상품 목록만큼 재고를 차감하고 예약을 만듭니다.
+
+        트랜잭션 안에서 호출해야 하며, 재고가 부족하면 OutOfStockError 를 일으킵니다.
+        재고를 관리하지 않는 상품/옵션(stock 이 비어 있음)은 차감하지 않습니다.
+        """
+        product_quantity_dict = defaultdict(int)
+        option_quantity_dict = defaultdict(int)
+        name_dict = {}
+        for line in line_list:
+            product = line.product
+            option = line.option
+            if product.stock is not None:
+                product_quantity_dict[product.pk] += line.quantity
+                name_dict[product.pk, None] = product.name
+            if option is not None and option.stock is not None:
+                option_quantity_dict[product.pk, option.pk] += line.quantity
+                name_dict[product.pk, option.pk] = f"{product.name} ({option.name})"
+
+        expires_at = timezone.now() + timedelta(seconds=settings.STOCK_RESERVATION_TTL)
+        reservation_list = []
+        # 교착 상태를 피하기 위해 항상 상품, 옵션 pk 순서로 차감합니다.
+        for product_pk, quantity in sorted(product_quantity_dict.items()):
+            if not cls.take_stock(Product.objects.filter(pk=product_pk), quantity):
+                raise OutOfStockError(name_dict[product_pk, None])
+            reservation_list.append(
+                cls(
+                    order=order,
+                    product_id=product_pk,
+                    quantity=quantity,
+                    expires_at=expires_at,
+                )
+            )
+        for (product_pk, option_pk), quantity in sorted(
+            option_quantity_dict.items(), key=lambda item: item[0][1]
+        ):
+            if not cls.take_stock(ProductOption.objects.filter(pk=option_pk), quantity):
+                raise OutOfStockError(name_dict[product_pk, option_pk])
+            reservation_list.append(
+                cls(
+                    order=order,
+                    product_id=product_pk,
+                    option_id=option_pk,
+                    quantity=quantity,
+                    expires_at=expires_at,
+                )
+            )
+
+        if reservation_list:
+            cls.objects.bulk_create(reservation_list)
+        return reservation_list
+
+    @classmethod
+    def commit_orders(cls, order_pk_list) -> int:
+        """
+        결제가 완료된 주문의 예약을 확정합니다. 확정한 예약 수를 반환합니다.
+
+        결제 전에 만료되어 해제된 예약은 재고를 다시 차감합니다. 그 사이 재고가 모두 팔렸다면
+        이미 결제된 주문이므로 확정하지 않고 오류 로그를 남깁니다.
+        """
+        now = timezone.now()
+        committed_count = cls.objects.filter(
+            order_id__in=order_pk_list, status=cls.Status.RESERVED
+        ).update(status=cls.Status.COMMITTED, updated_at=now)
+
+        for reservation in cls.objects.filter(
+            order_id__in=order_pk_list, status=cls.Status.RELEASED
+        ).order_by("product_id", "option_id"):
+            with transaction.atomic():
+                if not cls.objects.filter(
+                    pk=reservation.pk, status=cls.Status.RELEASED
+                ).update(status=cls.Status.COMMITTED, updated_at=now):
+                    continue
+                if not cls.take_stock(
+                    reservation.get_stock_queryset(), reservation.quantity
+                ):
+                    logger.error(
+                        "결제 완료된 주문 %s 의 재고를 확보하지 못했습니다. (예약 %s)",
+                        reservation.order_id,
+                        reservation.pk,
+                    )
+                    transaction.set_rollback(True)
+                    continue
+            committed_count += 1
+        return committed_count
+
+    @classmethod
+    def release_orders(cls, order_pk_list) -> int:
+        """결제 실패/취소된 주문의 예약을 해제합니다."""
+        return cls.release(
+            cls.objects.filter(
+                order_id__in=order_pk_list,
+                status__in=[cls.Status.RESERVED, cls.Status.COMMITTED],
+            )
+        )
+
+    @classmethod
+    def release_expired(cls) -> int:
+        """결제되지 않고 만료된 예약을 해제합니다."""
+        return cls.release(
+            cls.objects.filter(
+                status=cls.Status.RESERVED, expires_at__lte=timezone.now()
+            )
+        )
+
+    @classmethod
+    def release(cls, qs: models.QuerySet) -> int:
+        """예약을 해제하고 재고를 돌려놓습니다. 해제한 예약 수를 반환합니다."""
+        released_count = 0
+        for reservation in qs.order_by("product_id", "option_id"):
+            with transaction.atomic():
+                # 다른 프로세스가 먼저 해제/확정한 예약은 건너뜁니다.
+                if not cls.objects.filter(
+                    pk=reservation.pk, status=reservation.status
+                ).update(status=cls.Status.RELEASED, updated_at=timezone.now()):
+                    continue
+                reservation.get_stock_queryset().update(
+                    stock=F("stock") + reservation.quantity
+                )
+            released_count += 1
+        return released_count
+
+    @classmethod
+    def apply_order_statuses(cls, order_status_dict: dict):
+        """바뀐 주문 상태({주문 pk: 상태})에 맞춰 예약을 확정하거나 해제합니다."""
+        paid_pk_list = []
+        released_pk_list = []
+        for order_pk, order_status in order_status_dict.items():
+            if order_status == Order.Status.PAID:
+                paid_pk_list.append(order_pk)
+            elif order_status in (Order.Status.FAILED_PAYMENT, Order.Status.CANCELLED):
+                released_pk_list.append(order_pk)
+        if paid_pk_list:
+            cls.commit_orders(paid_pk_list)
+        if released_pk_list:
+            cls.release_orders(released_pk_list)
+
+    class Meta:
+        indexes = [
+            # release_expired_stock : 만료된 예약을 찾습니다.
+            models.Index(
+                fields=["status", "expires_at"], name="mall_stockres_status_exp_idx"
+            ),
         ]
 
 
@@ -307,11 +1258,15 @@ class AbstarctPortOnePayment(models.Model):
         READY = "READY", "미결제"
         PAID = "PAID", "결제완료"
         CANCELLED = "CANCELLED", "결제취소"
+        PARTIAL_CANCELLED = "PARTIAL_CANCELLED", "부분취소"
         FAILED = "FAILED", "결제실패"
         VIRTUAL_ACCOUNT_ISSUED = "VIRTUAL_ACCOUNT_ISSUED", "가상계좌"
 
     meta = models.JSONField("포트원 결제내역", default=dict, editable=False)
-    uid = models.UUIDField("쇼핑몰 결제식별자", default=uuid4, editable=False)
+    # 웹훅/결제 검증 작업은 uid 로 결제건을 찾습니다.
+    uid = models.UUIDField(
+        "쇼핑몰 결제식별자", default=uuid4, unique=True, editable=False
+    )
     name = models.CharField("결제명", max_length=200, editable=False)
     desired_amount = models.PositiveIntegerField("결제요청금액", editable=False)
     buyer_name = models.CharField("구매자명", max_length=100, editable=False)
@@ -323,68 +1278,111 @@ class AbstarctPortOnePayment(models.Model):
         "결제상태", choices=PayStatus.choices, max_length=22, default=PayStatus.READY
     )
     is_paid_ok = models.BooleanField("결제성공여부", default=False, db_index=True)
+    cancelled_amount = models.PositiveIntegerField(
+        "취소금액", default=0, editable=False
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def merchant_uid(self):
         return str(self.uid)
 
+    @property
+    def cancellable_amount(self) -> int:
+        return max(0, self.desired_amount - self.cancelled_amount)
+
     def portone_check(self):
         try:
-            response = requests.get(
-                f"https://api.portone.io/payments/{self.merchant_uid}",
-                headers={"Authorization": f"PortOne {settings.PORTONE_API_SECRET}"},
-            )
-            self.meta = response.json()
-            print(response.json())
+            self.meta = portone_cache.get_payment(self.merchant_uid)
+            logger.debug("포트원 결제 조회: %s", self.meta)
 
-        except (Iamport.ResponseError, Iamport.HttpError) as e:
+        except PortOneError as e:
             logger.error(str(e), exc_info=e)
             raise Http404("포트원에서 결제 내역을 찾을 수 없습니다.")
 
-        self.pay_status = self.meta["status"]
+        self.apply_portone_meta(self.meta)
+        self.save_portone_check()
+
+    async def aportone_check(self):
+        """portone_check 의 비동기 버전입니다."""
+        try:
+            meta = await portone_cache.aget_payment(self.merchant_uid)
+            logger.debug("포트원 결제 조회: %s", meta)
+
+        except PortOneError as e:
+            logger.error(str(e), exc_info=e)
+            raise Http404("포트원에서 결제 내역을 찾을 수 없습니다.")
+
+        self.apply_portone_meta(meta)
+        # 비동기 ORM 은 트랜잭션을 지원하지 않으므로 저장은 동기 컨텍스트에서 한 번에 처리합니다.
+        await sync_to_async(self.save_portone_check)()
+
+    def save_portone_check(self):
+        """검증 결과를 저장합니다. 연관된 상태가 있으면 상속받는 클래스에서 함께 갱신합니다."""
+        self.save()
+
+    def apply_portone_meta(self, meta: dict):
+        """포트원 결제 내역을 결제 상태에 반영합니다. (저장은 하지 않습니다.)"""
+        self.meta = meta
+        self.pay_status = meta["status"]
         self.is_paid_ok = (
-            self.meta["status"] == "PAID"
-            and self.meta["amount"]["total"] == self.desired_amount
+            meta["status"] == "PAID" and meta["amount"]["total"] == self.desired_amount
         )
-
+        self.cancelled_amount = meta["amount"].get("cancelled", 0)
         # TODO : 결제는 되었는데, 결제 금액이 맞지 않는 경우 -> 의심된다는 플래그 지정
-        self.save()
 
-    # TODO : 결제 취소 기능 구현
-    def cancel(self, reason):
-        """결제를 취소합니다."""
-        print(self.pay_status)
-        if self.pay_status != self.PayStatus.PAID:
+    def cancel(self, reason, amount: Optional[int] = None):
+        """
+        결제를 취소합니다. amount 를 지정하지 않으면 남은 금액을 모두 취소합니다.
+
+        취소 가능 잔액을 함께 보내므로 같은 취소가 두 번 처리되지 않습니다.
+        포트원이 취소를 거절하면 PaymentCancelError 가, 포트원 API 호출에 실패하면
+        PortOneError 가 발생합니다.
+        """
+        if self.pay_status not in (
+            self.PayStatus.PAID,
+            self.PayStatus.PARTIAL_CANCELLED,
+        ):
             raise ValueError("결제 완료 상태만 취소할 수 있습니다.")
-
-        url = f"https://api.portone.io/payments/{self.merchant_uid}/cancel"
-        payload = {"reason": reason}
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"PortOne {settings.PORTONE_API_SECRET}",
-        }
-
+        cancellable_amount = self.cancellable_amount
+        if amount is not None and not 0 < amount <= cancellable_amount:
+            raise ValueError("결제 취소 금액이 취소 가능 금액을 초과했습니다.")
+
+        response = get_client().cancel_payment(
+            self.merchant_uid,
+            reason,
+            amount,
+            current_cancellable_amount=cancellable_amount,
+        )
         try:
-            response = requests.post(url, json=payload, headers=headers)
             response_data = response.json()
-            print(response_data)
-
-            if response.status_code == 200:
-                # 취소가 성공적으로 처리된 경우 상태를 업데이트합니다.
-                self.pay_status = self.PayStatus.CANCELLED
-                self.save()
-
-                # 상태를 취소로 변경하는 메서드 호출 (구체적인 클래스에서 구현됨)
-                self.update_related_statuses_to_cancelled()
-
-            else:
-                raise ValueError(
-                    f"결제 취소 실패: {response_data.get('message', '알 수 없는 오류')}"
-                )
+        except ValueError:
+            response_data = {}
+
+        if response.status_code != 200:
+            try:
+                self.handle_cancel_error(response.status_code, response_data)
+            except (ValueError, PermissionError) as e:
+                raise PaymentCancelError(
+                    str(e), response.status_code, response_data.get("type", "")
+                ) from e
+
+        cancellation = response_data.get("cancellation") or {}
+        self.cancelled_amount += cancellation.get(
+            "totalAmount", amount or cancellable_amount
+        )
+        fully_cancelled = self.cancelled_amount >= self.desired_amount
+        if fully_cancelled:
+            self.pay_status = self.PayStatus.CANCELLED
+        else:
+            self.pay_status = self.PayStatus.PARTIAL_CANCELLED
+        self.save(update_fields=["pay_status", "cancelled_amount", "updated_at"])
+        portone_cache.invalidate_payment(self.merchant_uid)
 
-        except requests.exceptions.RequestException as e:
-            logger.error(str(e), exc_info=e)
-            raise Http404("포트원 결제 취소 요청 중 오류가 발생했습니다.")
+        if fully_cancelled:
+            # 상태를 취소로 변경하는 메서드 호출 (구체적인 클래스에서 구현됨)
+            self.update_related_statuses_to_cancelled()
 
     def update_related_statuses_to_cancelled(self):
         """연관된 상태를 취소로 변경하기 위한 메서드. 상속받는 클래스에서 구현해야 합니다."""
@@ -444,26 +1442,162 @@ class AbstarctPortOnePayment(models.Model):
 class OrderPayment(AbstarctPortOnePayment):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, db_constraint=False)
 
-    def portone_check(self):
-        super().portone_check()
+    def save_portone_check(self):
+        with transaction.atomic():
+            super().save_portone_check()
+            self.update_order_status()
 
+    def get_order_status(self):
+        """결제 상태에 대응하는 주문 상태를 반환합니다. 변경할 필요가 없으면 None 입니다."""
         if self.is_paid_ok:
-            self.order.status = Order.Status.PAID
-            self.order.save()
-            self.order.orderpayment_set.exclude(pk=self.pk).delete()
-
+            return Order.Status.PAID
         elif self.pay_status == self.PayStatus.FAILED:
-            self.order.status = Order.Status.FAILED_PAYMENT
-            self.order.save()
-
+            return Order.Status.FAILED_PAYMENT
         elif self.pay_status == self.PayStatus.CANCELLED:
-            self.order.status = Order.Status.CANCELLED
-            self.order.save()
+            return Order.Status.CANCELLED
+        return None
+
+    def update_order_status(self):
+        order_status = self.get_order_status()
+        if order_status is None:
+            return
+
+        try:
+            status_changed = self.order.change_status(
+                order_status, reason="포트원 결제 확인"
+            )
+        except OrderStatusTransitionError as e:
+            # 이미 배송 중인 주문에 늦게 도착한 웹훅 등
+            logger.warning("주문 %s 의 상태를 바꾸지 않았습니다: %s", self.order_id, e)
+            status_changed = False
+        if status_changed:
+            StockReservation.apply_order_statuses({self.order_id: order_status})
+
+        if self.is_paid_ok:
+            self.order.orderpayment_set.exclude(pk=self.pk).delete()
+
+    @classmethod
+    def bulk_apply_portone_meta(cls, payment_meta_list) -> int:
+        """
+        여러 결제건에 포트원 결제 내역을 반영하고 주문 상태를 한 번에 갱신합니다.
+
+        결제건은 order 를 select_related 로 조회해두어야 합니다. 상태가 바뀐 주문 수를 반환합니다.
+        """
+        now = timezone.now()
+        payment_list = []
+        paid_payment_list = []
+        order_status_dict = {}
+
+        for payment, meta in payment_meta_list:
+            payment.apply_portone_meta(meta)
+            payment.updated_at = now
+            payment_list.append(payment)
+
+            order_status = payment.get_order_status()
+            if order_status is None:
+                continue
+            if payment.is_paid_ok:
+                paid_payment_list.append(payment)
+            # 같은 주문의 결제건 중 결제 완료된 건이 있으면 그 상태를 우선합니다.
+            if payment.order_id not in order_status_dict or payment.is_paid_ok:
+                order_status_dict[payment.order_id] = (payment.order, order_status)
+
+        # 같은 상태로 바꿀 주문끼리 묶어 한 번에 바꿉니다. 주문의 현재 상태는 다시 읽어 전이표로
+        # 검사하므로, 조회해둔 주문 상태가 오래되었어도 결제 완료된 주문을 되돌리지 않습니다.
+        order_pk_list_by_status = defaultdict(list)
+        for order, order_status in order_status_dict.values():
+            order_pk_list_by_status[order_status].append(order.pk)
+
+        changed_order_status_dict = {}
+        with transaction.atomic():
+            cls.objects.bulk_update(
+                payment_list,
+                ["meta", "pay_status", "is_paid_ok", "cancelled_amount", "updated_at"],
+            )
+            for order_status, order_pk_list in order_pk_list_by_status.items():
+                result = Order.objects.filter(pk__in=order_pk_list).change_status(
+                    order_status, reason="포트원 결제 확인"
+                )
+                if result.rejected:
+                    logger.warning(
+                        "주문 %s 의 상태를 %s (으)로 바꾸지 않았습니다.",
+                        result.rejected_pk_list,
+                        order_status,
+                    )
+                for order_pk in result.transitioned_pk_list:
+                    changed_order_status_dict[order_pk] = order_status
+            StockReservation.apply_order_statuses(changed_order_status_dict)
+            if paid_payment_list:
+                cls.objects.filter(
+                    order_id__in=[payment.order_id for payment in paid_payment_list]
+                ).exclude(pk__in=[payment.pk for payment in paid_payment_list]).delete()
+
+        for order, order_status in order_status_dict.values():
+            if order.pk in changed_order_status_dict:
+                order.status = order_status
+                order.version += 1
+        return len(changed_order_status_dict)
 
     def update_related_statuses_to_cancelled(self):
         """연관된 상태를 취소로 변경합니다."""
-        self.order.status = Order.Status.CANCELLED
-        self.order.save()
+        try:
+            self.order.change_status(Order.Status.CANCELLED, reason="결제 취소")
+        except OrderStatusTransitionError as e:
+            logger.warning("주문 %s 의 상태를 바꾸지 않았습니다: %s", self.order_id, e)
+        StockReservation.release_orders([self.order_id])
+
+    @classmethod
+    def get_attempt_queryset(cls, order: Order) -> models.QuerySet:
+        """한도 판단에 필요한 만큼의 최근 결제 시도"""
+        return (
+            cls.objects.filter(order=order)
+            .defer("meta")
+            .order_by("-pk")[: settings.PAYMENT_MAX_ATTEMPTS_PER_ORDER]
+        )
+
+    @classmethod
+    def pick_reusable_attempt(
+        cls, order: Order, attempt_list: List["OrderPayment"]
+    ) -> Optional["OrderPayment"]:
+        """
+        최근 결제 시도 중 다시 쓸 수 있는 미결제 시도를 반환합니다.
+
+        없으면 None 을, 새로 만들 수 없으면 PaymentAttemptLimitError 를 일으킵니다.
+        """
+        for payment in attempt_list:
+            if (
+                payment.pay_status == cls.PayStatus.READY
+                and payment.desired_amount == order.total_amount
+            ):
+                payment.order = order
+                return payment
+        if len(attempt_list) >= settings.PAYMENT_MAX_ATTEMPTS_PER_ORDER:
+            raise PaymentAttemptLimitError(
+                "결제 시도 횟수를 초과했습니다. 잠시 후 다시 시도해주세요."
+            )
+        return None
+
+    @classmethod
+    def get_or_create_by_order(cls, order: Order) -> "OrderPayment":
+        """
+        결제 페이지를 열 때마다 결제 시도를 만들지 않도록, 금액이 같은 미결제 시도가 있으면
+        다시 사용하고 없으면 새로 만듭니다. order 의 user 를 select_related 로 조회해두어야 합니다.
+        """
+        payment = cls.pick_reusable_attempt(
+            order, list(cls.get_attempt_queryset(order))
+        )
+        if payment is None:
+            payment = cls.create_by_order(order)
+        return payment
+
+    @classmethod
+    async def aget_or_create_by_order(cls, order: Order) -> "OrderPayment":
+        """get_or_create_by_order 의 비동기 버전입니다."""
+        attempt_list = [payment async for payment in cls.get_attempt_queryset(order)]
+        payment = cls.pick_reusable_attempt(order, attempt_list)
+        if payment is None:
+            payment = await cls.acreate_by_order(order)
+        return payment
 
     @classmethod
     def create_by_order(cls, order: Order) -> "OrderPayment":
@@ -476,3 +1610,519 @@ class OrderPayment(AbstarctPortOnePayment):
         )
 
         return order_payment
+
+    @classmethod
+    async def acreate_by_order(cls, order: Order) -> "OrderPayment":
+        """create_by_order 의 비동기 버전입니다. order 의 user 를 select_related 로 조회해두어야 합니다."""
+        order_payment = await cls.objects.acreate(
+            order=order,
+            name=await order.aget_name(),
+            desired_amount=order.total_amount,
+            buyer_name=order.user.get_full_name() or order.user.username,
+            buyer_email=order.user.email,
+        )
+
+        return order_payment
+
+    class Meta:
+        indexes = [
+            # reconcile_payments : 상태별로 pk 순서대로 훑습니다.
+            models.Index(
+                fields=["pay_status", "id"], name="mall_orderpay_status_id_idx"
+            ),
+        ]
+
+
+class AbstractQueueJob(models.Model):
+    """
+    워커가 처리하는 작업 큐의 공통 모델.
+
+    상태 조건부 UPDATE 로 작업을 선점하고, 실패하면 지수 백오프로 다시 대기시키며, 워커가
+    처리 중에 종료되어 RUNNING 으로 남은 작업은 리스 시간이 지나면 다시 대기 상태로 돌립니다.
+    하위 클래스는 PENDING/RUNNING/FAILED 를 포함한 Status 와 아래 설정 이름을 지정합니다.
+    """
+
+    # 리스 시간(초), 최대 시도 횟수, 재시도 기본 간격(초)의 설정 이름
+    LEASE_TIMEOUT_SETTING = ""
+    MAX_ATTEMPTS_SETTING = ""
+    RETRY_DELAY_SETTING = ""
+
+    # 리스가 지나 실패로 끝낼 때 남기는 오류 (get_error_fields 의 인자)
+    LEASE_EXPIRED_ERROR = ("처리 중에 워커가 종료되었습니다.",)
+
+    status = models.CharField("처리상태", default="PENDING", max_length=9)
+    attempts = models.PositiveIntegerField("처리 시도 횟수", default=0)
+    available_at = models.DateTimeField("처리 가능 시각", default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @staticmethod
+    def get_error_fields(*error) -> dict:
+        """오류 인자를 저장할 필드 값으로 바꿉니다."""
+        raise NotImplementedError
+
+    @classmethod
+    def get_run_queryset(cls) -> models.QuerySet:
+        """선점한 작업을 처리할 때 쓰는 쿼리셋"""
+        return cls.objects.all()
+
+    @classmethod
+    def claim_next(cls, batch_size=10):
+        """
+        처리할 작업 하나를 선점합니다. 없으면 None 을 반환합니다.
+
+        행 잠금 대신 상태 조건부 UPDATE 로 선점하므로 여러 워커가 동시에 호출해도
+        하나의 작업은 하나의 워커만 가져갑니다. 리스가 지난 작업은 워커 루프가 주기적으로
+        requeue_stale() 을 호출해 다시 대기시킵니다.
+        """
+        now = timezone.now()
+        candidate_pk_list = (
+            cls.objects.filter(status=cls.Status.PENDING, available_at__lte=now)
+            .order_by("available_at", "pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+
+        for pk in candidate_pk_list:
+            claimed = cls.objects.filter(pk=pk, status=cls.Status.PENDING).update(
+                status=cls.Status.RUNNING, attempts=F("attempts") + 1, updated_at=now
+            )
+            if claimed:
+                return cls.get_run_queryset().get(pk=pk)
+        return None
+
+    @classmethod
+    def requeue_stale(cls) -> int:
+        """
+        워커가 처리 중에 종료되어 RUNNING 으로 남은 작업을 다시 대기 상태로 돌립니다.
+
+        리스 시간보다 오래 갱신되지 않은 작업이 대상이며, 시도 횟수를 다 쓴 작업은 실패로
+        끝냅니다. 돌려놓은 작업 수를 반환합니다.
+        """
+        now = timezone.now()
+        lease_timeout = getattr(settings, cls.LEASE_TIMEOUT_SETTING)
+        stale_qs = cls.objects.filter(
+            status=cls.Status.RUNNING,
+            updated_at__lt=now - timedelta(seconds=lease_timeout),
+        )
+        max_attempts = getattr(settings, cls.MAX_ATTEMPTS_SETTING)
+        error_fields = cls.get_error_fields(*cls.LEASE_EXPIRED_ERROR)
+        for job in cls.get_run_queryset().filter(
+            pk__in=stale_qs.filter(attempts__gte=max_attempts).values("pk")
+        ):
+            failed = cls.objects.filter(pk=job.pk, status=cls.Status.RUNNING).update(
+                status=cls.Status.FAILED, **error_fields, updated_at=now
+            )
+            if failed:
+                job.on_lease_expired()
+        return cls._requeue(stale_qs, now)
+
+    @classmethod
+    def _requeue(cls, stale_qs: models.QuerySet, now) -> int:
+        return stale_qs.update(
+            status=cls.Status.PENDING, available_at=now, updated_at=now
+        )
+
+    def on_lease_expired(self):
+        """리스가 지나 실패로 끝낸 작업의 후처리"""
+
+    def finish(self, status, *error):
+        error_fields = self.get_error_fields(*error)
+        self.status = status
+        for name, value in error_fields.items():
+            setattr(self, name, value)
+        self.save(update_fields=["status", *error_fields, "updated_at"])
+
+    def retry_or_fail(self, *error):
+        """시도 횟수가 남았으면 지수 백오프로 다시 대기시키고, 아니면 실패로 끝냅니다."""
+        if self.attempts >= getattr(settings, self.MAX_ATTEMPTS_SETTING):
+            self.finish(self.Status.FAILED, *error)
+            return
+
+        retry_delay = getattr(settings, self.RETRY_DELAY_SETTING)
+        delay = retry_delay * (2 ** (self.attempts - 1))
+        error_fields = self.get_error_fields(*error)
+        self.status = self.Status.PENDING
+        for name, value in error_fields.items():
+            setattr(self, name, value)
+        self.available_at = timezone.now() + timedelta(seconds=delay)
+        self.save(update_fields=["status", *error_fields, "available_at", "updated_at"])
+
+    class Meta:
+        abstract = True
+
+
+class PaymentVerificationJob(AbstractQueueJob):
+    """포트원 웹훅으로 받은 결제 검증 작업 큐 (process_payment_jobs 명령으로 처리합니다.)"""
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "대기"
+        RUNNING = "RUNNING", "처리 중"
+        DONE = "DONE", "완료"
+        FAILED = "FAILED", "실패"
+
+    LEASE_TIMEOUT_SETTING = "PAYMENT_JOB_LEASE_TIMEOUT"
+    MAX_ATTEMPTS_SETTING = "PAYMENT_JOB_MAX_ATTEMPTS"
+    RETRY_DELAY_SETTING = "PAYMENT_JOB_RETRY_DELAY"
+
+    merchant_uid = models.UUIDField("쇼핑몰 결제식별자")
+    status = models.CharField(
+        "처리상태", choices=Status.choices, default=Status.PENDING, max_length=7
+    )
+    notified_count = models.PositiveIntegerField("웹훅 수신 횟수", default=1)
+    last_error = models.TextField("마지막 오류", blank=True)
+
+    def __str__(self):
+        return f"<{self.pk}> {self.merchant_uid} ({self.status})"
+
+    @classmethod
+    def enqueue(cls, merchant_uid) -> bool:
+        """
+        결제 검증 작업을 등록합니다.
+
+        같은 결제건의 대기 중인 작업이 있으면 새로 등록하지 않고 수신 횟수만 올립니다.
+        새로 등록했으면 True 를 반환합니다.
+        """
+        if cls._bump_pending(merchant_uid):
+            return False
+        try:
+            with transaction.atomic():
+                cls.objects.create(merchant_uid=merchant_uid)
+        except IntegrityError:
+            # 동시에 들어온 웹훅이 먼저 등록한 경우
+            cls._bump_pending(merchant_uid)
+            return False
+        return True
+
+    @classmethod
+    def _bump_pending(cls, merchant_uid) -> int:
+        return cls.objects.filter(
+            merchant_uid=merchant_uid, status=cls.Status.PENDING
+        ).update(notified_count=F("notified_count") + 1, updated_at=timezone.now())
+
+    @staticmethod
+    def get_error_fields(error="") -> dict:
+        return {"last_error": error}
+
+    @classmethod
+    def _requeue(cls, stale_qs: models.QuerySet, now) -> int:
+        # 결제 검증은 다시 실행해도 안전합니다.
+        requeued_count = 0
+        for pk in stale_qs.values_list("pk", flat=True):
+            try:
+                with transaction.atomic():
+                    requeued_count += stale_qs.filter(pk=pk).update(
+                        status=cls.Status.PENDING, available_at=now, updated_at=now
+                    )
+            except IntegrityError:
+                # 같은 결제건의 새 웹훅이 대기 중이면 그 작업이 다시 검증합니다.
+                stale_qs.filter(pk=pk).update(status=cls.Status.DONE, updated_at=now)
+        return requeued_count
+
+    def run(self):
+        """결제를 검증하고 주문 상태를 갱신합니다."""
+        try:
+            payment = OrderPayment.objects.select_related("order").get(
+                uid=self.merchant_uid
+            )
+        except OrderPayment.DoesNotExist:
+            self.finish(self.Status.FAILED, "결제 내역이 없습니다.")
+            return
+
+        # 작업은 웹훅을 받은 웹 프로세스와 다른 프로세스에서 실행되므로, 캐시가 공유되지 않으면
+        # 웹훅이 지운 결제 내역이 이 프로세스에는 남아 있습니다. 웹훅은 결제 상태가 바뀌었다는
+        # 뜻이므로 캐시를 거치지 않고 다시 조회합니다.
+        portone_cache.invalidate_payment(self.merchant_uid)
+        try:
+            payment.portone_check()
+        except Http404 as e:
+            self.retry_or_fail(str(e))
+            return
+
+        self.finish(self.Status.DONE)
+
+    def retry_or_fail(self, error):
+        try:
+            with transaction.atomic():
+                super().retry_or_fail(error)
+        except IntegrityError:
+            # 그 사이 같은 결제건의 새 웹훅이 대기 중이면 그 작업이 다시 검증합니다.
+            self.finish(self.Status.DONE, error)
+
+    @classmethod
+    def queue_stats(cls) -> dict:
+        """상태별 작업 수와 가장 오래 대기 중인 작업의 대기 시간(초)을 반환합니다."""
+        stats = {status: 0 for status in cls.Status.values}
+        for row in cls.objects.values("status").annotate(count=Count("pk")):
+            stats[row["status"]] = row["count"]
+
+        oldest = (
+            cls.objects.filter(status=cls.Status.PENDING)
+            .order_by("created_at")
+            .values_list("created_at", flat=True)
+            .first()
+        )
+        stats["oldest_pending_seconds"] = (
+            (timezone.now() - oldest).total_seconds() if oldest else 0
+        )
+        return stats
+
+    class Meta:
+        verbose_name = verbose_name_plural = "결제 검증 작업"
+        constraints = [
+            # 같은 결제건의 대기 중인 작업은 하나만 둡니다. (중복 웹훅 병합)
+            UniqueConstraint(
+                fields=["merchant_uid"],
+                condition=Q(status="PENDING"),
+                name="unique_pending_payment_job",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+
+class PortOneWebhookEvent(models.Model):
+    """
+    포트원 웹훅 수신 기록.
+
+    포트원은 응답이 늦거나 실패하면 같은 웹훅을 다시 보내므로, 이벤트 식별자의 unique 인덱스로
+    중복 수신을 걸러냅니다. 수신한 본문은 수정하지 않고 보관하며 replay_webhook_events 명령으로
+    다시 처리할 수 있습니다.
+    """
+
+    event_id = models.CharField(
+        "이벤트 식별자",
+        max_length=100,
+        unique=True,
+        help_text="webhook-id 헤더. 없으면 본문의 sha256 입니다.",
+    )
+    event_type = models.CharField("이벤트 종류", max_length=50, blank=True)
+    merchant_uid = models.UUIDField("쇼핑몰 결제식별자", db_index=True)
+    payload = models.JSONField("본문")
+    received_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"<{self.pk}> {self.event_type} {self.merchant_uid}"
+
+    @classmethod
+    def ingest(cls, event: "PortOneWebhookEvent") -> bool:
+        """
+        처음 받은 이벤트면 저장하고 결제 검증 작업을 등록한 뒤 True 를 반환합니다.
+
+        이미 받은 이벤트는 인덱스 조회 한 번으로 확인하고 다시 검증하지 않습니다.
+        저장과 작업 등록은 한 트랜잭션으로 처리하므로, 실패하면 포트원의 재전송으로 다시 처리합니다.
+        """
+        if cls.objects.filter(event_id=event.event_id).exists():
+            return False
+        # 캐시해둔 포트원 결제 내역이 이벤트가 알려준 상태와 다르면 다시 조회하도록 지웁니다.
+        portone_cache.invalidate_stale_payment(event.merchant_uid, event.event_type)
+        try:
+            with transaction.atomic():
+                event.save(force_insert=True)
+                PaymentVerificationJob.enqueue(event.merchant_uid)
+        except IntegrityError:
+            # 동시에 들어온 재전송이 먼저 저장한 경우
+            return False
+        return True
+
+    class Meta:
+        verbose_name = verbose_name_plural = "포트원 웹훅 이벤트"
+
+
+class CancellationBatch(models.Model):
+    """
+    관리자가 한 번에 요청한 결제 취소 묶음.
+
+    결제건별 취소(PaymentCancellation)는 process_cancellations 명령의 워커가 포트원 호출 수를
+    제한하며 동시에 처리하고, 처리할 때마다 성공/실패 건수를 올립니다.
+    """
+
+    reason = models.CharField("취소 사유", max_length=200)
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        related_name="+",
+        verbose_name="요청자",
+    )
+    total_count = models.PositiveIntegerField("전체 건수", default=0)
+    succeeded_count = models.PositiveIntegerField("성공 건수", default=0)
+    failed_count = models.PositiveIntegerField("실패 건수", default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField("완료 시각", null=True, blank=True)
+
+    def __str__(self):
+        return f"<{self.pk}> {self.reason} ({self.progress})"
+
+    @property
+    def progress(self) -> str:
+        return f"{self.succeeded_count + self.failed_count}/{self.total_count}"
+
+    @classmethod
+    def enqueue(
+        cls, payment_amount_list, reason, requested_by=None
+    ) -> "CancellationBatch":
+        """
+        (결제 pk, 취소 금액) 목록으로 취소 묶음을 등록합니다. 취소 금액이 None 이면 남은 금액 전체입니다.
+
+        이미 취소 대기/처리 중인 결제건은 건너뛰므로 같은 결제를 두 번 취소하지 않습니다.
+        """
+        with transaction.atomic():
+            batch = cls.objects.create(reason=reason, requested_by=requested_by)
+            PaymentCancellation.objects.bulk_create(
+                [
+                    PaymentCancellation(
+                        batch=batch, payment_id=payment_pk, amount=amount
+                    )
+                    for payment_pk, amount in payment_amount_list
+                ],
+                batch_size=500,
+                ignore_conflicts=True,
+            )
+            batch.total_count = batch.cancellations.count()
+            if not batch.total_count:
+                batch.finished_at = timezone.now()
+            batch.save(update_fields=["total_count", "finished_at", "updated_at"])
+        return batch
+
+    @classmethod
+    def enqueue_orders(
+        cls, order_qs: models.QuerySet, reason, requested_by=None
+    ) -> "CancellationBatch":
+        """주문들의 결제 완료(부분취소 포함)된 결제건을 전액 취소하도록 등록합니다."""
+        payment_pk_list = OrderPayment.objects.filter(
+            order__in=order_qs.values("pk"),
+            pay_status__in=[
+                OrderPayment.PayStatus.PAID,
+                OrderPayment.PayStatus.PARTIAL_CANCELLED,
+            ],
+        ).values_list("pk", flat=True)
+        return cls.enqueue(
+            [(payment_pk, None) for payment_pk in payment_pk_list],
+            reason,
+            requested_by,
+        )
+
+    def record_result(self, succeeded: bool):
+        """처리 결과 건수를 올리고, 모두 처리했으면 완료 시각을 기록합니다."""
+        field = "succeeded_count" if succeeded else "failed_count"
+        now = timezone.now()
+        qs = CancellationBatch.objects.filter(pk=self.pk)
+        qs.update(**{field: F(field) + 1}, updated_at=now)
+        qs.filter(
+            finished_at=None,
+            total_count__lte=F("succeeded_count") + F("failed_count"),
+        ).update(finished_at=now)
+
+    class Meta:
+        verbose_name = verbose_name_plural = "결제 취소 묶음"
+
+
+class PaymentCancellation(AbstractQueueJob):
+    """
+    결제건별 취소 작업 (process_cancellations 명령으로 처리합니다.)
+
+    리스가 지나 다시 처리할 때는 run() 이 포트원 결제 내역으로 이미 취소되었는지 먼저 확인하므로
+    두 번 취소하지 않습니다.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "대기"
+        RUNNING = "RUNNING", "처리 중"
+        SUCCEEDED = "SUCCEEDED", "성공"
+        FAILED = "FAILED", "실패"
+
+    LEASE_TIMEOUT_SETTING = "PAYMENT_CANCEL_LEASE_TIMEOUT"
+    MAX_ATTEMPTS_SETTING = "PAYMENT_CANCEL_MAX_ATTEMPTS"
+    RETRY_DELAY_SETTING = "PAYMENT_CANCEL_RETRY_DELAY"
+    LEASE_EXPIRED_ERROR = ("LEASE_EXPIRED", "처리 중에 워커가 종료되었습니다.")
+
+    batch = models.ForeignKey(
+        CancellationBatch, on_delete=models.CASCADE, related_name="cancellations"
+    )
+    payment = models.ForeignKey(
+        OrderPayment, on_delete=models.CASCADE, db_constraint=False
+    )
+    amount = models.PositiveIntegerField(
+        "취소 금액", null=True, blank=True, help_text="비어 있으면 남은 금액 전체"
+    )
+    cancelled_amount_before = models.PositiveIntegerField(
+        "취소 전 취소금액", null=True, blank=True, editable=False
+    )
+    status = models.CharField(
+        "처리상태", choices=Status.choices, default=Status.PENDING, max_length=9
+    )
+    error_code = models.CharField("오류 코드", max_length=50, blank=True)
+    error_message = models.TextField("오류 내용", blank=True)
+
+    def __str__(self):
+        return f"<{self.pk}> {self.payment_id} ({self.status})"
+
+    @staticmethod
+    def get_error_fields(error_code="", error_message="") -> dict:
+        return {"error_code": error_code, "error_message": error_message}
+
+    @classmethod
+    def get_run_queryset(cls) -> models.QuerySet:
+        return cls.objects.select_related("batch", "payment__order")
+
+    def on_lease_expired(self):
+        self.batch.record_result(False)
+
+    def get_target_cancelled_amount(self) -> int:
+        """이 취소가 끝났을 때의 결제건 취소금액"""
+        if self.amount is None:
+            return self.payment.desired_amount
+        return self.cancelled_amount_before + self.amount
+
+    def run(self):
+        """결제를 취소하고 결과를 포트원 오류 코드와 함께 기록합니다."""
+        payment = self.payment
+        try:
+            if self.cancelled_amount_before is not None:
+                # 포트원 취소 요청은 재시도해도 안전하지 않으므로(응답만 받지 못했거나 워커가
+                # 종료되었을 수 있음), 다시 요청하기 전에 포트원 결제 내역으로 이미 취소되었는지
+                # 확인합니다.
+                portone_cache.invalidate_payment(payment.merchant_uid)
+                payment.portone_check()
+                if payment.cancelled_amount >= self.get_target_cancelled_amount():
+                    self.finish(self.Status.SUCCEEDED)
+                    return
+            else:
+                self.cancelled_amount_before = payment.cancelled_amount
+                self.save(update_fields=["cancelled_amount_before", "updated_at"])
+
+            payment.cancel(self.batch.reason, amount=self.amount)
+        except PaymentCancelError as e:
+            error_code = e.code or str(e.status_code)
+            if e.is_retryable:
+                self.retry_or_fail(error_code, str(e))
+            else:
+                self.finish(self.Status.FAILED, error_code, str(e))
+        except (PortOneError, Http404) as e:
+            self.retry_or_fail("PORTONE_ERROR", str(e))
+        except ValueError as e:
+            self.finish(self.Status.FAILED, "NOT_CANCELLABLE", str(e))
+        else:
+            self.finish(self.Status.SUCCEEDED)
+
+    def finish(self, status, error_code="", error_message=""):
+        super().finish(status, error_code, error_message)
+        self.batch.record_result(status == self.Status.SUCCEEDED)
+
+    class Meta:
+        verbose_name = verbose_name_plural = "결제 취소 작업"
+        constraints = [
+            # 같은 결제건의 취소는 한 번에 하나만 처리합니다.
+            UniqueConstraint(
+                fields=["payment"],
+                condition=Q(status__in=["PENDING", "RUNNING"]),
+                name="unique_active_payment_cancellation",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
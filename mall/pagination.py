@@ -0,0 +1,193 @@
+"""
+커서(keyset) 페이지네이션.
+
+OFFSET 페이지네이션은 뒤 페이지로 갈수록 건너뛸 행을 모두 읽어야 하고, 페이지마다 전체
+개수(COUNT)를 조회합니다. 커서 페이지네이션은 마지막으로 본 pk 이후의 행만 인덱스로 읽으므로
+페이지 깊이와 관계없이 일정한 시간이 걸리고, 전체 개수를 조회하지 않습니다.
+"""
+
+import base64
+import binascii
+import json
+from typing import Callable, List, Optional
+
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+CURSOR_VAR = "cursor"
+
+# PostgreSQL 실행 계획의 예상 행 수가 이보다 적으면 정확한 개수를 조회합니다.
+ESTIMATED_COUNT_THRESHOLD = 10_000
+
+
+def estimate_count(qs: QuerySet) -> int:
+    """PostgreSQL 에서는 실행 계획의 예상 행 수를, 그 외 데이터베이스에서는 정확한 개수를 반환합니다."""
+    if connections[qs.db].vendor != "postgresql":
+        return qs.count()
+
+    plan = json.loads(qs.order_by().explain(format="json"))
+    estimated = int(plan[0]["Plan"]["Plan Rows"])
+    if estimated < ESTIMATED_COUNT_THRESHOLD:
+        return qs.count()
+    return estimated
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return estimate_count(self.object_list)
+
+
+class CursorPage:
+    is_cursor = True
+
+    def __init__(
+        self,
+        object_list: QuerySet,
+        next_cursor: Optional[str],
+        previous_cursor: Optional[str],
+    ):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.next_url = None
+        self.previous_url = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def set_urls(self, get_url: Callable[[str], str]):
+        if self.has_next():
+            self.next_url = get_url(self.next_cursor)
+        if self.has_previous():
+            self.previous_url = get_url(self.previous_cursor)
+
+
+class CursorPaginator:
+    """pk 순서로 정렬된 쿼리셋을 커서로 페이지네이션합니다."""
+
+    def __init__(self, object_list: QuerySet, per_page: int, ordering: str = "-pk"):
+        if ordering not in ("pk", "-pk"):
+            raise ValueError("CursorPaginator 는 pk 정렬만 지원합니다.")
+        self.object_list = object_list
+        self.per_page = per_page
+        self.descending = ordering == "-pk"
+
+    @staticmethod
+    def encode_cursor(direction: str, pk) -> str:
+        raw = json.dumps([direction, pk]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str]):
+        """잘못된 커서는 첫 페이지로 처리합니다."""
+        if not cursor:
+            return None, None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            direction, pk = json.loads(raw)
+        except (binascii.Error, ValueError, TypeError):
+            return None, None
+        if direction not in ("next", "previous") or not isinstance(pk, int):
+            return None, None
+        return direction, pk
+
+    def get_page(self, cursor: Optional[str] = None) -> CursorPage:
+        direction, pk = self.decode_cursor(cursor)
+
+        # 이전 페이지는 반대 방향으로 읽은 뒤 뒤집습니다.
+        forward = direction != "previous"
+        qs = self.object_list
+        if pk is not None:
+            if forward == self.descending:
+                qs = qs.filter(pk__lt=pk)
+            else:
+                qs = qs.filter(pk__gt=pk)
+        read_ordering = "-pk" if forward == self.descending else "pk"
+
+        # 다음 페이지가 있는지 알기 위해 한 행을 더 읽습니다. pk 만 읽으므로 인덱스만 사용합니다.
+        pk_list: List = list(
+            qs.order_by(read_ordering).values_list("pk", flat=True)[: self.per_page + 1]
+        )
+        has_more = len(pk_list) > self.per_page
+        pk_list = pk_list[: self.per_page]
+        if not forward:
+            pk_list.reverse()
+
+        next_cursor = previous_cursor = None
+        if pk_list:
+            if (forward and has_more) or (not forward and pk is not None):
+                next_cursor = self.encode_cursor("next", pk_list[-1])
+            if (not forward and has_more) or (forward and pk is not None):
+                previous_cursor = self.encode_cursor("previous", pk_list[0])
+
+        ordering = "-pk" if self.descending else "pk"
+        object_list = self.object_list.filter(pk__in=pk_list).order_by(ordering)
+        return CursorPage(object_list, next_cursor, previous_cursor)
+
+
+def paginate_by_cursor(request, qs: QuerySet, per_page: int) -> CursorPage:
+    """요청의 커서로 페이지를 만들고, 다른 쿼리 파라미터를 유지하는 이전/다음 URL 을 채웁니다."""
+    page = CursorPaginator(qs, per_page).get_page(request.GET.get(CURSOR_VAR))
+
+    def get_url(cursor):
+        query_dict = request.GET.copy()
+        query_dict[CURSOR_VAR] = cursor
+        query_dict.pop("page", None)
+        return f"?{query_dict.urlencode()}"
+
+    page.set_urls(get_url)
+    return page
+
+
+class CursorChangeList(ChangeList):
+    """
+    관리자 목록을 기본 정렬(pk)일 때 커서로 페이지네이션합니다.
+
+    다른 컬럼으로 정렬하면 기존 페이지 번호 방식(예상 개수 사용)으로 동작합니다.
+    """
+
+    cursor_page = None
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # 필터/정렬을 바꾸면 첫 페이지부터 보여줍니다.
+        new_params = {CURSOR_VAR: None, **(new_params or {})}
+        return super().get_query_string(new_params, remove)
+
+    def get_results(self, request):
+        if ORDER_VAR in self.params or self.show_all:
+            return super().get_results(request)
+
+        page = CursorPaginator(self.queryset, self.list_per_page).get_page(
+            request.GET.get(CURSOR_VAR)
+        )
+        page.set_urls(lambda cursor: self.get_query_string({CURSOR_VAR: cursor}))
+
+        self.cursor_page = page
+        self.result_count = estimate_count(self.queryset)
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = page.object_list
+        self.can_show_all = False
+        self.multi_page = page.has_other_pages()
+        self.paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
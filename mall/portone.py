@@ -0,0 +1,366 @@
+"""
+포트원(PortOne) V2 REST API 클라이언트.
+
+모든 결제 모델(mall.OrderPayment, mall_test.Payment)이 하나의 커넥션 풀을 공유하도록
+프로세스 단위의 클라이언트를 제공합니다. 매 요청마다 TCP/TLS 핸드셰이크를 하지 않도록
+keep-alive 세션을 재사용하고, 타임아웃과 재시도(지터가 포함된 지수 백오프)를 적용합니다.
+
+비동기 뷰에서는 이벤트 루프마다 하나씩 만들어지는 AsyncPortOneClient 를 사용합니다.
+"""
+
+import asyncio
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+import weakref
+from typing import Optional
+
+import httpx
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+
+from mall.profiling import record_portone_call
+
+logger = logging.getLogger("portone")
+
+# 재시도 대상 응답 코드 (요청 제한 및 일시적인 서버 오류)
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class PortOneError(Exception):
+    """포트원 API 호출에 실패했을 때 발생합니다."""
+
+    def __init__(self, message, status_code=None, response_data=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response_data = response_data or {}
+
+
+class BasePortOneClient:
+    def __init__(
+        self,
+        api_secret: str,
+        base_url: str = "https://api.portone.io",
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        max_retries: int = 2,
+        backoff_factor: float = 0.2,
+        backoff_max: float = 2.0,
+    ):
+        self.api_secret = api_secret
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+
+    @classmethod
+    def get_settings_kwargs(cls) -> dict:
+        return {
+            "api_secret": settings.PORTONE_API_SECRET,
+            "base_url": settings.PORTONE_API_BASE_URL,
+            "connect_timeout": settings.PORTONE_CONNECT_TIMEOUT,
+            "read_timeout": settings.PORTONE_READ_TIMEOUT,
+            "max_retries": settings.PORTONE_MAX_RETRIES,
+            "backoff_factor": settings.PORTONE_BACKOFF_FACTOR,
+            "backoff_max": settings.PORTONE_BACKOFF_MAX,
+        }
+
+    def get_backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """full jitter 방식의 대기 시간을 계산합니다. Retry-After 헤더가 있으면 우선합니다."""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        ceiling = min(self.backoff_max, self.backoff_factor * (2**attempt))
+        return random.uniform(0, ceiling)
+
+    def can_retry_response(self, status_code: int, idempotent: bool) -> bool:
+        return status_code == 429 or (idempotent and status_code in RETRY_STATUS_CODES)
+
+    @staticmethod
+    def get_retry_after(headers) -> Optional[float]:
+        try:
+            return float(headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def parse_payment_response(status_code: int, get_json) -> dict:
+        try:
+            data = get_json()
+        except ValueError:
+            data = {}
+        if status_code != 200:
+            raise PortOneError(
+                f"결제 조회 실패: {data.get('message', status_code)}",
+                status_code=status_code,
+                response_data=data,
+            )
+        return data
+
+    @staticmethod
+    def get_cancel_payload(
+        reason: str,
+        amount: Optional[int] = None,
+        current_cancellable_amount: Optional[int] = None,
+    ) -> dict:
+        payload = {"reason": reason}
+        if amount is not None:
+            payload["amount"] = amount
+        if current_cancellable_amount is not None:
+            # 포트원이 알고 있는 취소 가능 잔액과 다르면 취소하지 않습니다. (중복 취소 방지)
+            payload["currentCancellableAmount"] = current_cancellable_amount
+        return payload
+
+
+class PortOneClient(BasePortOneClient):
+    def __init__(self, api_secret: str, pool_connections=4, pool_maxsize=10, **kwargs):
+        super().__init__(api_secret, **kwargs)
+
+        # 재시도는 직접 처리하므로 어댑터의 재시도는 끕니다.
+        # pool_block=True : 호스트당 커넥션 수를 pool_maxsize 로 제한합니다.
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+            max_retries=0,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Authorization": f"PortOne {api_secret}"})
+
+    @classmethod
+    def from_settings(cls) -> "PortOneClient":
+        return cls(
+            pool_maxsize=settings.PORTONE_POOL_MAXSIZE, **cls.get_settings_kwargs()
+        )
+
+    def close(self):
+        self.session.close()
+
+    def request(
+        self, method: str, path: str, idempotent: bool = True, **kwargs
+    ) -> requests.Response:
+        """
+        포트원 API를 호출합니다.
+
+        멱등하지 않은 요청(결제 취소 등)은 서버가 요청을 처리하지 않았음이 확실한 경우
+        (연결 실패, 429 응답)에만 재시도합니다.
+        """
+        with record_portone_call():
+            return self._request(method, path, idempotent, **kwargs)
+
+    def _request(
+        self, method: str, path: str, idempotent: bool, **kwargs
+    ) -> requests.Response:
+        url = f"{self.base_url}{path}"
+        timeout = (self.connect_timeout, self.read_timeout)
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except requests.ConnectionError as e:
+                # ConnectTimeout 은 ConnectionError 의 하위 클래스입니다.
+                can_retry = idempotent or isinstance(e, requests.ConnectTimeout)
+                if not can_retry or attempt >= self.max_retries:
+                    raise PortOneError(f"포트원 API 연결 실패: {e}") from e
+                logger.warning(
+                    "포트원 API 연결 실패, 재시도합니다. (%s %s)", method, url
+                )
+            except requests.RequestException as e:
+                if not idempotent or attempt >= self.max_retries:
+                    raise PortOneError(f"포트원 API 요청 실패: {e}") from e
+                logger.warning(
+                    "포트원 API 요청 실패, 재시도합니다. (%s %s)", method, url
+                )
+            else:
+                can_retry = self.can_retry_response(response.status_code, idempotent)
+                if not can_retry or attempt >= self.max_retries:
+                    return response
+                logger.warning(
+                    "포트원 API 응답 %s, 재시도합니다. (%s %s)",
+                    response.status_code,
+                    method,
+                    url,
+                )
+                retry_after = self.get_retry_after(response.headers)
+                response.close()
+
+            time.sleep(self.get_backoff(attempt, retry_after))
+            attempt += 1
+
+    def get_payment(self, payment_id: str) -> dict:
+        """결제 단건을 조회합니다."""
+        response = self.request("GET", f"/payments/{payment_id}")
+        return self.parse_payment_response(response.status_code, response.json)
+
+    def cancel_payment(
+        self,
+        payment_id: str,
+        reason: str,
+        amount: Optional[int] = None,
+        current_cancellable_amount: Optional[int] = None,
+    ) -> requests.Response:
+        """결제를 취소합니다. amount 를 지정하지 않으면 남은 금액을 모두 취소합니다."""
+        return self.request(
+            "POST",
+            f"/payments/{payment_id}/cancel",
+            idempotent=False,
+            json=self.get_cancel_payload(reason, amount, current_cancellable_amount),
+        )
+
+
+class AsyncPortOneClient(BasePortOneClient):
+    # httpcore 의 커넥션 풀은 커넥션/대기 요청이 많아질수록 요청마다 풀 전체를 훑는 비용이
+    # 커집니다. 그래서 작은 풀 여러 개로 나누고, 대기열은 풀 밖의 세마포어로 관리합니다.
+    SHARD_SIZE = 25
+
+    def __init__(self, api_secret: str, max_connections=100, **kwargs):
+        super().__init__(api_secret, **kwargs)
+        shard_count = max(1, math.ceil(max_connections / self.SHARD_SIZE))
+        shard_size = math.ceil(max_connections / shard_count)
+        self.shards = [
+            (
+                httpx.AsyncClient(
+                    base_url=self.base_url,
+                    headers={"Authorization": f"PortOne {api_secret}"},
+                    timeout=httpx.Timeout(
+                        self.read_timeout, connect=self.connect_timeout
+                    ),
+                    limits=httpx.Limits(
+                        max_connections=shard_size,
+                        max_keepalive_connections=shard_size,
+                    ),
+                ),
+                asyncio.Semaphore(shard_size),
+            )
+            for __ in range(shard_count)
+        ]
+        self._shard_counter = itertools.count()
+
+    @classmethod
+    def from_settings(cls) -> "AsyncPortOneClient":
+        return cls(
+            max_connections=settings.PORTONE_ASYNC_MAX_CONNECTIONS,
+            **cls.get_settings_kwargs(),
+        )
+
+    async def aclose(self):
+        for client, __ in self.shards:
+            await client.aclose()
+
+    async def request(
+        self, method: str, path: str, idempotent: bool = True, **kwargs
+    ) -> httpx.Response:
+        """PortOneClient.request 의 비동기 버전입니다."""
+        with record_portone_call():
+            return await self._request(method, path, idempotent, **kwargs)
+
+    async def _request(
+        self, method: str, path: str, idempotent: bool, **kwargs
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            retry_after = None
+            client, semaphore = self.shards[
+                next(self._shard_counter) % len(self.shards)
+            ]
+            try:
+                async with semaphore:
+                    response = await client.request(method, path, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                # 요청이 전송되지 않은 경우이므로 멱등 여부와 관계없이 재시도합니다.
+                if attempt >= self.max_retries:
+                    raise PortOneError(f"포트원 API 연결 실패: {e}") from e
+                logger.warning(
+                    "포트원 API 연결 실패, 재시도합니다. (%s %s)", method, path
+                )
+            except httpx.HTTPError as e:
+                if not idempotent or attempt >= self.max_retries:
+                    raise PortOneError(f"포트원 API 요청 실패: {e}") from e
+                logger.warning(
+                    "포트원 API 요청 실패, 재시도합니다. (%s %s)", method, path
+                )
+            else:
+                can_retry = self.can_retry_response(response.status_code, idempotent)
+                if not can_retry or attempt >= self.max_retries:
+                    return response
+                logger.warning(
+                    "포트원 API 응답 %s, 재시도합니다. (%s %s)",
+                    response.status_code,
+                    method,
+                    path,
+                )
+                retry_after = self.get_retry_after(response.headers)
+
+            await asyncio.sleep(self.get_backoff(attempt, retry_after))
+            attempt += 1
+
+    async def get_payment(self, payment_id: str) -> dict:
+        """결제 단건을 조회합니다."""
+        response = await self.request("GET", f"/payments/{payment_id}")
+        return self.parse_payment_response(response.status_code, response.json)
+
+    async def cancel_payment(
+        self,
+        payment_id: str,
+        reason: str,
+        amount: Optional[int] = None,
+        current_cancellable_amount: Optional[int] = None,
+    ) -> httpx.Response:
+        """결제를 취소합니다. amount 를 지정하지 않으면 남은 금액을 모두 취소합니다."""
+        return await self.request(
+            "POST",
+            f"/payments/{payment_id}/cancel",
+            idempotent=False,
+            json=self.get_cancel_payload(reason, amount, current_cancellable_amount),
+        )
+
+
+_client = None
+_client_lock = threading.Lock()
+
+# httpx.AsyncClient 는 생성된 이벤트 루프에서만 사용할 수 있으므로 루프마다 만듭니다.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client() -> PortOneClient:
+    """프로세스에서 공유하는 포트원 클라이언트를 반환합니다."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PortOneClient.from_settings()
+    return _client
+
+
+def get_async_client() -> AsyncPortOneClient:
+    """현재 이벤트 루프에서 공유하는 비동기 포트원 클라이언트를 반환합니다."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncPortOneClient.from_settings()
+    return client
+
+
+def reset_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _async_clients.clear()
+
+
+@receiver(setting_changed)
+def reset_client_on_setting_changed(sender, setting, **kwargs):
+    if setting.startswith("PORTONE_"):
+        reset_client()
@@ -0,0 +1,171 @@
+"""
+포트원 결제 조회 캐시.
+
+결제 한 건을 확인하는 동안 결제 완료 리다이렉트(order_check), 웹훅, 새로고침이 몇 초 안에
+같은 결제건을 여러 번 조회하므로, 포트원 응답을 짧은 시간 캐시하고(read-through) 같은
+결제건을 동시에 조회하면 한 번만 호출해 결과를 나눠 씁니다(single-flight).
+
+- 캐시 만료 시간은 결제 상태에 따라 다릅니다. 완료 상태(PAID/CANCELLED 등)는 바뀔 일이
+  적으므로 더 오래 캐시하고, 상태가 바뀌었다는 웹훅을 받거나 결제를 취소하면 지웁니다.
+- 동시 조회 병합은 프로세스 안에서만 동작합니다. 다른 프로세스와는 장고 캐시를 공유합니다.
+- 적중/실패/병합 횟수는 프로세스별로 세며 get_cache_stats() 로 확인합니다.
+"""
+
+import asyncio
+import threading
+import weakref
+from collections import Counter
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import cache
+
+from mall.portone import get_async_client, get_client
+
+CACHE_KEY_PREFIX = "portone:payment:"
+
+# 웹훅 이벤트 종류별로 결제가 바뀌었을 상태
+WEBHOOK_STATUS_DICT = {
+    "Transaction.Ready": "READY",
+    "Transaction.Paid": "PAID",
+    "Transaction.VirtualAccountIssued": "VIRTUAL_ACCOUNT_ISSUED",
+    "Transaction.PartialCancelled": "PARTIAL_CANCELLED",
+    "Transaction.Cancelled": "CANCELLED",
+    "Transaction.Failed": "FAILED",
+    "Transaction.PayPending": "PAY_PENDING",
+}
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# asyncio.Future 는 만들어진 이벤트 루프에서만 기다릴 수 있으므로 루프마다 따로 둡니다.
+_async_inflight = weakref.WeakKeyDictionary()
+
+
+def get_cache_key(payment_id) -> str:
+    return f"{CACHE_KEY_PREFIX}{payment_id}"
+
+
+def get_cache_timeout(meta: dict) -> float:
+    if meta.get("status") in settings.PORTONE_PAYMENT_CACHE_FINAL_STATUSES:
+        return settings.PORTONE_PAYMENT_CACHE_FINAL_TTL
+    return settings.PORTONE_PAYMENT_CACHE_TTL
+
+
+def incr_stat(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_cache_stats() -> dict:
+    """이 프로세스의 결제 조회 캐시 적중(hits)/실패(misses)/병합(coalesced) 횟수"""
+    with _stats_lock:
+        stats = {name: _stats[name] for name in ("hits", "misses", "coalesced")}
+    lookups = sum(stats.values())
+    stats["hit_ratio"] = (
+        (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+    )
+    return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def store_payment(payment_id, meta: dict):
+    timeout = get_cache_timeout(meta)
+    if timeout > 0:
+        cache.set(get_cache_key(payment_id), meta, timeout=timeout)
+
+
+def invalidate_payment(payment_id):
+    cache.delete(get_cache_key(payment_id))
+
+
+def invalidate_stale_payment(payment_id, event_type: str):
+    """웹훅 이벤트가 알려준 상태와 다른 캐시는 지웁니다. (알 수 없는 이벤트면 항상 지웁니다.)"""
+    cached = cache.get(get_cache_key(payment_id))
+    if cached is None:
+        return
+    if cached.get("status") != WEBHOOK_STATUS_DICT.get(event_type):
+        invalidate_payment(payment_id)
+
+
+def get_payment(payment_id) -> dict:
+    """캐시를 거쳐 포트원 결제 단건을 조회합니다. 조회에 실패하면 PortOneError 가 발생합니다."""
+    payment_id = str(payment_id)
+    key = get_cache_key(payment_id)
+    meta = cache.get(key)
+    if meta is not None:
+        incr_stat("hits")
+        return meta
+
+    with _inflight_lock:
+        future = _inflight.get(payment_id)
+        is_leader = future is None
+        if is_leader:
+            future = _inflight[payment_id] = Future()
+    if not is_leader:
+        incr_stat("coalesced")
+        return future.result()
+
+    try:
+        # 캐시를 확인한 뒤 앞선 조회가 끝났을 수 있습니다.
+        meta = cache.get(key)
+        if meta is not None:
+            incr_stat("hits")
+        else:
+            incr_stat("misses")
+            meta = get_client().get_payment(payment_id)
+            store_payment(payment_id, meta)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(meta)
+        return meta
+    finally:
+        with _inflight_lock:
+            del _inflight[payment_id]
+
+
+async def aget_payment(payment_id) -> dict:
+    """get_payment 의 비동기 버전입니다."""
+    payment_id = str(payment_id)
+    key = get_cache_key(payment_id)
+    meta = await cache.aget(key)
+    if meta is not None:
+        incr_stat("hits")
+        return meta
+
+    inflight = _async_inflight.setdefault(asyncio.get_running_loop(), {})
+    future = inflight.get(payment_id)
+    if future is not None:
+        incr_stat("coalesced")
+        # 기다리던 코루틴이 취소되어도 함께 쓰는 조회 결과는 취소되지 않도록 shield 합니다.
+        return await asyncio.shield(future)
+
+    future = inflight[payment_id] = asyncio.get_running_loop().create_future()
+    try:
+        incr_stat("misses")
+        meta = await get_async_client().get_payment(payment_id)
+        timeout = get_cache_timeout(meta)
+        if timeout > 0:
+            await cache.aset(key, meta, timeout=timeout)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # 기다리는 코루틴이 없어도 "확인하지 않은 예외" 경고가 나지 않도록 확인해둡니다.
+        future.exception()
+        raise
+    else:
+        future.set_result(meta)
+        return meta
+    finally:
+        del inflight[payment_id]
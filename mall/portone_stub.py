@@ -0,0 +1,222 @@
+"""
+로컬 개발/벤치마크용 포트원 API 스텁 서버.
+
+실제 포트원 API 대신 PORTONE_API_BASE_URL 로 지정해 사용합니다.
+등록되지 않은 결제건은 default_status / default_amount 로 응답합니다.
+"""
+
+import json
+import multiprocessing
+import random
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAYMENT_PATH_RE = re.compile(r"^/payments/(?P<payment_id>[^/]+)(?P<cancel>/cancel)?$")
+
+
+class PortOneStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive 지원
+    disable_nagle_algorithm = True  # 헤더/본문 분할 전송 시 지연(delayed ACK) 방지
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status_code, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_request(self, method):
+        server: PortOneStubServer = self.server
+        content_length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(content_length) or b"{}")
+        server.request_count += 1
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.error_rate and random.random() < server.error_rate:
+            self.send_json(503, {"type": "SERVICE_UNAVAILABLE", "message": "stub"})
+            return
+
+        match = PAYMENT_PATH_RE.match(self.path)
+        if match is None:
+            self.send_json(404, {"type": "NOT_FOUND", "message": self.path})
+            return
+
+        payment_id = match.group("payment_id")
+        payment = server.get_payment(payment_id)
+
+        if method == "GET" and not match.group("cancel"):
+            self.send_json(200, payment)
+        elif method == "POST" and match.group("cancel"):
+            if payment["status"] == "CANCELLED":
+                self.send_json(
+                    409,
+                    {
+                        "type": "PAYMENT_ALREADY_CANCELLED",
+                        "message": "PaymentAlreadyCancelledError",
+                    },
+                )
+                return
+            cancellable_amount = payment["amount"]["total"] - payment["amount"].get(
+                "cancelled", 0
+            )
+            current_cancellable_amount = payload.get("currentCancellableAmount")
+            if current_cancellable_amount not in (None, cancellable_amount):
+                self.send_json(
+                    409,
+                    {
+                        "type": "CANCELLABLE_AMOUNT_CONSISTENCY_BROKEN",
+                        "message": "CancellableAmountConsistencyBrokenError",
+                    },
+                )
+                return
+            amount = payload.get("amount") or cancellable_amount
+            if amount > cancellable_amount:
+                self.send_json(
+                    409,
+                    {
+                        "type": "CANCEL_AMOUNT_EXCEEDS_CANCELLABLE_AMOUNT",
+                        "message": "CancelAmountExceedsCancellableAmountError",
+                    },
+                )
+                return
+            payment["amount"]["cancelled"] = (
+                payment["amount"].get("cancelled", 0) + amount
+            )
+            if payment["amount"]["cancelled"] >= payment["amount"]["total"]:
+                payment["status"] = "CANCELLED"
+            else:
+                payment["status"] = "PARTIAL_CANCELLED"
+            server.payments[payment_id] = payment
+            self.send_json(
+                200,
+                {
+                    "cancellation": {
+                        "status": "SUCCEEDED",
+                        "totalAmount": amount,
+                        "reason": payload.get("reason", ""),
+                    }
+                },
+            )
+        else:
+            self.send_json(405, {"type": "METHOD_NOT_ALLOWED", "message": method})
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+
+class PortOneStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # 동시 접속이 많은 벤치마크에서 연결이 거부되지 않도록
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        error_rate=0.0,
+        default_status="PAID",
+        default_amount=0,
+        verbose=False,
+    ):
+        super().__init__((host, port), PortOneStubHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.default_status = default_status
+        self.default_amount = default_amount
+        self.verbose = verbose
+        self.payments = {}
+        self.request_count = 0
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def register(self, payment_id, status="PAID", amount=0):
+        self.payments[str(payment_id)] = {
+            "id": str(payment_id),
+            "status": status,
+            "amount": {"total": amount},
+        }
+
+    def get_payment(self, payment_id):
+        payment = self.payments.get(payment_id)
+        if payment is None:
+            payment = {
+                "id": payment_id,
+                "status": self.default_status,
+                "amount": {"total": self.default_amount},
+            }
+        return {**payment, "amount": dict(payment["amount"])}
+
+    def start(self):
+        """백그라운드 스레드에서 서버를 실행합니다."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _serve_stub(port, kwargs):
+    server = PortOneStubServer(port=port, **kwargs)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+@contextmanager
+def run_stub_process(host="127.0.0.1", **kwargs):
+    """
+    스텁 서버를 별도 프로세스에서 실행하고 URL 을 돌려줍니다.
+
+    동시 요청이 많은 벤치마크에서 스텁 서버의 스레드가 측정 대상과 GIL 을 다투지 않게 합니다.
+    """
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        port = sock.getsockname()[1]
+
+    process = multiprocessing.Process(
+        target=_serve_stub, args=(port, {"host": host, **kwargs}), daemon=True
+    )
+    process.start()
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection((host, port), timeout=0.1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        yield f"http://{host}:{port}"
+    finally:
+        process.terminate()
+        process.join()
@@ -0,0 +1,249 @@
+"""
+요청별 SQL / 포트원 호출 프로파일링.
+
+debug_toolbar 는 DEBUG 의 HTML 화면에서만 볼 수 있어 웹훅이나 order_check 같은 리다이렉트는
+확인할 수 없습니다. RequestProfilingMiddleware 는 MALL_PROFILING_SAMPLE_RATE 비율의 요청만
+골라 쿼리 수, DB 시간, 포트원 호출 수/시간, 요청 처리 시간을 URL 이름별로 기록합니다.
+
+- 기록은 구조화된 로그(logger "mall.profiling", extra 필드)로 남기고, URL 이름별 히스토그램을
+  /metrics/ 에서 Prometheus 텍스트 형식으로 내보냅니다.
+- 히스토그램은 프로세스별로 쌓입니다. 여러 프로세스로 실행하면 프로세스마다 수집해야 합니다.
+- 현재 요청은 contextvar 로 찾으므로 비동기 뷰의 sync_to_async 스레드에서 실행한 쿼리도
+  함께 셉니다.
+"""
+
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar(
+    "mall_request_profile", default=None
+)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.portone_count = 0
+        self.portone_time = 0.0
+
+
+class Histogram:
+    def __init__(self, bucket_list: List[float]):
+        self.bucket_list = sorted(bucket_list)
+        # 마지막 칸은 +Inf 입니다.
+        self.count_list = [0] * (len(self.bucket_list) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.count_list[bisect_left(self.bucket_list, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def get_cumulative_counts(self) -> List[Tuple[str, int]]:
+        cumulative_list = []
+        cumulative = 0
+        for bucket, count in zip(self.bucket_list + ["+Inf"], self.count_list):
+            cumulative += count
+            cumulative_list.append((str(bucket), cumulative))
+        return cumulative_list
+
+
+# (이름, 설명, 설정 이름) - 설정 이름은 버킷 목록
+HISTOGRAM_LIST = [
+    (
+        "mall_request_duration_seconds",
+        "요청 처리 시간",
+        "MALL_PROFILING_DURATION_BUCKETS",
+    ),
+    ("mall_request_db_seconds", "요청당 DB 시간", "MALL_PROFILING_DURATION_BUCKETS"),
+    ("mall_request_queries", "요청당 쿼리 수", "MALL_PROFILING_COUNT_BUCKETS"),
+    (
+        "mall_request_portone_seconds",
+        "요청당 포트원 API 호출 시간",
+        "MALL_PROFILING_DURATION_BUCKETS",
+    ),
+    (
+        "mall_request_portone_calls",
+        "요청당 포트원 API 호출 수",
+        "MALL_PROFILING_COUNT_BUCKETS",
+    ),
+]
+
+_histograms: Dict[Tuple[str, str], Histogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started_at = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.query_count += 1
+        profile.db_time += time.perf_counter() - started_at
+
+
+@receiver(connection_created)
+def install_db_execute_wrapper(sender, connection, **kwargs):
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+@contextmanager
+def record_portone_call():
+    """포트원 API 호출 한 번(재시도 포함)의 시간을 현재 요청에 기록합니다."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.portone_count += 1
+        profile.portone_time += time.perf_counter() - started_at
+
+
+def should_sample() -> bool:
+    sample_rate = settings.MALL_PROFILING_SAMPLE_RATE
+    return sample_rate > 0 and (sample_rate >= 1 or random.random() < sample_rate)
+
+
+def get_view_name(request) -> str:
+    # 없는 URL 마다 레이블이 늘어나지 않도록 하나로 묶습니다.
+    resolver_match = getattr(request, "resolver_match", None)
+    if resolver_match is None:
+        return "<unresolved>"
+    return resolver_match.view_name or "<unnamed>"
+
+
+def record_request(request, response, profile: RequestProfile, duration: float):
+    view_name = get_view_name(request)
+    value_dict = {
+        "mall_request_duration_seconds": duration,
+        "mall_request_db_seconds": profile.db_time,
+        "mall_request_queries": profile.query_count,
+        "mall_request_portone_seconds": profile.portone_time,
+        "mall_request_portone_calls": profile.portone_count,
+    }
+    with _histograms_lock:
+        for name, __, bucket_setting in HISTOGRAM_LIST:
+            key = (name, view_name)
+            if key not in _histograms:
+                _histograms[key] = Histogram(getattr(settings, bucket_setting))
+            _histograms[key].observe(value_dict[name])
+
+    logger.info(
+        "요청 프로파일: view=%s status=%s duration_ms=%.1f queries=%d db_ms=%.1f "
+        "portone_calls=%d portone_ms=%.1f",
+        view_name,
+        response.status_code,
+        duration * 1000,
+        profile.query_count,
+        profile.db_time * 1000,
+        profile.portone_count,
+        profile.portone_time * 1000,
+        extra={
+            "view_name": view_name,
+            "method": request.method,
+            "status_code": response.status_code,
+            "duration_ms": round(duration * 1000, 3),
+            "query_count": profile.query_count,
+            "db_ms": round(profile.db_time * 1000, 3),
+            "portone_count": profile.portone_count,
+            "portone_ms": round(profile.portone_time * 1000, 3),
+        },
+    )
+
+
+def reset_histograms():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_histograms() -> List[str]:
+    """Prometheus 텍스트 형식의 URL 이름별 히스토그램"""
+    with _histograms_lock:
+        snapshot = {
+            key: (histogram.get_cumulative_counts(), histogram.sum, histogram.count)
+            for key, histogram in _histograms.items()
+        }
+
+    line_list = []
+    for name, description, __ in HISTOGRAM_LIST:
+        line_list.append(f"# HELP {name} {description}")
+        line_list.append(f"# TYPE {name} histogram")
+        for (metric_name, view_name), (bucket_list, total, count) in sorted(
+            snapshot.items()
+        ):
+            if metric_name != name:
+                continue
+            label = f'view="{escape_label(view_name)}"'
+            for bucket, cumulative in bucket_list:
+                line_list.append(f'{name}_bucket{{{label},le="{bucket}"}} {cumulative}')
+            line_list.append(f"{name}_sum{{{label}}} {total}")
+            line_list.append(f"{name}_count{{{label}}} {count}")
+    return line_list
+
+
+class RequestProfilingMiddleware:
+    """샘플링한 요청의 쿼리/포트원 호출/처리 시간을 기록합니다. (모듈 설명 참고)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not should_sample():
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        started_at = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        record_request(request, response, profile, time.perf_counter() - started_at)
+        return response
+
+    async def __acall__(self, request):
+        if not should_sample():
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        started_at = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        record_request(request, response, profile, time.perf_counter() - started_at)
+        return response
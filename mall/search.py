@@ -0,0 +1,258 @@
+"""
+상품 검색.
+
+상품명/설명/제품 사양을 토큰화한 search_document 컬럼을 Product 에 저장해두고,
+데이터베이스별 전문 검색(full-text search) 인덱스로 검색합니다.
+
+- PostgreSQL : search_document 의 tsvector 에 대한 GIN 인덱스
+- SQLite : search_document 를 외부 콘텐츠로 사용하는 FTS5 가상 테이블 (트리거로 동기화)
+
+한글은 공백 단위로 검색하면 조사/복합어 때문에 잘 검색되지 않으므로 2글자 단위(bigram)로
+나눠 저장하고, 검색어도 같은 방식으로 나눠 모든 토큰을 포함하는 상품을 찾습니다.
+"""
+
+import logging
+import re
+from typing import List, Optional
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.core.signals import setting_changed
+from django.contrib.postgres.indexes import GinIndex
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.db.models import QuerySet
+from django.dispatch import receiver
+from django.utils.functional import cached_property
+from django.utils.html import strip_tags
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r"\w+")
+HANGUL_RE = re.compile(r"[가-힣]")
+
+SQLITE_FTS_TABLE = "mall_product_fts"
+
+# SQLite 는 일부 스키마 변경 시 테이블을 다시 만들면서 트리거가 삭제되므로,
+# migrate 가 끝날 때마다 reinstall_missing_search_triggers 가 다시 만듭니다.
+SQLITE_FTS_TRIGGER_SET = {
+    f"{SQLITE_FTS_TABLE}_ai",
+    f"{SQLITE_FTS_TABLE}_ad",
+    f"{SQLITE_FTS_TABLE}_au",
+}
+
+SQLITE_FTS_CREATE_SQL_LIST = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        search_document, content='mall_product', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON mall_product
+    BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, search_document)
+        VALUES (new.id, new.search_document);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON mall_product
+    BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, search_document)
+        VALUES ('delete', old.id, old.search_document);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au
+    AFTER UPDATE OF search_document ON mall_product
+    BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, search_document)
+        VALUES ('delete', old.id, old.search_document);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, search_document)
+        VALUES (new.id, new.search_document);
+    END""",
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_FTS_DROP_SQL_LIST = [
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}",
+]
+
+POSTGRES_SEARCH_INDEX_NAME = "mall_product_search_idx"
+
+
+def tokenize(text: str) -> List[str]:
+    """한글이 포함된 단어는 2글자 단위로, 그 외 단어는 소문자로 나눕니다."""
+    token_list = []
+    for word in WORD_RE.findall(text.lower()):
+        if len(word) > 1 and HANGUL_RE.search(word):
+            token_list.extend(word[i : i + 2] for i in range(len(word) - 1))
+        else:
+            token_list.append(word)
+    return token_list
+
+
+def build_search_document(name: str, description: str, specifications) -> str:
+    text_list = [description and strip_tags(description)]
+    if isinstance(specifications, dict):
+        text_list.extend(f"{key} {value}" for key, value in specifications.items())
+    token_list = tokenize(name or "")
+    # 상품명이 일치하는 상품이 상위에 오도록 상품명 토큰을 한 번 더 넣어 가중치를 줍니다.
+    token_list = token_list + token_list + tokenize(" ".join(filter(None, text_list)))
+    return " ".join(token_list)
+
+
+class BaseSearchBackend:
+    def search(self, qs: QuerySet, query: str) -> QuerySet:
+        """query 를 포함하는 상품을 관련도 순으로 정렬해 반환합니다."""
+        raise NotImplementedError
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    """전문 검색 인덱스를 사용할 수 없을 때 사용하는 상품명 부분 일치 검색입니다."""
+
+    def search(self, qs, query):
+        return qs.filter(name__icontains=query)
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    def search(self, qs, query):
+        token_list = tokenize(query)
+        if not token_list:
+            return qs.none()
+
+        # 한 글자 한글 검색어는 bigram 의 앞글자와 일치하도록 접두어 검색합니다.
+        raw_query = " & ".join(
+            f"'{token}':*" if len(token) == 1 else f"'{token}'" for token in token_list
+        )
+        search_query = SearchQuery(raw_query, config="simple", search_type="raw")
+        vector = get_search_vector()
+        return (
+            qs.annotate(search=vector, rank=SearchRank(vector, search_query))
+            .filter(search=search_query)
+            .order_by("-rank", "-pk")
+        )
+
+
+class SqliteFTS5SearchBackend(BaseSearchBackend):
+    def search(self, qs, query):
+        token_list = tokenize(query)
+        if not token_list:
+            return qs.none()
+
+        match = " ".join(
+            f'"{token}"*' if len(token) == 1 else f'"{token}"' for token in token_list
+        )
+        # MATCH 는 FTS 테이블을 먼저 읽는 조인으로 한 번만 수행해야 합니다. 상품 테이블을
+        # 먼저 읽으면 상품마다 MATCH 를 수행하므로, 단항 + 로 FTS 쪽 rowid 조건을 막아
+        # 조인 순서를 고정합니다. rank 는 bm25() 값으로, 관련도가 높을수록 작습니다.
+        return qs.extra(
+            tables=[SQLITE_FTS_TABLE],
+            where=[
+                f"{qs.model._meta.db_table}.id = +{SQLITE_FTS_TABLE}.rowid",
+                f"{SQLITE_FTS_TABLE} MATCH %s",
+            ],
+            params=[match],
+            select={"rank": f"{SQLITE_FTS_TABLE}.rank"},
+        ).order_by("rank", "-pk")
+
+
+class AutoSearchBackend(BaseSearchBackend):
+    """데이터베이스 종류에 맞는 검색 백엔드를 고릅니다."""
+
+    @cached_property
+    def backend(self) -> BaseSearchBackend:
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor == "postgresql":
+            return PostgresSearchBackend()
+        if connection.vendor == "sqlite":
+            # FTS5 를 지원하지 않는 SQLite 라면 마이그레이션에서 테이블이 만들어지지 않습니다.
+            if SQLITE_FTS_TABLE in connection.introspection.table_names():
+                return SqliteFTS5SearchBackend()
+        return IContainsSearchBackend()
+
+    def search(self, qs, query):
+        return self.backend.search(qs, query)
+
+
+def get_search_vector():
+    # GIN 인덱스(get_postgres_search_index)의 식과 같아야 인덱스를 사용합니다.
+    return SearchVector("search_document", config="simple")
+
+
+def get_postgres_search_index():
+    return GinIndex(get_search_vector(), name=POSTGRES_SEARCH_INDEX_NAME)
+
+
+def install_search_index(schema_editor, model):
+    """데이터베이스에 맞는 검색 인덱스를 만듭니다. 이미 있으면 다시 동기화합니다."""
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            f"DROP INDEX IF EXISTS {schema_editor.quote_name(POSTGRES_SEARCH_INDEX_NAME)}"
+        )
+        schema_editor.add_index(model, get_postgres_search_index())
+    elif vendor == "sqlite":
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                for sql in SQLITE_FTS_CREATE_SQL_LIST:
+                    schema_editor.execute(sql)
+        except OperationalError:
+            # FTS5 를 지원하지 않는 SQLite 빌드에서는 상품명 부분 일치 검색을 사용합니다.
+            logger.warning(
+                "SQLite FTS5 를 사용할 수 없어 검색 인덱스를 만들지 않습니다."
+            )
+
+
+def reinstall_missing_search_triggers(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    post_migrate 시그널 핸들러.
+
+    SQLite 에서 FTS5 테이블은 있는데 동기화 트리거가 없으면(마이그레이션이 상품 테이블을 다시
+    만든 경우) 트리거를 다시 만들고, 그동안 바뀐 내용이 반영되도록 인덱스를 다시 채웁니다.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        # FTS5 를 지원하지 않거나 검색 인덱스 마이그레이션 전이면 FTS 테이블이 없습니다.
+        if SQLITE_FTS_TABLE not in connection.introspection.table_names(cursor):
+            return
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        trigger_set = {name for (name,) in cursor.fetchall()}
+        if SQLITE_FTS_TRIGGER_SET <= trigger_set:
+            return
+
+        logger.warning("SQLite FTS5 검색 인덱스의 트리거가 없어 다시 만듭니다.")
+        with transaction.atomic(using=using):
+            for sql in SQLITE_FTS_CREATE_SQL_LIST:
+                cursor.execute(sql)
+
+
+def uninstall_search_index(schema_editor, model):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.remove_index(model, get_postgres_search_index())
+    elif vendor == "sqlite":
+        for sql in SQLITE_FTS_DROP_SQL_LIST:
+            schema_editor.execute(sql)
+
+
+_backend: Optional[BaseSearchBackend] = None
+
+
+def get_search_backend() -> BaseSearchBackend:
+    global _backend
+    if _backend is None:
+        backend_path = settings.MALL_SEARCH_BACKEND
+        backend_class = (
+            import_string(backend_path) if backend_path else AutoSearchBackend
+        )
+        _backend = backend_class()
+    return _backend
+
+
+def search_products(qs: QuerySet, query: str) -> QuerySet:
+    return get_search_backend().search(qs, query)
+
+
+@receiver(setting_changed)
+def reset_search_backend_on_setting_changed(sender, setting, **kwargs):
+    global _backend
+    if setting in ("MALL_SEARCH_BACKEND", "DATABASES"):
+        _backend = None
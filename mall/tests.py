@@ -1,3 +1,2424 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+from uuid import uuid4
 
-# Create your tests here.
+import requests
+from PIL import Image
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import OperationalError, connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, resolve, reverse
+from django.utils import timezone
+
+from PaymentPractice import settings
+from accounts.models import User
+from mall import cart, checks, portone_cache, profiling
+from mall import urls as mall_urls
+from mall.cache import bump_catalog_version
+from mall.models import (
+    CancellationBatch,
+    CartProduct,
+    Category,
+    Order,
+    OrderedProduct,
+    OrderPayment,
+    OrderQuerySet,
+    OrderStatusEvent,
+    OrderStatusTransitionError,
+    OutOfStockError,
+    PaymentCancellation,
+    PaymentVerificationJob,
+    PortOneWebhookEvent,
+    Product,
+    ProductImage,
+    ProductImageRendition,
+    ProductOption,
+    StockReservation,
+)
+from mall.imaging import render_renditions
+from mall.pagination import CursorPaginator
+from mall.portone import PortOneClient, PortOneError
+from mall.portone_stub import PortOneStubServer
+from mall.search import SQLITE_FTS_TABLE, search_products, tokenize
+from mall.workers import RateLimiter, StaleRequeuer
+
+
+class OrderSummaryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", password="password")
+        category = Category.objects.create(name="category")
+        cls.product_list = [
+            Product.objects.create(
+                category=category, name=f"product-{i}", description="", price=1000
+            )
+            for i in range(3)
+        ]
+        # 실제 이미지 파일 없이 만들기 위해 bulk_create 로 만들고 대표 이미지를 직접 갱신합니다.
+        ProductImage.objects.bulk_create(
+            ProductImage(product=product, image=f"mall/product/images/{product.pk}.jpg")
+            for product in cls.product_list
+        )
+        Product.refresh_primary_images(product.pk for product in cls.product_list)
+
+    def create_orders(self, count, with_summary=True):
+        for __ in range(count):
+            order = Order(user=self.user, total_amount=3000)
+            ordered_product_list = [
+                OrderedProduct(
+                    order=order,
+                    product=product,
+                    name=product.name,
+                    price=product.price,
+                    quantity=1,
+                )
+                for product in self.product_list
+            ]
+            if with_summary:
+                order.set_summary(ordered_product_list)
+            order.save()
+            OrderedProduct.objects.bulk_create(ordered_product_list)
+
+    def get_order_list_num_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("order_list"))
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_num_queries_does_not_depend_on_order_count(self):
+        self.client.force_login(self.user)
+
+        self.create_orders(1)
+        num_queries = self.get_order_list_num_queries()
+
+        self.create_orders(9)
+        self.assertEqual(self.get_order_list_num_queries(), num_queries)
+
+    def test_order_list_renders_first_product(self):
+        self.client.force_login(self.user)
+        self.create_orders(1)
+        first_product = self.product_list[-1]
+
+        response = self.client.get(reverse("order_list"))
+        self.assertContains(response, f"{first_product.name} 외 2건")
+        self.assertContains(response, f"mall/product/images/{first_product.pk}.jpg")
+
+    def test_order_name_uses_summary(self):
+        self.create_orders(1)
+        order = Order.objects.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(order.name, f"{self.product_list[-1].name} 외 2건")
+
+    def test_backfill_matches_computed_name(self):
+        self.create_orders(2, with_summary=False)
+        expected_name_list = [order.name for order in Order.objects.all()]
+
+        call_command("backfill_order_summary", chunk_size=1, stdout=StringIO())
+
+        order_list = list(Order.objects.all())
+        self.assertEqual(
+            [order.display_name for order in order_list], expected_name_list
+        )
+        for order in order_list:
+            self.assertEqual(order.item_count, 3)
+            self.assertEqual(order.first_product_id, self.product_list[-1].pk)
+
+    def test_create_from_cart_snapshots_option(self):
+        cart_product_qs = CartProduct.objects.filter(user=self.user)
+        for i, product in enumerate(self.product_list):
+            option = ProductOption.objects.create(
+                product=product, name=f"option-{i}", additional_price=100 * i
+            )
+            CartProduct.objects.create(
+                user=self.user, product=product, option=option, quantity=2
+            )
+        cart_total = sum(cart_product.amount for cart_product in cart_product_qs)
+
+        # SAVEPOINT, 장바구니 조회, 주문 INSERT, 주문 상품 INSERT, RELEASE SAVEPOINT
+        with self.assertNumQueries(5):
+            order = Order.create_from_cart(self.user, cart.DatabaseCartStore(self.user))
+
+        self.assertEqual(order.total_amount, cart_total)
+        ordered_product_list = list(order.orderedproduct_set.order_by("product_id"))
+        self.assertEqual(
+            sum(ordered_product.amount for ordered_product in ordered_product_list),
+            cart_total,
+        )
+        self.assertEqual(
+            [ordered_product.option_name for ordered_product in ordered_product_list],
+            ["option-0", "option-1", "option-2"],
+        )
+
+
+class ProductListCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="category")
+        cls.product = Product.objects.create(
+            category=cls.category, name="product", description="", price=1000
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_product_list(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("product_list"))
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def test_cached_fragment_skips_product_query(self):
+        __, num_queries = self.get_product_list()
+        response, cached_num_queries = self.get_product_list()
+        self.assertLess(cached_num_queries, num_queries)
+        self.assertContains(response, "product")
+
+    def test_product_save_invalidates_cache(self):
+        self.get_product_list()
+        self.product.name = "renamed"
+        self.product.save()
+        response, __ = self.get_product_list()
+        self.assertContains(response, "renamed")
+
+    def test_queryset_update_with_version_bump_invalidates_cache(self):
+        self.get_product_list()
+        Product.objects.filter(pk=self.product.pk).update(name="updated")
+        response, __ = self.get_product_list()
+        self.assertNotContains(response, "updated")
+
+        bump_catalog_version()
+        response, __ = self.get_product_list()
+        self.assertContains(response, "updated")
+
+    def test_admin_status_action_invalidates_cache(self):
+        admin_user = User.objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client.force_login(admin_user)
+        for action, status in [
+            ("make_sold_out", Product.Status.SOLD_OUT),
+            ("make_obsolete", Product.Status.OBSOLETE),
+        ]:
+            with mock.patch("mall.admin.bump_catalog_version") as bump:
+                self.client.post(
+                    reverse("admin:mall_product_changelist"),
+                    {"action": action, "_selected_action": [self.product.pk]},
+                )
+            self.product.refresh_from_db()
+            self.assertEqual(self.product.status, status)
+            bump.assert_called_once_with()
+
+
+class ProductSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="category")
+        cls.name_product = Product.objects.create(
+            category=category, name="제주 감귤 선물세트", description="", price=1000
+        )
+        cls.description_product = Product.objects.create(
+            category=category,
+            name="과일 모음",
+            description="<p>제주에서 자란 감귤과 한라봉</p>",
+            price=1000,
+        )
+        cls.other_product = Product.objects.create(
+            category=category,
+            name="한우 등심",
+            description="",
+            price=1000,
+            specifications={"원산지": "국내산"},
+        )
+
+    def search(self, query):
+        return list(search_products(Product.objects.all(), query))
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("제주감귤 XL"), ["제주", "주감", "감귤", "xl"])
+
+    def test_search_ranks_name_match_first(self):
+        self.assertEqual(
+            self.search("감귤"), [self.name_product, self.description_product]
+        )
+
+    def test_search_specifications(self):
+        self.assertEqual(self.search("국내산"), [self.other_product])
+
+    def test_search_index_follows_save(self):
+        self.other_product.name = "한우 감귤"
+        self.other_product.save(update_fields=["name"])
+        self.assertIn(self.other_product, self.search("감귤"))
+
+        pk = self.other_product.pk
+        self.other_product.delete()
+        self.assertNotIn(pk, [product.pk for product in self.search("감귤")])
+
+    def test_post_migrate_reinstalls_missing_triggers(self):
+        if SQLITE_FTS_TABLE not in connection.introspection.table_names():
+            self.skipTest("SQLite FTS5 검색 인덱스를 사용하지 않습니다.")
+
+        # 마이그레이션이 상품 테이블을 다시 만들면서 트리거가 삭제된 경우
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {SQLITE_FTS_TABLE}_au")
+        Product.objects.filter(pk=self.other_product.pk).update(
+            search_document=" ".join(tokenize("한우 감귤"))
+        )
+        self.assertNotIn(self.other_product, self.search("감귤"))
+
+        with self.assertLogs("mall.search", level="WARNING"):
+            emit_post_migrate_signal(verbosity=0, interactive=False, db="default")
+        self.assertIn(self.other_product, self.search("감귤"))
+        self.other_product.name = "한우 등심"
+        self.other_product.save(update_fields=["name"])
+        self.assertNotIn(self.other_product, self.search("감귤"))
+
+
+class CursorPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="category")
+        cls.product_list = [
+            Product.objects.create(
+                category=category, name=f"product-{i}", description="", price=1000
+            )
+            for i in range(12)
+        ]
+        cls.admin_user = User.objects.create_superuser(
+            username="admin", password="password"
+        )
+
+    def test_next_and_previous_pages(self):
+        paginator = CursorPaginator(Product.objects.all(), 4)
+        expected = [product.pk for product in reversed(self.product_list)]
+
+        first_page = paginator.get_page()
+        self.assertEqual([p.pk for p in first_page], expected[:4])
+        self.assertFalse(first_page.has_previous())
+
+        second_page = paginator.get_page(first_page.next_cursor)
+        self.assertEqual([p.pk for p in second_page], expected[4:8])
+
+        last_page = paginator.get_page(second_page.next_cursor)
+        self.assertEqual([p.pk for p in last_page], expected[8:])
+        self.assertFalse(last_page.has_next())
+
+        previous_page = paginator.get_page(last_page.previous_cursor)
+        self.assertEqual([p.pk for p in previous_page], expected[4:8])
+        self.assertEqual(
+            [p.pk for p in paginator.get_page(previous_page.previous_cursor)],
+            expected[:4],
+        )
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = CursorPaginator(Product.objects.all(), 4)
+        self.assertEqual(
+            list(paginator.get_page("invalid").object_list),
+            list(paginator.get_page().object_list),
+        )
+
+    def test_product_list_does_not_count(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("product_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "cursor=")
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in context.captured_queries)
+        )
+
+    def test_admin_changelist(self):
+        self.client.force_login(self.admin_user)
+        for url_name in (
+            "admin:mall_product_changelist",
+            "admin:mall_order_changelist",
+        ):
+            response = self.client.get(reverse(url_name))
+            self.assertEqual(response.status_code, 200)
+
+        # 다른 컬럼으로 정렬하면 페이지 번호 방식으로 동작합니다.
+        response = self.client.get(reverse("admin:mall_product_changelist") + "?o=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context["cl"].cursor_page)
+
+        response = self.client.get(
+            reverse("admin:mall_product_changelist") + "?status__exact=a"
+        )
+        next_url = response.context["cl"].cursor_page.next_url
+        self.assertIn("status__exact=a", next_url)
+        response = self.client.get(reverse("admin:mall_product_changelist") + next_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [product.pk for product in response.context["cl"].result_list],
+            [product.pk for product in reversed(self.product_list[:2])],
+        )
+
+
+class LoadProductsTest(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        media_override = override_settings(
+            MEDIA_ROOT=os.path.join(self.tmp_dir, "media")
+        )
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.manifest_path = os.path.join(self.tmp_dir, "product-list.json")
+        self.checkpoint_path = os.path.join(self.tmp_dir, "checkpoint.json")
+        self.item_list = [
+            {
+                "category_name": "과일" if i % 2 else "",
+                "name": f"상품{i}",
+                "price": 1000 + i,
+                "priceUnit": "원",
+                "desc": f"설명{i}",
+                "photo_path": f"{i}.png",
+            }
+            for i in range(5)
+        ]
+        for i in range(5):
+            self.write_photo(f"{i}.png", (i * 40, 0, 0))
+        self.write_manifest()
+
+    def write_photo(self, filename, color):
+        buffer = BytesIO()
+        Image.new("RGBA", (600, 400), color).save(buffer, format="PNG")
+        with open(os.path.join(self.tmp_dir, filename), "wb") as f:
+            f.write(buffer.getvalue())
+
+    def write_manifest(self):
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(self.item_list, f, ensure_ascii=False)
+
+    def load_products(self, **options):
+        options.setdefault("stderr", StringIO())
+        call_command(
+            "load_products",
+            manifest=self.manifest_path,
+            checkpoint=self.checkpoint_path,
+            batch_size=2,
+            image_workers=1,
+            stdout=StringIO(),
+            **options,
+        )
+
+    def test_import(self):
+        self.load_products()
+
+        self.assertEqual(Product.objects.count(), 5)
+        self.assertEqual(ProductImage.objects.count(), 5)
+        self.assertTrue(Category.objects.filter(name="미분류").exists())
+        product = Product.objects.get(name="상품3")
+        self.assertEqual(product.source_key, "과일/상품3")
+        self.assertEqual(product.price, 1003)
+        product_image = product.images.get()
+        self.assertEqual(
+            product_image.rendition_status, ProductImage.RenditionStatus.DONE
+        )
+        # 원본은 그대로 두고 렌디션을 만듭니다.
+        with product_image.image.open() as f:
+            self.assertEqual(Image.open(f).size, (600, 400))
+        self.assertTrue(product_image.renditions.filter(format="jpeg", width=300))
+        self.assertTrue(search_products(Product.objects.all(), "상품3").exists())
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_reimport_updates_only_changed(self):
+        self.load_products()
+        image_pk_list = list(ProductImage.objects.values_list("pk", flat=True))
+
+        self.item_list[0]["price"] = 5000
+        self.write_manifest()
+        self.write_photo("1.png", (0, 255, 0))
+        self.load_products()
+
+        self.assertEqual(Product.objects.count(), 5)
+        self.assertEqual(Product.objects.get(name="상품0").price, 5000)
+        self.assertEqual(ProductImage.objects.count(), 5)
+        changed = ProductImage.objects.exclude(pk__in=image_pk_list)
+        self.assertEqual([image.product.name for image in changed], ["상품1"])
+
+    def test_skip_unreadable_image(self):
+        with open(os.path.join(self.tmp_dir, "2.png"), "wb") as f:
+            f.write(b"not an image")
+        stderr = StringIO()
+        self.load_products(stderr=stderr)
+
+        self.assertIn("이미지를 변환하지 못했습니다", stderr.getvalue())
+        self.assertIn("2.png", stderr.getvalue())
+        # 변환하지 못한 이미지만 빠지고, 같은 배치의 다른 상품과 이미지는 등록됩니다.
+        self.assertEqual(Product.objects.count(), 5)
+        self.assertFalse(ProductImage.objects.filter(product__name="상품2").exists())
+        self.assertEqual(ProductImage.objects.count(), 4)
+        self.assertTrue(ProductImage.objects.filter(product__name="상품3").exists())
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_failed_batch_leaves_no_files(self):
+        with mock.patch.object(
+            ProductImageRendition.objects,
+            "bulk_create",
+            side_effect=OperationalError("database is locked"),
+        ), self.assertRaises(OperationalError):
+            self.load_products()
+
+        self.assertFalse(Product.objects.exists())
+        self.assertFalse(ProductImage.objects.exists())
+        # 트랜잭션이 롤백되면 미리 저장한 원본/렌디션 파일을 지웁니다.
+        file_list = [
+            name
+            for __, __, name_list in os.walk(os.path.join(self.tmp_dir, "media"))
+            for name in name_list
+        ]
+        self.assertEqual(file_list, [])
+
+    def test_adopt_existing_product(self):
+        category = Category.objects.create(name="과일")
+        product = Product.objects.create(
+            category=category, name="상품1", description="", price=1
+        )
+        self.load_products()
+        product.refresh_from_db()
+        self.assertEqual(product.source_key, "과일/상품1")
+        self.assertEqual(product.price, 1001)
+        self.assertEqual(Product.objects.count(), 5)
+
+    def test_resume_from_checkpoint(self):
+        self.load_products()
+        Product.objects.filter(name="상품0").update(price=1)
+
+        # 앞의 4개는 이미 처리했다는 체크포인트에서 이어서 실행합니다.
+        with open(self.manifest_path, "rb") as f:
+            manifest_hash = hashlib.sha256(f.read()).hexdigest()
+        with open(self.checkpoint_path, "w") as f:
+            json.dump({"manifest_hash": manifest_hash, "next_index": 4}, f)
+        self.load_products()
+        self.assertEqual(Product.objects.get(name="상품0").price, 1)
+
+        # 상품 목록이 바뀌면 체크포인트를 무시합니다.
+        with open(self.checkpoint_path, "w") as f:
+            json.dump({"manifest_hash": "other", "next_index": 4}, f)
+        self.load_products()
+        self.assertEqual(Product.objects.get(name="상품0").price, 1000)
+
+
+@override_settings(MALL_IMAGE_RENDITION_WORKERS=0)
+class ProductImageRenditionTest(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        media_override = override_settings(MEDIA_ROOT=tmp_dir.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        cache.clear()
+
+        category = Category.objects.create(name="category")
+        self.product = Product.objects.create(
+            category=category, name="product", description="", price=1000
+        )
+
+    def get_image_data(self, size=(800, 600), mode="RGB", format="PNG"):
+        buffer = BytesIO()
+        Image.new(mode, size).save(buffer, format=format)
+        return buffer.getvalue()
+
+    def upload_image(self, **kwargs):
+        return ProductImage.objects.create(
+            product=self.product,
+            image=SimpleUploadedFile("photo.png", self.get_image_data(**kwargs)),
+        )
+
+    def test_render_renditions(self):
+        rendered_list = render_renditions(
+            self.get_image_data(size=(400, 200), mode="RGBA"),
+            [("webp", 150), ("webp", 600), ("jpeg", 150), ("jpeg", 600)],
+        )
+        # 원본보다 큰 너비는 원본 너비로 만듭니다.
+        self.assertEqual(
+            [(r.format, r.width, r.height) for r in rendered_list],
+            [
+                ("webp", 150, 75),
+                ("webp", 400, 200),
+                ("jpeg", 150, 75),
+                ("jpeg", 400, 200),
+            ],
+        )
+        self.assertEqual(Image.open(BytesIO(rendered_list[-1].content)).format, "JPEG")
+
+    def test_upload_keeps_original_and_defers_renditions(self):
+        product_image = self.upload_image()
+        self.assertEqual(
+            product_image.rendition_status, ProductImage.RenditionStatus.PENDING
+        )
+        with product_image.image.open() as f:
+            self.assertEqual(Image.open(f).size, (800, 600))
+        # 렌디션이 없으면 원본을 보여줍니다.
+        self.assertEqual(product_image.thumbnail_url, product_image.image.url)
+
+    def test_generate_image_renditions(self):
+        product_image = self.upload_image()
+        call_command(
+            "generate_image_renditions", workers=1, stdout=StringIO(), stderr=StringIO()
+        )
+
+        product_image.refresh_from_db()
+        self.assertEqual(
+            product_image.rendition_status, ProductImage.RenditionStatus.DONE
+        )
+        self.assertEqual(
+            set(product_image.renditions.values_list("format", "width")),
+            {
+                (format, width)
+                for format in ["webp", "jpeg"]
+                for width in [150, 300, 600]
+            },
+        )
+        rendition = product_image.renditions.get(format="jpeg", width=300)
+        self.assertEqual(rendition.height, 225)
+        self.assertEqual(product_image.thumbnail_url, rendition.file.url)
+
+        # 다시 실행해도 완료된 이미지는 변환하지 않습니다.
+        created_at = rendition.created_at
+        call_command(
+            "generate_image_renditions", workers=1, stdout=StringIO(), stderr=StringIO()
+        )
+        self.assertEqual(
+            product_image.renditions.get(pk=rendition.pk).created_at, created_at
+        )
+
+    def test_stale_running_image_is_rendered_again(self):
+        # 변환을 선점한 프로세스가 종료되어 RUNNING 으로 남은 경우
+        product_image = self.upload_image()
+        self.assertTrue(ProductImage.claim(product_image.pk))
+        call_command(
+            "generate_image_renditions", workers=1, stdout=StringIO(), stderr=StringIO()
+        )
+        # 임대 시간이 지나기 전에는 다른 프로세스가 변환 중인 것으로 봅니다.
+        product_image.refresh_from_db()
+        self.assertEqual(
+            product_image.rendition_status, ProductImage.RenditionStatus.RUNNING
+        )
+
+        ProductImage.objects.filter(pk=product_image.pk).update(
+            rendition_started_at=timezone.now() - timedelta(hours=1)
+        )
+        call_command(
+            "generate_image_renditions", workers=1, stdout=StringIO(), stderr=StringIO()
+        )
+        product_image.refresh_from_db()
+        self.assertEqual(
+            product_image.rendition_status, ProductImage.RenditionStatus.DONE
+        )
+        self.assertTrue(product_image.renditions.exists())
+
+    def test_broken_image_fails(self):
+        product_image = ProductImage.objects.create(
+            product=self.product,
+            image=SimpleUploadedFile("photo.png", b"not an image"),
+        )
+        call_command(
+            "generate_image_renditions", workers=1, stdout=StringIO(), stderr=StringIO()
+        )
+        product_image.refresh_from_db()
+        self.assertEqual(
+            product_image.rendition_status, ProductImage.RenditionStatus.FAILED
+        )
+        self.assertFalse(ProductImageRendition.objects.exists())
+
+    def test_product_list_uses_renditions(self):
+        self.upload_image()
+        call_command(
+            "generate_image_renditions", workers=1, stdout=StringIO(), stderr=StringIO()
+        )
+        response = self.client.get(reverse("product_list"))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, "photo_300w.jpg")
+
+    def test_primary_image_follows_image_changes(self):
+        first_image = self.upload_image()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.primary_image, first_image)
+        self.assertEqual(self.product.thumbnail_url, first_image.image.url)
+        self.assertIsNone(self.product.thumbnail_width)
+
+        second_image = self.upload_image()
+        call_command("warm_thumbnails", workers=1, stdout=StringIO(), stderr=StringIO())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.primary_image, first_image)
+        self.assertIn("_300w.jpg", self.product.thumbnail_url)
+        self.assertEqual(
+            (self.product.thumbnail_width, self.product.thumbnail_height), (300, 225)
+        )
+        self.assertEqual(
+            [source["type"] for source in self.product.thumbnail_sources],
+            ["image/webp", "image/jpeg"],
+        )
+
+        first_image.delete()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.primary_image, second_image)
+
+        second_image.delete()
+        self.product.refresh_from_db()
+        self.assertIsNone(self.product.primary_image)
+        self.assertEqual(self.product.thumbnail_url, "")
+
+    def test_product_list_num_queries_does_not_depend_on_image_count(self):
+        def get_num_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.client.get(reverse("product_list"))
+            return len(context.captured_queries)
+
+        self.upload_image()
+        num_queries = get_num_queries()
+
+        for i in range(3):
+            product = Product.objects.create(
+                category=self.product.category,
+                name=f"product-{i}",
+                description="",
+                price=1,
+            )
+            ProductImage.objects.create(
+                product=product,
+                image=SimpleUploadedFile("photo.png", self.get_image_data()),
+            )
+        self.assertEqual(get_num_queries(), num_queries)
+
+
+class CartAddTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", password="password")
+        category = Category.objects.create(name="category")
+        cls.product = Product.objects.create(
+            category=category, name="product", description="", price=1000
+        )
+        cls.option = ProductOption.objects.create(product=cls.product, name="option")
+        cls.other_product = Product.objects.create(
+            category=category, name="other", description="", price=1000
+        )
+        cls.other_option = ProductOption.objects.create(
+            product=cls.other_product, name="other option"
+        )
+
+    def test_add_product_in_one_query(self):
+        with self.assertNumQueries(1):
+            quantity = cart.add_product(self.user, self.product.pk, self.option.pk, 2)
+        self.assertEqual(quantity, 2)
+        with self.assertNumQueries(1):
+            quantity = cart.add_product(self.user, self.product.pk, self.option.pk, 3)
+        self.assertEqual(quantity, 5)
+        self.assertEqual(CartProduct.objects.get().quantity, 5)
+
+    def test_option_must_belong_to_active_product(self):
+        self.assertIsNone(
+            cart.add_product(self.user, self.product.pk, self.other_option.pk)
+        )
+        Product.objects.filter(pk=self.product.pk).update(
+            status=Product.Status.SOLD_OUT
+        )
+        self.assertIsNone(cart.add_product(self.user, self.product.pk, self.option.pk))
+        self.assertFalse(CartProduct.objects.exists())
+
+    def test_add_to_cart_view(self):
+        self.client.force_login(self.user)
+        url = reverse("add_to_cart", args=[self.product.pk])
+
+        def post(data):
+            return self.client.post(
+                url, json.dumps(data), content_type="application/json"
+            )
+
+        self.assertEqual(
+            post({"product_option": self.option.pk, "product_quantity": 2}).status_code,
+            200,
+        )
+        self.assertEqual(post({"product_quantity": 2}).status_code, 400)
+        self.assertEqual(
+            post({"product_option": "x", "product_quantity": 2}).status_code, 400
+        )
+        self.assertEqual(
+            post({"product_option": self.option.pk, "product_quantity": 0}).status_code,
+            400,
+        )
+        self.assertEqual(
+            post({"product_option": self.other_option.pk}).status_code, 404
+        )
+        self.assertEqual(CartProduct.objects.get().quantity, 2)
+
+
+class CartAddConcurrencyTest(TransactionTestCase):
+    def test_parallel_adds_are_not_lost(self):
+        user = User.objects.create_user(username="buyer", password="password")
+        category = Category.objects.create(name="category")
+        product = Product.objects.create(
+            category=category, name="product", description="", price=1000
+        )
+        option = ProductOption.objects.create(product=product, name="option")
+
+        thread_count, add_count = 8, 10
+        barrier = threading.Barrier(thread_count)
+        error_list = []
+
+        def add():
+            while True:
+                try:
+                    return cart.add_product(user, product.pk, option.pk, 1)
+                except OperationalError as e:
+                    # 테스트용 SQLite 메모리 DB(shared cache)는 동시 쓰기를 대기하지 않고
+                    # 바로 실패하므로 다시 시도합니다. 수량 유실과는 관계없습니다.
+                    if "locked" not in str(e):
+                        raise
+                    time.sleep(0.001)
+
+        def add_many():
+            try:
+                barrier.wait()
+                for __ in range(add_count):
+                    add()
+            except Exception as e:
+                error_list.append(e)
+            finally:
+                connection.close()
+
+        thread_list = [threading.Thread(target=add_many) for __ in range(thread_count)]
+        for thread in thread_list:
+            thread.start()
+        for thread in thread_list:
+            thread.join()
+
+        self.assertEqual(error_list, [])
+        self.assertEqual(CartProduct.objects.get().quantity, thread_count * add_count)
+
+
+@override_settings(MALL_CART_STORE="mall.cart.CacheCartStore")
+class CacheCartStoreTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", password="password")
+        category = Category.objects.create(name="category")
+        cls.product = Product.objects.create(
+            category=category, name="product", description="", price=1000
+        )
+        cls.option = ProductOption.objects.create(
+            product=cls.product, name="option", additional_price=100
+        )
+        cls.other_option = ProductOption.objects.create(
+            product=Product.objects.create(
+                category=category, name="other", description="", price=500
+            ),
+            name="other option",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def post_add_to_cart(self, option, quantity=1):
+        return self.client.post(
+            reverse("add_to_cart", args=[option.product_id]),
+            json.dumps({"product_option": option.pk, "product_quantity": quantity}),
+            content_type="application/json",
+        )
+
+    def test_user_cart_writes_behind(self):
+        store = cart.get_user_cart(self.user)
+        self.assertEqual(store.add(self.product.pk, self.option.pk, 2), 2)
+        self.assertEqual(store.add(self.product.pk, self.option.pk, 1), 3)
+        self.assertIsNone(store.add(self.product.pk, self.other_option.pk))
+        # 담을 때는 CartProduct 에 쓰지 않습니다.
+        self.assertFalse(CartProduct.objects.exists())
+
+        call_command("flush_carts", stdout=StringIO())
+        cart_product = CartProduct.objects.get()
+        self.assertEqual(
+            (cart_product.option_id, cart_product.quantity), (self.option.pk, 3)
+        )
+
+        # 캐시에서 사라져도 반영된 내용으로 복원합니다.
+        cache.clear()
+        self.assertEqual(store.get_quantities(), {(self.product.pk, self.option.pk): 3})
+
+        store.remove([(self.product.pk, self.option.pk)])
+        call_command("flush_carts", stdout=StringIO())
+        self.assertFalse(CartProduct.objects.exists())
+
+    def test_create_from_cart(self):
+        store = cart.get_user_cart(self.user)
+        store.add(self.product.pk, self.option.pk, 2)
+        store.add(self.other_option.product_id, self.other_option.pk, 1)
+
+        order = Order.create_from_cart(self.user, store)
+        self.assertEqual(order.total_amount, 1100 * 2 + 500)
+        self.assertEqual(order.item_count, 2)
+
+    def test_anonymous_cart_merges_on_login(self):
+        self.assertEqual(self.post_add_to_cart(self.option, 2).status_code, 200)
+        self.assertEqual(self.post_add_to_cart(self.other_option).status_code, 200)
+        response = self.client.get(reverse("cart_detail"))
+        self.assertContains(response, "other option")
+
+        cart.get_user_cart(self.user).add(self.product.pk, self.option.pk, 1)
+        self.client.post(
+            reverse("login"), {"username": "buyer", "password": "password"}
+        )
+        self.assertEqual(
+            cart.get_user_cart(self.user).get_quantities(),
+            {
+                (self.product.pk, self.option.pk): 3,
+                (self.other_option.product_id, self.other_option.pk): 1,
+            },
+        )
+
+    @override_settings(MALL_CART_STORE="mall.cart.DatabaseCartStore")
+    def test_anonymous_cart_merges_into_database_cart(self):
+        self.post_add_to_cart(self.option, 2)
+        self.client.post(
+            reverse("login"), {"username": "buyer", "password": "password"}
+        )
+        self.assertEqual(CartProduct.objects.get(user=self.user).quantity, 2)
+
+    def test_cart_detail_updates_quantity(self):
+        self.client.force_login(self.user)
+        store = cart.get_user_cart(self.user)
+        store.add(self.product.pk, self.option.pk, 1)
+        store.add(self.other_option.product_id, self.other_option.pk, 1)
+
+        # 상품명 순서: other, product
+        response = self.client.post(
+            reverse("cart_detail"),
+            {
+                "form-TOTAL_FORMS": "2",
+                "form-INITIAL_FORMS": "2",
+                "form-0-product_id": self.other_option.product_id,
+                "form-0-option_id": self.other_option.pk,
+                "form-0-quantity": "1",
+                "form-0-DELETE": "on",
+                "form-1-product_id": self.product.pk,
+                "form-1-option_id": self.option.pk,
+                "form-1-quantity": "4",
+            },
+        )
+        self.assertRedirects(response, reverse("cart_detail"))
+        self.assertEqual(store.get_quantities(), {(self.product.pk, self.option.pk): 4})
+
+    def test_flush_carts_reads_cart_written_by_another_process(self):
+        # 웹 프로세스와 flush_carts 가 공유 캐시(파일 캐시)의 서로 다른 연결을 쓰는 경우
+        with tempfile.TemporaryDirectory() as cache_dir, override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": cache_dir,
+                }
+            }
+        ):
+            web_cache = caches.create_connection("default")
+            with mock.patch.object(cart, "cache", web_cache):
+                cart.get_user_cart(self.user).add(self.product.pk, self.option.pk, 2)
+            self.assertFalse(CartProduct.objects.exists())
+
+            stdout = StringIO()
+            call_command("flush_carts", stdout=stdout)
+        self.assertIn("장바구니 1개를 반영했습니다.", stdout.getvalue())
+        self.assertEqual(CartProduct.objects.get(user=self.user).quantity, 2)
+
+    def test_cache_cart_store_requires_shared_cache(self):
+        self.assertEqual(
+            [error.id for error in checks.check_cart_store_cache(None)], ["mall.E001"]
+        )
+        self.assertEqual(
+            [warning.id for warning in checks.check_anonymous_cart_cache(None)],
+            ["mall.W001"],
+        )
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": tempfile.gettempdir(),
+                }
+            }
+        ):
+            self.assertEqual(checks.check_cart_store_cache(None), [])
+            self.assertEqual(checks.check_anonymous_cart_cache(None), [])
+
+
+class CartDetailTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", password="password")
+        category = Category.objects.create(name="category")
+        product_list = Product.objects.bulk_create(
+            Product(
+                category=category, name=f"product-{i:03}", description="", price=1000
+            )
+            for i in range(200)
+        )
+        cls.option_list = ProductOption.objects.bulk_create(
+            ProductOption(product=product, name="option", additional_price=100)
+            for product in product_list
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def fill_cart(self, size):
+        store = cart.get_user_cart(self.user)
+        store.clear()
+        for option in self.option_list[:size]:
+            store.add(option.product_id, option.pk, 2)
+
+    def get_cart_detail(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("cart_detail"))
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def assert_constant_queries(self):
+        self.fill_cart(1)
+        response, num_queries = self.get_cart_detail()
+        self.assertEqual(response.context["total_price"], 2200)
+
+        self.fill_cart(200)
+        response, num_queries_200 = self.get_cart_detail()
+        self.assertEqual(num_queries_200, num_queries)
+        self.assertEqual(response.context["total_price"], 2200 * 200)
+
+    def test_database_cart_constant_queries(self):
+        self.assert_constant_queries()
+
+    @override_settings(MALL_CART_STORE="mall.cart.CacheCartStore")
+    def test_cache_cart_constant_queries(self):
+        self.assert_constant_queries()
+
+    def test_total_with_null_option(self):
+        product = self.option_list[0].product
+        CartProduct.objects.create(user=self.user, product=product, quantity=3)
+        cart_product = CartProduct.objects.get()
+        self.assertEqual(cart_product.total_price, 3000)
+
+        line_list = cart.get_user_cart(self.user).get_lines()
+        self.assertEqual(line_list[0].total_price, 3000)
+        self.assertEqual(cart.get_user_cart(self.user).get_total(line_list), 3000)
+
+
+class StockReservationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", password="password")
+        category = Category.objects.create(name="category")
+        cls.product = Product.objects.create(
+            category=category, name="product", description="", price=1000, stock=5
+        )
+        cls.option = ProductOption.objects.create(
+            product=cls.product, name="option", stock=3
+        )
+        cls.untracked_product = Product.objects.create(
+            category=category, name="untracked", description="", price=500
+        )
+
+    def create_order(self, quantity=2) -> Order:
+        CartProduct.objects.filter(user=self.user).delete()
+        CartProduct.objects.create(
+            user=self.user, product=self.product, option=self.option, quantity=quantity
+        )
+        CartProduct.objects.create(user=self.user, product=self.untracked_product)
+        return Order.create_from_cart(self.user, cart.DatabaseCartStore(self.user))
+
+    def assertStock(self, product_stock, option_stock):
+        self.product.refresh_from_db(fields=["stock"])
+        self.option.refresh_from_db(fields=["stock"])
+        self.assertEqual(
+            (self.product.stock, self.option.stock), (product_stock, option_stock)
+        )
+
+    def apply_payment(self, order, pay_status):
+        payment = OrderPayment.create_by_order(order)
+        meta = {"status": pay_status, "amount": {"total": order.total_amount}}
+        OrderPayment.bulk_apply_portone_meta([(payment, meta)])
+
+    def test_reserve_decrements_product_and_option_stock(self):
+        order = self.create_order(2)
+        self.assertStock(3, 1)
+        self.assertEqual(
+            set(order.stock_reservations.values_list("option_id", "quantity")),
+            {(None, 2), (self.option.pk, 2)},
+        )
+
+    def test_out_of_stock_rolls_back_order(self):
+        with self.assertRaisesMessage(OutOfStockError, "product (option)"):
+            self.create_order(4)
+        self.assertStock(5, 3)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_order_new_redirects_to_cart_when_out_of_stock(self):
+        self.client.force_login(self.user)
+        CartProduct.objects.create(
+            user=self.user, product=self.product, option=self.option, quantity=4
+        )
+        response = self.client.post(reverse("order_new"))
+        self.assertRedirects(response, reverse("cart_detail"))
+        self.assertFalse(Order.objects.exists())
+        self.assertNotIn("cart_line_keys", self.client.session)
+
+    def test_order_new_stores_ordered_cart_line_keys(self):
+        self.client.force_login(self.user)
+        CartProduct.objects.create(
+            user=self.user, product=self.product, option=self.option, quantity=2
+        )
+        CartProduct.objects.create(user=self.user, product=self.untracked_product)
+        response = self.client.post(reverse("order_new"))
+        order = Order.objects.get()
+        self.assertRedirects(
+            response,
+            reverse("order_pay", args=[order.pk]),
+            fetch_redirect_response=False,
+        )
+        self.assertCountEqual(
+            self.client.session["cart_line_keys"],
+            [[self.product.pk, self.option.pk], [self.untracked_product.pk, None]],
+        )
+
+    def test_paid_order_commits_reservation(self):
+        order = self.create_order(2)
+        self.apply_payment(order, "PAID")
+        self.assertEqual(
+            set(order.stock_reservations.values_list("status", flat=True)),
+            {StockReservation.Status.COMMITTED},
+        )
+        self.assertStock(3, 1)
+
+    def test_failed_payment_releases_stock(self):
+        order = self.create_order(2)
+        self.apply_payment(order, "FAILED")
+        self.assertStock(5, 3)
+
+        # 다시 결제에 성공하면 재고를 다시 차감합니다.
+        self.apply_payment(order, "PAID")
+        self.assertStock(3, 1)
+        self.assertEqual(
+            set(order.stock_reservations.values_list("status", flat=True)),
+            {StockReservation.Status.COMMITTED},
+        )
+
+    def test_release_expired(self):
+        paid_order = self.create_order(1)
+        self.apply_payment(paid_order, "PAID")
+        self.create_order(1)
+        self.assertStock(3, 1)
+
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(1))
+        call_command("release_expired_stock", stdout=StringIO())
+        # 결제 완료된 주문의 재고는 돌려놓지 않습니다.
+        self.assertStock(4, 2)
+        self.assertEqual(StockReservation.release_expired(), 0)
+        self.assertStock(4, 2)
+
+
+class FlashSaleTest(TransactionTestCase):
+    def test_concurrent_orders_do_not_oversell(self):
+        category = Category.objects.create(name="category")
+        product = Product.objects.create(
+            category=category, name="product", description="", price=1000, stock=3
+        )
+        buyer_count = 8
+        user_list = [
+            User.objects.create_user(username=f"buyer-{i}") for i in range(buyer_count)
+        ]
+        for user in user_list:
+            CartProduct.objects.create(user=user, product=product)
+
+        barrier = threading.Barrier(buyer_count)
+        result_list = []
+
+        def buy(user):
+            try:
+                barrier.wait()
+                while True:
+                    try:
+                        Order.create_from_cart(user, cart.DatabaseCartStore(user))
+                    except OperationalError as e:
+                        # CartAddConcurrencyTest 참고
+                        if "locked" not in str(e):
+                            raise
+                        time.sleep(0.001)
+                    else:
+                        result_list.append("ordered")
+                        return
+            except OutOfStockError:
+                result_list.append("sold_out")
+            except Exception as e:
+                result_list.append(e)
+            finally:
+                connection.close()
+
+        thread_list = [threading.Thread(target=buy, args=[user]) for user in user_list]
+        for thread in thread_list:
+            thread.start()
+        for thread in thread_list:
+            thread.join()
+
+        self.assertEqual(
+            sorted(result_list), ["ordered"] * 3 + ["sold_out"] * (buyer_count - 3)
+        )
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(Order.objects.count(), 3)
+
+
+class PaymentVerificationJobTest(TestCase):
+    def test_enqueue_merges_pending_job(self):
+        merchant_uid = uuid4()
+        self.assertTrue(PaymentVerificationJob.enqueue(merchant_uid))
+        self.assertFalse(PaymentVerificationJob.enqueue(merchant_uid))
+        job = PaymentVerificationJob.objects.get()
+        self.assertEqual(job.notified_count, 2)
+
+        # 처리 중인 작업은 그 뒤의 상태 변경을 놓칠 수 있으므로 새 작업을 등록합니다.
+        PaymentVerificationJob.claim_next()
+        self.assertTrue(PaymentVerificationJob.enqueue(merchant_uid))
+        self.assertEqual(PaymentVerificationJob.objects.count(), 2)
+
+    def test_enqueue_race_bumps_existing_job(self):
+        merchant_uid = uuid4()
+        PaymentVerificationJob.enqueue(merchant_uid)
+        bump_pending = PaymentVerificationJob._bump_pending
+        miss_list = [0]
+
+        def bump_after_miss(uid):
+            # 대기 중인 작업을 찾지 못한 뒤 다른 요청이 먼저 등록한 경우
+            return miss_list.pop() if miss_list else bump_pending(uid)
+
+        with mock.patch.object(
+            PaymentVerificationJob, "_bump_pending", side_effect=bump_after_miss
+        ):
+            self.assertFalse(PaymentVerificationJob.enqueue(merchant_uid))
+        self.assertEqual(PaymentVerificationJob.objects.get().notified_count, 2)
+
+    def test_claim_skips_job_claimed_by_another_worker(self):
+        first_job = PaymentVerificationJob.objects.create(merchant_uid=uuid4())
+        second_job = PaymentVerificationJob.objects.create(merchant_uid=uuid4())
+        claimed_list = []
+
+        def claim_first_job(execute, sql, params, many, context):
+            # 후보를 조회한 뒤 선점 UPDATE 전에 다른 워커가 첫 작업을 가져간 경우
+            if sql.startswith("UPDATE") and "attempts" in sql and not claimed_list:
+                claimed_list.append(first_job.pk)
+                PaymentVerificationJob.objects.filter(pk=first_job.pk).update(
+                    status=PaymentVerificationJob.Status.RUNNING
+                )
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(claim_first_job):
+            job = PaymentVerificationJob.claim_next()
+        self.assertEqual(claimed_list, [first_job.pk])
+        self.assertEqual(job.pk, second_job.pk)
+        self.assertEqual((job.status, job.attempts), ("RUNNING", 1))
+        self.assertIsNone(PaymentVerificationJob.claim_next())
+
+    def test_retry_backoff_and_exhaustion(self):
+        PaymentVerificationJob.enqueue(uuid4())
+        with mock.patch.object(
+            settings, "PAYMENT_JOB_RETRY_DELAY", 10
+        ), mock.patch.object(settings, "PAYMENT_JOB_MAX_ATTEMPTS", 3):
+            for attempts, delay in [(1, 10), (2, 20)]:
+                job = PaymentVerificationJob.claim_next()
+                self.assertEqual(job.attempts, attempts)
+                started_at = timezone.now()
+                job.retry_or_fail("error")
+                job.refresh_from_db()
+                self.assertEqual(job.status, PaymentVerificationJob.Status.PENDING)
+                self.assertAlmostEqual(
+                    (job.available_at - started_at).total_seconds(), delay, delta=1
+                )
+                # 대기 시간이 지나기 전에는 선점하지 않습니다.
+                self.assertIsNone(PaymentVerificationJob.claim_next())
+                PaymentVerificationJob.objects.update(available_at=timezone.now())
+
+            job = PaymentVerificationJob.claim_next()
+            job.retry_or_fail("error")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("FAILED", 3))
+        self.assertEqual(job.last_error, "error")
+
+    def test_retry_defers_to_newer_pending_job(self):
+        merchant_uid = uuid4()
+        PaymentVerificationJob.enqueue(merchant_uid)
+        job = PaymentVerificationJob.claim_next()
+        PaymentVerificationJob.enqueue(merchant_uid)
+
+        job.retry_or_fail("error")
+        job.refresh_from_db()
+        self.assertEqual(job.status, PaymentVerificationJob.Status.DONE)
+
+    def test_stale_running_job_is_requeued(self):
+        merchant_uid = uuid4()
+        PaymentVerificationJob.enqueue(merchant_uid)
+        job = PaymentVerificationJob.claim_next()
+        # 처리 중인 작업은 임대 시간이 지나기 전까지 다시 선점하지 않습니다.
+        self.assertIsNone(PaymentVerificationJob.claim_next())
+
+        stale_at = timezone.now() - timedelta(hours=1)
+        PaymentVerificationJob.objects.update(updated_at=stale_at)
+        # 선점할 때는 리스를 확인하지 않고, 워커 루프가 주기적으로 다시 대기시킵니다.
+        self.assertIsNone(PaymentVerificationJob.claim_next())
+        self.assertEqual(PaymentVerificationJob.requeue_stale(), 1)
+        requeued_job = PaymentVerificationJob.claim_next()
+        self.assertEqual((requeued_job.pk, requeued_job.attempts), (job.pk, 2))
+
+        # 같은 결제건의 새 작업이 대기 중이면 그 작업이 다시 검증합니다.
+        PaymentVerificationJob.enqueue(merchant_uid)
+        PaymentVerificationJob.objects.filter(pk=job.pk).update(updated_at=stale_at)
+        self.assertEqual(PaymentVerificationJob.requeue_stale(), 0)
+        self.assertEqual(
+            PaymentVerificationJob.objects.get(pk=job.pk).status,
+            PaymentVerificationJob.Status.DONE,
+        )
+
+    def test_stale_requeuer_runs_once_per_lease(self):
+        with mock.patch(
+            "mall.workers.time.monotonic", return_value=1000.0
+        ) as monotonic, mock.patch.object(
+            PaymentVerificationJob, "requeue_stale", return_value=0
+        ) as requeue_stale:
+            stale_requeuer = StaleRequeuer(PaymentVerificationJob)
+            stale_requeuer.run_if_due()
+            requeue_stale.assert_not_called()
+
+            monotonic.return_value += settings.PAYMENT_JOB_LEASE_TIMEOUT
+            stale_requeuer.run_if_due()
+            stale_requeuer.run_if_due()
+            requeue_stale.assert_called_once_with()
+
+    def test_stale_running_job_fails_after_max_attempts(self):
+        PaymentVerificationJob.objects.create(
+            merchant_uid=uuid4(),
+            status=PaymentVerificationJob.Status.RUNNING,
+            attempts=5,
+        )
+        PaymentVerificationJob.objects.update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        with mock.patch.object(settings, "PAYMENT_JOB_MAX_ATTEMPTS", 5):
+            self.assertEqual(PaymentVerificationJob.requeue_stale(), 0)
+        job = PaymentVerificationJob.objects.get()
+        self.assertEqual(job.status, PaymentVerificationJob.Status.FAILED)
+        self.assertEqual(job.last_error, "처리 중에 워커가 종료되었습니다.")
+
+
+class PortOneWebhookTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="buyer", password="password")
+        order = Order.objects.create(user=user, total_amount=1000)
+        cls.payment = OrderPayment.create_by_order(order)
+
+    def setUp(self):
+        # 웹훅 뷰는 모듈을 불러올 때 허용 IP 목록을 참조합니다.
+        settings.ALLOWED_WEBHOOK_IPS.append("127.0.0.1")
+        self.addCleanup(settings.ALLOWED_WEBHOOK_IPS.remove, "127.0.0.1")
+
+    def post_webhook(self, payload, webhook_id=None):
+        headers = {"webhook-id": webhook_id} if webhook_id else {}
+        return self.client.post(
+            reverse("webhook"),
+            json.dumps(payload) if isinstance(payload, dict) else payload,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    def get_payload(self, event_type="Transaction.Paid"):
+        return {
+            "type": event_type,
+            "timestamp": "2024-05-01T00:00:00Z",
+            "data": {"paymentId": str(self.payment.uid)},
+        }
+
+    def test_duplicate_delivery_is_ignored(self):
+        self.assertEqual(self.post_webhook(self.get_payload(), "wh-1").status_code, 200)
+        # 재전송은 이벤트 식별자 조회 한 번으로 응답합니다.
+        with self.assertNumQueries(1):
+            response = self.post_webhook(self.get_payload(), "wh-1")
+        self.assertEqual(response.status_code, 200)
+
+        event = PortOneWebhookEvent.objects.get()
+        self.assertEqual(event.event_type, "Transaction.Paid")
+        self.assertEqual(event.payload, self.get_payload())
+        job = PaymentVerificationJob.objects.get()
+        self.assertEqual((job.merchant_uid, job.notified_count), (self.payment.uid, 1))
+
+        # 같은 결제건의 다른 이벤트는 따로 기록합니다.
+        self.post_webhook(self.get_payload("Transaction.Ready"), "wh-2")
+        self.assertEqual(PortOneWebhookEvent.objects.count(), 2)
+
+    def test_event_id_falls_back_to_body_hash(self):
+        self.post_webhook(self.get_payload())
+        self.post_webhook(self.get_payload())
+        self.assertEqual(PortOneWebhookEvent.objects.count(), 1)
+        self.assertTrue(
+            PortOneWebhookEvent.objects.get().event_id.startswith("sha256:")
+        )
+
+    def test_invalid_payload(self):
+        self.assertEqual(self.post_webhook("not json").status_code, 400)
+        self.assertEqual(self.post_webhook({"type": "x"}).status_code, 400)
+        payload = {"type": "x", "data": {"paymentId": "not-uuid"}}
+        self.assertEqual(self.post_webhook(payload).status_code, 400)
+        self.assertFalse(PortOneWebhookEvent.objects.exists())
+
+    def test_replay(self):
+        self.post_webhook(self.get_payload("Transaction.Ready"), "wh-1")
+        self.post_webhook(self.get_payload(), "wh-2")
+        PaymentVerificationJob.objects.all().delete()
+
+        call_command("replay_webhook_events", "--enqueue", stdout=StringIO())
+        self.assertEqual(
+            list(PaymentVerificationJob.objects.values_list("merchant_uid", flat=True)),
+            [self.payment.uid],
+        )
+
+        with PortOneStubServer() as server:
+            server.register(str(self.payment.uid), amount=1000)
+            with override_settings(PORTONE_API_BASE_URL=server.url):
+                call_command(
+                    "replay_webhook_events",
+                    "--type",
+                    "Transaction.Paid",
+                    stdout=StringIO(),
+                )
+            self.assertEqual(server.request_count, 1)
+        self.payment.order.refresh_from_db()
+        self.assertEqual(self.payment.order.status, Order.Status.PAID)
+
+
+class PortOneClientRetryTest(TestCase):
+    def setUp(self):
+        self.portone_client = PortOneClient(
+            "test", base_url="http://portone.test", max_retries=2, backoff_max=2.0
+        )
+        self.addCleanup(self.portone_client.close)
+        sleep_patcher = mock.patch("mall.portone.time.sleep")
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def mock_session(self, *result_list):
+        return mock.patch.object(
+            self.portone_client.session, "request", side_effect=result_list
+        )
+
+    @staticmethod
+    def make_response(status_code, headers=None):
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers or {})
+        response._content = json.dumps({"status": "PAID"}).encode()
+        response.raw = BytesIO()
+        return response
+
+    def test_full_jitter_backoff(self):
+        with mock.patch("mall.portone.random.uniform", side_effect=lambda a, b: b):
+            self.assertEqual(
+                [self.portone_client.get_backoff(attempt) for attempt in range(6)],
+                [0.2, 0.4, 0.8, 1.6, 2.0, 2.0],
+            )
+        for attempt in range(6):
+            self.assertLessEqual(self.portone_client.get_backoff(attempt), 2.0)
+        # Retry-After 헤더를 우선하되 최대 대기 시간을 넘지 않습니다.
+        self.assertEqual(self.portone_client.get_backoff(0, retry_after=1.5), 1.5)
+        self.assertEqual(self.portone_client.get_backoff(0, retry_after=30), 2.0)
+
+    def test_get_retries_server_error(self):
+        with self.mock_session(
+            self.make_response(503), self.make_response(502), self.make_response(200)
+        ) as request:
+            self.assertEqual(self.portone_client.get_payment("p-1"), {"status": "PAID"})
+        self.assertEqual(request.call_count, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_get_raises_after_retries(self):
+        with PortOneStubServer(error_rate=1.0) as server:
+            client = PortOneClient("test", base_url=server.url, max_retries=2)
+            self.addCleanup(client.close)
+            with self.assertRaises(PortOneError) as context:
+                client.get_payment("p-1")
+            self.assertEqual(server.request_count, 3)
+        self.assertEqual(context.exception.status_code, 503)
+
+        with self.mock_session(*[requests.ConnectionError("refused")] * 3):
+            with self.assertRaisesMessage(PortOneError, "포트원 API 연결 실패"):
+                self.portone_client.get_payment("p-1")
+
+    def test_cancel_is_not_retried_on_server_error(self):
+        with self.mock_session(self.make_response(503)) as request:
+            response = self.portone_client.cancel_payment("p-1", "reason")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(request.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_cancel_is_not_retried_on_read_timeout(self):
+        # 포트원이 취소를 처리했지만 응답만 늦었을 수 있습니다.
+        with self.mock_session(requests.ReadTimeout("timeout")) as request:
+            with self.assertRaisesMessage(PortOneError, "포트원 API 요청 실패"):
+                self.portone_client.cancel_payment("p-1", "reason")
+        self.assertEqual(request.call_count, 1)
+
+    def test_cancel_is_retried_on_connect_timeout(self):
+        with self.mock_session(
+            requests.ConnectTimeout("timeout"), self.make_response(200)
+        ) as request:
+            response = self.portone_client.cancel_payment("p-1", "reason")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(request.call_count, 2)
+
+    def test_cancel_is_retried_on_too_many_requests(self):
+        with self.mock_session(
+            self.make_response(429, {"Retry-After": "0.5"}), self.make_response(200)
+        ) as request:
+            response = self.portone_client.cancel_payment("p-1", "reason")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(request.call_count, 2)
+        self.sleep.assert_called_once_with(0.5)
+
+
+class PortOnePaymentCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        portone_cache.reset_cache_stats()
+        self.server = PortOneStubServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(
+            PORTONE_API_SECRET="test", PORTONE_API_BASE_URL=self.server.url
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_read_through(self):
+        self.server.register("paid-1", status="PAID", amount=1000)
+        for __ in range(3):
+            meta = portone_cache.get_payment("paid-1")
+        self.assertEqual(meta["amount"]["total"], 1000)
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(
+            portone_cache.get_cache_stats(),
+            {"hits": 2, "misses": 1, "coalesced": 0, "hit_ratio": 2 / 3},
+        )
+
+    @override_settings(PORTONE_PAYMENT_CACHE_TTL=0)
+    def test_pending_status_uses_short_ttl(self):
+        self.server.register("ready-1", status="READY")
+        portone_cache.get_payment("ready-1")
+        portone_cache.get_payment("ready-1")
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_concurrent_lookups_share_one_call(self):
+        self.server.latency = 0.2
+        thread_count = 5
+        barrier = threading.Barrier(thread_count)
+        result_list = []
+
+        def lookup():
+            barrier.wait()
+            result_list.append(portone_cache.get_payment("paid-1")["status"])
+
+        thread_list = [threading.Thread(target=lookup) for __ in range(thread_count)]
+        for thread in thread_list:
+            thread.start()
+        for thread in thread_list:
+            thread.join()
+
+        self.assertEqual(result_list, ["PAID"] * thread_count)
+        self.assertEqual(self.server.request_count, 1)
+        stats = portone_cache.get_cache_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"] + stats["coalesced"], thread_count - 1)
+
+    def test_async_concurrent_lookups_share_one_call(self):
+        self.server.latency = 0.1
+
+        async def lookup_many():
+            return await asyncio.gather(
+                *[portone_cache.aget_payment("paid-1") for __ in range(5)]
+            )
+
+        meta_list = asyncio.run(lookup_many())
+        self.assertEqual({meta["status"] for meta in meta_list}, {"PAID"})
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(portone_cache.get_cache_stats()["coalesced"], 4)
+
+    def test_webhook_with_new_status_invalidates(self):
+        portone_cache.get_payment("paid-1")
+        portone_cache.invalidate_stale_payment("paid-1", "Transaction.Paid")
+        portone_cache.get_payment("paid-1")
+        self.assertEqual(self.server.request_count, 1)
+
+        portone_cache.invalidate_stale_payment("paid-1", "Transaction.Cancelled")
+        portone_cache.get_payment("paid-1")
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_verification_job_ignores_cached_meta(self):
+        # 웹훅을 받은 프로세스와 캐시를 공유하지 않는 워커에 완료 상태가 캐시되어 있는 경우
+        user = User.objects.create_user(username="buyer")
+        order = Order.objects.create(
+            user=user, total_amount=1000, status=Order.Status.PAID
+        )
+        payment = OrderPayment.create_by_order(order)
+        self.server.register(payment.merchant_uid, status="PAID", amount=1000)
+        portone_cache.get_payment(payment.merchant_uid)
+        self.server.payments[payment.merchant_uid]["status"] = "CANCELLED"
+
+        PaymentVerificationJob.enqueue(payment.uid)
+        PaymentVerificationJob.claim_next().run()
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.pay_status, OrderPayment.PayStatus.CANCELLED)
+        self.assertEqual(payment.order.status, Order.Status.CANCELLED)
+        self.assertEqual(
+            PaymentVerificationJob.objects.get().status,
+            PaymentVerificationJob.Status.DONE,
+        )
+
+
+class ReconcilePaymentsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="buyer")
+        cls.payment_list = [
+            OrderPayment.create_by_order(
+                Order.objects.create(user=user, total_amount=1000)
+            )
+            for __ in range(5)
+        ]
+        OrderPayment.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        # 방금 만든 결제건은 결제창이 열려 있을 수 있으므로 대사하지 않습니다.
+        cls.recent_payment = OrderPayment.create_by_order(
+            Order.objects.create(user=user, total_amount=1000)
+        )
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.checkpoint_path = os.path.join(tmp_dir.name, "checkpoint.json")
+        self.requested_list = []
+        self.failed_uid = self.payment_list[1].merchant_uid
+        self.interrupt_uid = None
+
+    def get_payment(self, payment_id):
+        self.requested_list.append(payment_id)
+        if payment_id == self.interrupt_uid:
+            raise KeyboardInterrupt
+        if payment_id == self.failed_uid:
+            raise PortOneError("결제 조회 실패: NOT_FOUND", status_code=404)
+        return {"status": "PAID", "amount": {"total": 1000}}
+
+    def reconcile(self):
+        stdout = StringIO()
+        with mock.patch(
+            "mall.management.commands.reconcile_payments.get_client"
+        ) as get_client:
+            get_client.return_value.get_payment.side_effect = self.get_payment
+            call_command(
+                "reconcile_payments",
+                chunk_size=2,
+                workers=1,
+                checkpoint=self.checkpoint_path,
+                stdout=stdout,
+            )
+        return stdout.getvalue()
+
+    def test_resume_from_checkpoint(self):
+        # 두 번째 묶음을 조회하다 중단된 경우
+        self.interrupt_uid = self.payment_list[3].merchant_uid
+        with self.assertRaises(KeyboardInterrupt), self.assertLogs(
+            "mall.management.commands.reconcile_payments", "WARNING"
+        ) as logs:
+            self.reconcile()
+        self.assertIn(self.failed_uid, logs.output[0])
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        self.assertEqual(
+            (checkpoint["last_pk"], checkpoint["total"], checkpoint["failed"]),
+            (self.payment_list[1].pk, 2, 1),
+        )
+        self.assertEqual(
+            list(OrderPayment.objects.values_list("pay_status", flat=True)[:2]),
+            [OrderPayment.PayStatus.PAID, OrderPayment.PayStatus.READY],
+        )
+
+        self.interrupt_uid = None
+        self.requested_list = []
+        output = self.reconcile()
+        self.assertIn(
+            f"체크포인트에서 이어서 실행합니다. (pk > {checkpoint['last_pk']})", output
+        )
+        self.assertIn("대사 5건, 주문 상태 변경 4건, 조회 실패 1건", output)
+        # 이미 대사한 묶음과 최근 결제건은 다시 조회하지 않습니다.
+        self.assertEqual(
+            self.requested_list,
+            [payment.merchant_uid for payment in self.payment_list[2:]],
+        )
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+        self.assertEqual(
+            OrderPayment.objects.filter(pay_status=OrderPayment.PayStatus.PAID).count(),
+            4,
+        )
+        self.assertEqual(
+            Order.objects.filter(status=Order.Status.PAID).count(),
+            4,
+        )
+        # 조회에 실패한 결제건은 그대로 둡니다.
+        self.payment_list[1].refresh_from_db()
+        self.assertEqual(self.payment_list[1].pay_status, OrderPayment.PayStatus.READY)
+        self.recent_payment.refresh_from_db()
+        self.assertEqual(self.recent_payment.pay_status, OrderPayment.PayStatus.READY)
+
+
+class OrderPaymentAttemptTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", password="password")
+        cls.order = Order.objects.create(
+            user=cls.user, total_amount=1000, display_name="order"
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_order_pay(self):
+        return self.client.get(reverse("order_pay", args=[self.order.pk]))
+
+    def test_reload_reuses_ready_attempt(self):
+        response = self.get_order_pay()
+        payment = OrderPayment.objects.get()
+        self.assertContains(response, payment.merchant_uid)
+
+        response = self.get_order_pay()
+        self.assertContains(response, payment.merchant_uid)
+        self.assertEqual(OrderPayment.objects.count(), 1)
+
+    def test_amount_change_creates_new_attempt(self):
+        self.get_order_pay()
+        Order.objects.filter(pk=self.order.pk).update(total_amount=2000)
+        self.get_order_pay()
+        self.assertEqual(
+            sorted(OrderPayment.objects.values_list("desired_amount", flat=True)),
+            [1000, 2000],
+        )
+
+    # mall.models 는 PaymentPractice.settings 를 직접 참조하므로 override_settings 대신 patch 합니다.
+    @mock.patch.object(settings, "PAYMENT_MAX_ATTEMPTS_PER_ORDER", 2)
+    def test_attempt_limit(self):
+        for __ in range(2):
+            payment = OrderPayment.create_by_order(self.order)
+            payment.pay_status = OrderPayment.PayStatus.FAILED
+            payment.save()
+
+        response = self.get_order_pay()
+        self.assertRedirects(
+            response, self.order.get_absolute_url(), fetch_redirect_response=False
+        )
+        self.assertEqual(OrderPayment.objects.count(), 2)
+
+    def test_cleanup_payment_attempts(self):
+        stale = OrderPayment.create_by_order(self.order)
+        stale_failed = OrderPayment.create_by_order(self.order)
+        stale_failed.pay_status = OrderPayment.PayStatus.FAILED
+        stale_failed.save()
+        paid = OrderPayment.create_by_order(self.order)
+        paid.pay_status = OrderPayment.PayStatus.PAID
+        paid.is_paid_ok = True
+        paid.save()
+        OrderPayment.objects.update(created_at=timezone.now() - timedelta(days=2))
+        recent = OrderPayment.create_by_order(self.order)
+
+        call_command("cleanup_payment_attempts", batch_size=1, stdout=StringIO())
+        self.assertEqual(
+            set(OrderPayment.objects.values_list("pk", flat=True)),
+            {paid.pk, recent.pk},
+        )
+
+
+class AsyncPaymentViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", password="password")
+        cls.order = Order.objects.create(
+            user=cls.user, total_amount=1000, display_name="order"
+        )
+
+    def setUp(self):
+        cache.clear()
+        # URL 설정은 모듈을 불러올 때 MALL_ASYNC_VIEWS 로 뷰를 고르므로 다시 불러옵니다.
+        async_views_override = override_settings(MALL_ASYNC_VIEWS=True)
+        async_views_override.enable()
+        self.addCleanup(self.reload_urlconf)
+        self.addCleanup(async_views_override.disable)
+        self.reload_urlconf()
+
+        self.server = PortOneStubServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        portone_override = override_settings(
+            PORTONE_API_SECRET="test", PORTONE_API_BASE_URL=self.server.url
+        )
+        portone_override.enable()
+        self.addCleanup(portone_override.disable)
+
+        settings.ALLOWED_WEBHOOK_IPS.append("127.0.0.1")
+        self.addCleanup(settings.ALLOWED_WEBHOOK_IPS.remove, "127.0.0.1")
+
+    @staticmethod
+    def reload_urlconf():
+        # include() 한 URL 목록은 상위 URL 설정에 남아 있으므로 함께 다시 불러옵니다.
+        importlib.reload(mall_urls)
+        importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+        clear_url_caches()
+
+    def test_async_views_are_routed(self):
+        for url in [
+            reverse("order_pay", args=[1]),
+            reverse("order_check", args=[1, 1]),
+            reverse("webhook"),
+        ]:
+            self.assertTrue(iscoroutinefunction(resolve(url).func), url)
+
+    async def test_order_pay_reuses_ready_attempt(self):
+        await self.async_client.aforce_login(self.user)
+        url = reverse("order_pay", args=[self.order.pk])
+        response = await self.async_client.get(url)
+        payment = await OrderPayment.objects.aget()
+        self.assertContains(response, payment.merchant_uid)
+
+        response = await self.async_client.get(url)
+        self.assertContains(response, payment.merchant_uid)
+        self.assertEqual(await OrderPayment.objects.acount(), 1)
+
+    async def test_order_check_updates_status(self):
+        await self.async_client.aforce_login(self.user)
+        payment = await sync_to_async(OrderPayment.create_by_order)(self.order)
+        self.server.register(payment.merchant_uid, status="PAID", amount=1000)
+        url = reverse("order_check", args=[self.order.pk, payment.pk])
+
+        response = await self.async_client.get(url)
+        self.assertRedirects(
+            response,
+            reverse("order_detail", args=[self.order.pk]),
+            fetch_redirect_response=False,
+        )
+        await payment.arefresh_from_db()
+        self.assertTrue(payment.is_paid_ok)
+        order = await Order.objects.aget(pk=self.order.pk)
+        self.assertEqual(order.status, Order.Status.PAID)
+
+        self.server.payments[payment.merchant_uid]["status"] = "CANCELLED"
+        await sync_to_async(portone_cache.invalidate_payment)(payment.merchant_uid)
+        await self.async_client.get(url)
+        order = await Order.objects.aget(pk=self.order.pk)
+        self.assertEqual(order.status, Order.Status.CANCELLED)
+
+    async def test_webhook_ingest(self):
+        payment = await sync_to_async(OrderPayment.create_by_order)(self.order)
+        body = json.dumps(
+            {"type": "Transaction.Paid", "data": {"paymentId": payment.merchant_uid}}
+        )
+        for __ in range(2):
+            response = await self.async_client.post(
+                reverse("webhook"),
+                body,
+                content_type="application/json",
+                headers={"webhook-id": "wh-1"},
+            )
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(await PortOneWebhookEvent.objects.acount(), 1)
+        job = await PaymentVerificationJob.objects.aget()
+        self.assertEqual(job.merchant_uid, payment.uid)
+        # 웹훅 요청 안에서는 포트원을 호출하지 않습니다.
+        self.assertEqual(self.server.request_count, 0)
+
+
+class OrderTransitionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(
+            username="admin", password="password"
+        )
+        Order.objects.bulk_create(
+            [
+                Order(user=cls.admin_user, total_amount=1000, status=status)
+                for status in [Order.Status.PREPARED_PRODUCT] * 30
+                + [Order.Status.PAID] * 5
+            ]
+        )
+
+    def test_bulk_transition(self):
+        # SAVEPOINT, SELECT, SAVEPOINT, UPDATE, RELEASE SAVEPOINT, 이력 INSERT, RELEASE SAVEPOINT
+        # (행을 잠그지 않고 읽은 version 을 조건으로 UPDATE 합니다.)
+        with self.assertNumQueries(7):
+            result = Order.objects.all().mark_as_shipped(
+                changed_by=self.admin_user, reason="출고"
+            )
+        self.assertEqual((result.transitioned, result.rejected), (30, 5))
+        self.assertEqual(
+            sorted(result.rejected_pk_list),
+            sorted(
+                Order.objects.filter(status=Order.Status.PAID).values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
+        self.assertEqual(Order.objects.filter(status=Order.Status.SHIPPED).count(), 30)
+        self.assertEqual(
+            OrderStatusEvent.objects.filter(
+                from_status=Order.Status.PREPARED_PRODUCT,
+                to_status=Order.Status.SHIPPED,
+                changed_by=self.admin_user,
+                reason="출고",
+            ).count(),
+            30,
+        )
+
+    def test_instance_transition(self):
+        order = Order.objects.filter(status=Order.Status.PAID).first()
+        with self.assertRaises(ValueError):
+            order.mark_as_shipped()
+        order.mark_as_prepared()
+        self.assertEqual(order.status, Order.Status.PREPARED_PRODUCT)
+        self.assertEqual(order.status_events.count(), 1)
+
+    def test_bulk_transition_with_concurrent_writers(self):
+        order_list = list(Order.objects.filter(status=Order.Status.PREPARED_PRODUCT))
+        edited_order, cancelled_order = order_list[:2]
+        get_status_rows = OrderQuerySet.get_status_rows
+
+        def get_status_rows_then_write(qs):
+            row_list = get_status_rows(qs)
+            # 읽은 직후 다른 곳에서 한 주문은 상태 외의 이유로, 한 주문은 상태를 바꾼 경우
+            Order.objects.filter(pk=edited_order.pk).update(version=F("version") + 1)
+            cancelled_order.change_status(Order.Status.CANCELLED)
+            return row_list
+
+        with mock.patch.object(
+            OrderQuerySet, "get_status_rows", get_status_rows_then_write
+        ):
+            result = Order.objects.all().mark_as_shipped()
+
+        self.assertEqual((result.transitioned, result.rejected), (29, 6))
+        self.assertIn(cancelled_order.pk, result.rejected_pk_list)
+        self.assertEqual(Order.objects.get(pk=edited_order.pk).version, 2)
+        self.assertEqual(
+            OrderStatusEvent.objects.filter(to_status=Order.Status.SHIPPED).count(), 29
+        )
+        self.assertFalse(
+            OrderStatusEvent.objects.filter(
+                order=cancelled_order, to_status=Order.Status.SHIPPED
+            ).exists()
+        )
+
+    def test_change_status_rechecks_stale_instance(self):
+        order = Order.objects.filter(status=Order.Status.PAID).first()
+        stale_order = Order.objects.get(pk=order.pk)
+        order.change_status(Order.Status.PREPARED_PRODUCT)
+        order.change_status(Order.Status.SHIPPED)
+
+        # 오래된 인스턴스는 최신 상태를 다시 읽고 전이표로 검사합니다.
+        with self.assertRaises(OrderStatusTransitionError):
+            stale_order.change_status(Order.Status.PREPARED_PRODUCT)
+        self.assertEqual(stale_order.status, Order.Status.SHIPPED)
+        self.assertFalse(stale_order.change_status(Order.Status.SHIPPED))
+        self.assertTrue(stale_order.change_status(Order.Status.DELIVERED))
+        self.assertEqual(
+            list(order.status_events.values_list("to_status", flat=True)),
+            [
+                Order.Status.PREPARED_PRODUCT,
+                Order.Status.SHIPPED,
+                Order.Status.DELIVERED,
+            ],
+        )
+
+    def test_late_payment_webhook_does_not_revert_shipped_order(self):
+        order = Order.objects.filter(status=Order.Status.PREPARED_PRODUCT).first()
+        order.change_status(Order.Status.SHIPPED)
+        payment = OrderPayment.create_by_order(order)
+        payment.order = Order.objects.get(pk=order.pk)
+        payment.apply_portone_meta({"status": "PAID", "amount": {"total": 1000}})
+        with self.assertLogs("mall.models", level="WARNING"):
+            payment.save_portone_check()
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.Status.SHIPPED)
+
+    def test_admin_status_choices_follow_transitions(self):
+        order = Order.objects.filter(status=Order.Status.PAID).first()
+        self.client.force_login(self.admin_user)
+        response = self.client.get(reverse("admin:mall_order_change", args=[order.pk]))
+        self.assertEqual(
+            [
+                value
+                for value, label in response.context["adminform"]
+                .form.fields["status"]
+                .choices
+            ],
+            [Order.Status.PAID, Order.Status.PREPARED_PRODUCT, Order.Status.CANCELLED],
+        )
+
+    def get_admin_change_data(self, order, **data):
+        response = self.client.get(reverse("admin:mall_order_change", args=[order.pk]))
+        form = response.context["adminform"].form
+        post_data = {
+            name: form[name].value()
+            for name in form.fields
+            if form[name].value() is not None
+        }
+        for inline_formset in response.context["inline_admin_formsets"]:
+            management_form = inline_formset.formset.management_form
+            post_data.update(
+                {
+                    management_form.add_prefix(name): value
+                    for name, value in management_form.initial.items()
+                }
+            )
+        post_data.update(data)
+        return post_data
+
+    def test_admin_change_status(self):
+        order = Order.objects.filter(status=Order.Status.PAID).first()
+        self.client.force_login(self.admin_user)
+        data = self.get_admin_change_data(
+            order, status=Order.Status.PREPARED_PRODUCT, display_name="변경"
+        )
+        response = self.client.post(
+            reverse("admin:mall_order_change", args=[order.pk]), data
+        )
+        self.assertRedirects(response, reverse("admin:mall_order_changelist"))
+        order.refresh_from_db()
+        self.assertEqual(
+            (order.status, order.display_name), (Order.Status.PREPARED_PRODUCT, "변경")
+        )
+        self.assertTrue(order.status_events.filter(changed_by=self.admin_user))
+
+    def test_admin_rejects_status_changed_elsewhere(self):
+        order = Order.objects.filter(status=Order.Status.PAID).first()
+        self.client.force_login(self.admin_user)
+        data = self.get_admin_change_data(
+            order, status=Order.Status.PREPARED_PRODUCT, display_name="변경"
+        )
+        # 폼을 연 뒤 다른 곳에서 주문이 취소된 경우
+        Order.objects.filter(pk=order.pk).update(status=Order.Status.CANCELLED)
+        response = self.client.post(
+            reverse("admin:mall_order_change", args=[order.pk]), data
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("status", response.context["adminform"].form.errors)
+        # 다른 항목도 저장하지 않습니다.
+        order.refresh_from_db()
+        self.assertEqual(
+            (order.status, order.display_name), (Order.Status.CANCELLED, "")
+        )
+
+    def test_admin_rolls_back_when_status_changes_during_save(self):
+        order = Order.objects.filter(status=Order.Status.PAID).first()
+        self.client.force_login(self.admin_user)
+        data = self.get_admin_change_data(
+            order, status=Order.Status.PREPARED_PRODUCT, display_name="변경"
+        )
+        # 폼 검증이 끝난 뒤 저장하는 사이에 다른 곳에서 상태가 바뀐 경우
+        error = OrderStatusTransitionError(
+            Order.Status.CANCELLED, Order.Status.PREPARED_PRODUCT
+        )
+        with mock.patch.object(
+            Order, "change_status", side_effect=error
+        ), self.assertRaises(OrderStatusTransitionError):
+            self.client.post(reverse("admin:mall_order_change", args=[order.pk]), data)
+        # 다른 항목만 저장하지 않고 함께 되돌립니다.
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.display_name), (Order.Status.PAID, ""))
+
+    def test_admin_action(self):
+        self.client.force_login(self.admin_user)
+        response = self.client.post(
+            reverse("admin:mall_order_changelist"),
+            {
+                "action": "mark_as_shipped",
+                "_selected_action": list(Order.objects.values_list("pk", flat=True)),
+            },
+            follow=True,
+        )
+        message_list = [str(message) for message in response.context["messages"]]
+        self.assertEqual(len(message_list), 2)
+        self.assertIn("30개의 주문이 배송 중", message_list[0])
+        self.assertIn("5개의 주문은 변경하지 않았습니다", message_list[1])
+
+    def test_transition_orders_command(self):
+        pk_list = list(
+            Order.objects.filter(status=Order.Status.PREPARED_PRODUCT).values_list(
+                "pk", flat=True
+            )
+        )
+        paid_pk = Order.objects.filter(status=Order.Status.PAID).first().pk
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, "shipped.csv")
+            rejected_path = os.path.join(tmp_dir, "rejected.csv")
+            with open(csv_path, "w") as f:
+                f.write("order_id,tracking_no\n")
+                for pk in pk_list + [paid_pk, 999999, pk_list[0]]:
+                    f.write(f"{pk},T{pk}\n")
+
+            call_command(
+                "transition_orders",
+                csv_path,
+                to="SHIPPED",
+                batch_size=7,
+                rejected_output=rejected_path,
+                stdout=StringIO(),
+            )
+            with open(rejected_path) as f:
+                rejected = f.read().splitlines()
+
+        self.assertEqual(Order.objects.filter(status=Order.Status.SHIPPED).count(), 30)
+        self.assertEqual(OrderStatusEvent.objects.count(), 30)
+        self.assertEqual(
+            rejected, ["order_id,reason", f"{paid_pk},status", "999999,missing"]
+        )
+
+
+class PaymentCancellationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(
+            username="admin", password="password"
+        )
+        cls.payment_list = []
+        for __ in range(3):
+            order = Order.objects.create(
+                user=cls.admin_user, total_amount=1000, status=Order.Status.PAID
+            )
+            payment = OrderPayment.create_by_order(order)
+            payment.pay_status = OrderPayment.PayStatus.PAID
+            payment.is_paid_ok = True
+            payment.save()
+            cls.payment_list.append(payment)
+        cls.unpaid_order = Order.objects.create(user=cls.admin_user, total_amount=1000)
+
+    def setUp(self):
+        cache.clear()
+        self.server = PortOneStubServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(
+            PORTONE_API_SECRET="test", PORTONE_API_BASE_URL=self.server.url
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for payment in self.payment_list:
+            self.server.register(payment.merchant_uid, status="PAID", amount=1000)
+
+    def run_next(self) -> PaymentCancellation:
+        cancellation = PaymentCancellation.claim_next()
+        cancellation.run()
+        cancellation.refresh_from_db()
+        return cancellation
+
+    def test_admin_action_enqueues_batch(self):
+        self.client.force_login(self.admin_user)
+        response = self.client.post(
+            reverse("admin:mall_order_changelist"),
+            {
+                "action": "make_cancel",
+                "_selected_action": list(Order.objects.values_list("pk", flat=True)),
+            },
+            follow=True,
+        )
+        message_list = [str(message) for message in response.context["messages"]]
+        self.assertEqual(len(message_list), 1)
+        self.assertIn("3건의 결제 취소를 요청하였습니다", message_list[0])
+
+        batch = CancellationBatch.objects.get()
+        self.assertEqual((batch.total_count, batch.requested_by), (3, self.admin_user))
+        # 관리자 요청 안에서는 포트원을 호출하지 않습니다.
+        self.assertEqual(self.server.request_count, 0)
+
+    def test_active_cancellation_is_not_enqueued_twice(self):
+        CancellationBatch.enqueue_orders(Order.objects.all(), "first")
+        batch = CancellationBatch.enqueue_orders(Order.objects.all(), "second")
+        self.assertEqual(batch.total_count, 0)
+        self.assertIsNotNone(batch.finished_at)
+
+    def test_full_cancel(self):
+        payment = self.payment_list[0]
+        batch = CancellationBatch.enqueue([(payment.pk, None)], "recall")
+
+        cancellation = self.run_next()
+        self.assertEqual(cancellation.status, PaymentCancellation.Status.SUCCEEDED)
+        payment.refresh_from_db()
+        self.assertEqual(payment.pay_status, OrderPayment.PayStatus.CANCELLED)
+        self.assertEqual(payment.cancelled_amount, 1000)
+        self.assertEqual(payment.order.status, Order.Status.CANCELLED)
+
+        batch.refresh_from_db()
+        self.assertEqual((batch.succeeded_count, batch.progress), (1, "1/1"))
+        self.assertIsNotNone(batch.finished_at)
+
+    def test_partial_cancel(self):
+        payment = self.payment_list[0]
+        CancellationBatch.enqueue([(payment.pk, 300)], "partial")
+        self.run_next()
+        payment.refresh_from_db()
+        self.assertEqual(payment.pay_status, OrderPayment.PayStatus.PARTIAL_CANCELLED)
+        self.assertEqual(payment.cancelled_amount, 300)
+        self.assertEqual(payment.order.status, Order.Status.PAID)
+
+        CancellationBatch.enqueue([(payment.pk, None)], "rest")
+        self.run_next()
+        payment.refresh_from_db()
+        self.assertEqual(payment.pay_status, OrderPayment.PayStatus.CANCELLED)
+        self.assertEqual(payment.cancelled_amount, 1000)
+        self.assertEqual(
+            self.server.payments[payment.merchant_uid]["amount"]["cancelled"], 1000
+        )
+
+    def test_rejected_cancel_records_error_code(self):
+        payment = self.payment_list[0]
+        self.server.payments[payment.merchant_uid]["status"] = "CANCELLED"
+        batch = CancellationBatch.enqueue([(payment.pk, None)], "recall")
+
+        cancellation = self.run_next()
+        self.assertEqual(cancellation.status, PaymentCancellation.Status.FAILED)
+        self.assertEqual(cancellation.error_code, "PAYMENT_ALREADY_CANCELLED")
+        self.assertEqual(cancellation.error_message, "결제가 이미 취소되었습니다.")
+        batch.refresh_from_db()
+        self.assertEqual((batch.failed_count, batch.progress), (1, "1/1"))
+
+    def test_server_error_is_retried(self):
+        payment = self.payment_list[0]
+        CancellationBatch.enqueue([(payment.pk, None)], "recall")
+        self.server.error_rate = 1.0
+
+        cancellation = self.run_next()
+        self.assertEqual(cancellation.status, PaymentCancellation.Status.PENDING)
+        self.assertEqual(cancellation.error_code, "SERVICE_UNAVAILABLE")
+        self.assertGreater(cancellation.available_at, timezone.now())
+
+    def test_retry_checks_portone_before_cancelling(self):
+        # 앞선 시도의 취소는 포트원에서 처리되었지만 응답을 받지 못한 경우
+        payment = self.payment_list[0]
+        CancellationBatch.enqueue([(payment.pk, None)], "recall")
+        PaymentCancellation.objects.update(attempts=1, cancelled_amount_before=0)
+        self.server.payments[payment.merchant_uid]["status"] = "CANCELLED"
+        self.server.payments[payment.merchant_uid]["amount"]["cancelled"] = 1000
+
+        cancellation = self.run_next()
+        self.assertEqual(cancellation.status, PaymentCancellation.Status.SUCCEEDED)
+        # 결제 조회만 하고 취소는 다시 요청하지 않습니다.
+        self.assertEqual(self.server.request_count, 1)
+        payment.refresh_from_db()
+        self.assertEqual(payment.pay_status, OrderPayment.PayStatus.CANCELLED)
+        self.assertEqual(payment.order.status, Order.Status.CANCELLED)
+
+    def test_stale_running_cancellation_is_requeued(self):
+        # 워커가 포트원 취소 요청을 보낸 뒤 결과를 기록하기 전에 종료된 경우
+        payment = self.payment_list[0]
+        batch = CancellationBatch.enqueue([(payment.pk, None)], "recall")
+        cancellation = PaymentCancellation.claim_next()
+        cancellation.cancelled_amount_before = 0
+        cancellation.save(update_fields=["cancelled_amount_before"])
+        self.server.payments[payment.merchant_uid]["status"] = "CANCELLED"
+        self.server.payments[payment.merchant_uid]["amount"]["cancelled"] = 1000
+
+        # 처리 중인 작업은 임대 시간이 지나기 전까지 다시 선점하지 않습니다.
+        self.assertIsNone(PaymentCancellation.claim_next())
+        # 같은 결제건의 새 취소 요청도 처리 중인 작업에 막힙니다.
+        self.assertEqual(
+            CancellationBatch.enqueue([(payment.pk, None)], "again").total_count, 0
+        )
+
+        PaymentCancellation.objects.filter(pk=cancellation.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(PaymentCancellation.requeue_stale(), 1)
+        cancellation = self.run_next()
+        self.assertEqual(cancellation.attempts, 2)
+        self.assertEqual(cancellation.status, PaymentCancellation.Status.SUCCEEDED)
+        # 결제 조회만 하고 취소는 다시 요청하지 않습니다.
+        self.assertEqual(self.server.request_count, 1)
+        batch.refresh_from_db()
+        self.assertIsNotNone(batch.finished_at)
+
+    def test_stale_running_cancellation_fails_after_max_attempts(self):
+        payment = self.payment_list[0]
+        batch = CancellationBatch.enqueue([(payment.pk, None)], "recall")
+        PaymentCancellation.objects.update(
+            status=PaymentCancellation.Status.RUNNING,
+            attempts=5,
+            updated_at=timezone.now() - timedelta(hours=1),
+        )
+
+        with mock.patch.object(settings, "PAYMENT_CANCEL_MAX_ATTEMPTS", 5):
+            self.assertEqual(PaymentCancellation.requeue_stale(), 0)
+        cancellation = PaymentCancellation.objects.get()
+        self.assertEqual(cancellation.status, PaymentCancellation.Status.FAILED)
+        self.assertEqual(cancellation.error_code, "LEASE_EXPIRED")
+        batch.refresh_from_db()
+        self.assertEqual((batch.failed_count, batch.progress), (1, "1/1"))
+        # 실패로 끝났으므로 다시 취소를 요청할 수 있습니다.
+        self.assertEqual(
+            CancellationBatch.enqueue([(payment.pk, None)], "again").total_count, 1
+        )
+
+    def test_rate_limiter(self):
+        rate_limiter = RateLimiter(rate=50)
+        started_at = time.monotonic()
+        thread_list = [threading.Thread(target=rate_limiter.acquire) for __ in range(6)]
+        for thread in thread_list:
+            thread.start()
+        for thread in thread_list:
+            thread.join()
+        # 첫 호출 이후 5번은 1/50 초씩 기다립니다.
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.09)
+
+
+class ProcessCancellationsCommandTest(TransactionTestCase):
+    def test_process_batch(self):
+        user = User.objects.create_user(username="buyer")
+        with PortOneStubServer() as server, override_settings(
+            PORTONE_API_SECRET="test", PORTONE_API_BASE_URL=server.url
+        ):
+            payment_amount_list = []
+            for __ in range(5):
+                order = Order.objects.create(user=user, total_amount=1000)
+                payment = OrderPayment.create_by_order(order)
+                payment.pay_status = OrderPayment.PayStatus.PAID
+                payment.save()
+                server.register(payment.merchant_uid, status="PAID", amount=1000)
+                payment_amount_list.append((payment.pk, None))
+            batch = CancellationBatch.enqueue(payment_amount_list, "recall")
+            # 이전 실행에서 선점한 뒤 워커가 종료된 작업
+            PaymentCancellation.objects.filter(
+                pk=PaymentCancellation.objects.order_by("pk")[0].pk
+            ).update(
+                status=PaymentCancellation.Status.RUNNING,
+                attempts=1,
+                updated_at=timezone.now() - timedelta(hours=1),
+            )
+
+            stdout = StringIO()
+            call_command(
+                "process_cancellations",
+                workers=1,
+                rate=0,
+                once=True,
+                stdout=stdout,
+            )
+
+        self.assertIn("처리 중에 멈춘 작업 1건", stdout.getvalue())
+        batch.refresh_from_db()
+        self.assertEqual((batch.succeeded_count, batch.failed_count), (5, 0))
+        self.assertIsNotNone(batch.finished_at)
+        self.assertEqual(
+            OrderPayment.objects.filter(
+                pay_status=OrderPayment.PayStatus.CANCELLED
+            ).count(),
+            5,
+        )
+
+
+class ExplainHotQueriesTest(TestCase):
+    def test_hot_queries_use_indexes(self):
+        stdout = StringIO()
+        call_command("explain_hot_queries", check=True, stdout=stdout)
+        plan = stdout.getvalue()
+        self.assertIn("mall_order_user_id_idx", plan)
+        self.assertIn("mall_product_active_id_idx", plan)
+
+    def test_check_fails_without_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX mall_order_user_id_idx")
+        with self.assertRaisesMessage(CommandError, "order_list"):
+            call_command(
+                "explain_hot_queries", "order_list", check=True, stdout=StringIO()
+            )
+
+
+@override_settings(MALL_PROFILING_SAMPLE_RATE=1.0)
+class RequestProfilingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="buyer", password="password")
+        category = Category.objects.create(name="category")
+        Product.objects.create(category=category, name="product", price=1000)
+
+    def setUp(self):
+        cache.clear()
+        profiling.reset_histograms()
+        self.addCleanup(profiling.reset_histograms)
+
+    def get_profile_record(self, url):
+        with self.assertLogs("mall.profiling", level="INFO") as logs:
+            self.client.get(url)
+        self.assertEqual(len(logs.records), 1)
+        return logs.records[0]
+
+    def test_request_is_profiled(self):
+        record = self.get_profile_record(reverse("product_list"))
+        self.assertEqual(record.view_name, "product_list")
+        self.assertEqual(record.status_code, 200)
+        self.assertGreater(record.query_count, 0)
+        self.assertEqual(record.portone_count, 0)
+
+    def test_portone_calls_are_counted(self):
+        order = Order.objects.create(user=self.user, total_amount=1000)
+        payment = OrderPayment.create_by_order(order)
+        self.client.force_login(self.user)
+        with PortOneStubServer() as server, override_settings(
+            PORTONE_API_SECRET="test", PORTONE_API_BASE_URL=server.url
+        ):
+            server.register(str(payment.uid), amount=1000)
+            record = self.get_profile_record(
+                reverse("order_check", args=[order.pk, payment.pk])
+            )
+        self.assertEqual(record.view_name, "order_check")
+        self.assertEqual(record.status_code, 302)
+        self.assertEqual(record.portone_count, 1)
+        self.assertGreater(record.portone_ms, 0)
+
+    @override_settings(MALL_PROFILING_SAMPLE_RATE=0.0)
+    def test_not_sampled(self):
+        with self.assertNoLogs("mall.profiling"):
+            self.client.get(reverse("product_list"))
+        self.assertNotIn("view=", "\n".join(profiling.render_histograms()))
+
+    def test_metrics(self):
+        self.client.get(reverse("product_list"))
+        PaymentVerificationJob.objects.create(merchant_uid=uuid4())
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn(
+            'mall_request_queries_bucket{view="product_list",le="+Inf"} 1', body
+        )
+        self.assertIn(
+            'mall_request_duration_seconds_count{view="product_list"} 1', body
+        )
+        self.assertIn('mall_payment_jobs{status="PENDING"} 1', body)
+        self.assertIn("mall_portone_cache_hits_total", body)
+
+    def test_metrics_from_untrusted_host(self):
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 403)
@@ -1,7 +1,17 @@
+from django.conf import settings
 from django.urls import path, include
 
 from . import views, decorators
 
+if settings.MALL_ASYNC_VIEWS:
+    order_pay = views.async_order_pay
+    order_check = views.async_order_check
+    portone_webhook = decorators.async_portone_webhook
+else:
+    order_pay = views.order_pay
+    order_check = views.order_check
+    portone_webhook = decorators.portone_webhook
+
 urlpatterns = [
     path("", views.product_list, name="product_list"),
     path("product/<int:pk>/", views.product_detail, name="product_detail"),
@@ -9,14 +19,15 @@ urlpatterns = [
     path("order/", views.order_list, name="order_list"),
     path("cart/", views.cart_detail, name="cart_detail"),
     path("order/new/", views.order_new, name="order_new"),
-    path("order/<int:pk>/pay/", views.order_pay, name="order_pay"),
+    path("order/<int:pk>/pay/", order_pay, name="order_pay"),
     path(
         "order/<int:order_pk>/check/<int:payment_pk>/",
-        views.order_check,
+        order_check,
         name="order_check",
     ),
     path("order/<int:pk>/", views.order_detail, name="order_detail"),
-    path("webhook/", decorators.portone_webhook, name="webhook"),
+    path("webhook/", portone_webhook, name="webhook"),
     path("ckeditor5/", include("django_ckeditor_5.urls")),
     path("product/<int:product_pk>/comment/", views.add_comment, name="add_comment"),
+    path("metrics/", views.metrics, name="metrics"),
 ]
@@ -1,21 +1,37 @@
 import json
 
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.db.models.query import QuerySet
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, get_object_or_404, redirect, aget_object_or_404
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.views.generic import ListView, DetailView
-from django.forms import modelformset_factory
-from django.http import HttpResponse, HttpResponseForbidden
+from django.forms import formset_factory
+from django.http import Http404, HttpResponse, HttpResponseForbidden
 
 from PaymentPractice import settings
-from mall.forms import CartProductForm, CommentForm, ProductOptionForm
-from mall.models import Product, CartProduct, Order, OrderPayment, ProductOption
+from mall import cart, profiling
+from mall.cache import get_catalog_version
+from mall.decorators import deny_from_untrusted_hosts
+from mall.forms import CartLineForm, CommentForm, ProductOptionForm
+from mall.models import (
+    OutOfStockError,
+    PaymentAttemptLimitError,
+    PaymentVerificationJob,
+    Product,
+    Order,
+    OrderPayment,
+)
+from mall.pagination import paginate_by_cursor
+from mall.portone_cache import get_cache_stats
+from mall.search import search_products
 
 ALLOWED_WEBHOOK_IPS = ["52.78.5.241"]
+ORDER_LIST_PAGINATE_BY = 10
 
 
 @login_required
@@ -37,10 +53,8 @@ def add_comment(request, product_pk):
 # Create your views here.
 class ProductListview(ListView):
     model = Product
-    queryset = (
-        Product.objects.filter(status=Product.Status.ACTIVE)
-        .select_related("category")
-        .prefetch_related("images")
+    queryset = Product.objects.filter(status=Product.Status.ACTIVE).select_related(
+        "category"
     )
     paginate_by = 4
 
@@ -48,9 +62,24 @@ class ProductListview(ListView):
         qs = super().get_queryset()
         query = self.request.GET.get("query")
         if query:
-            qs = qs.filter(name__icontains=query)
+            qs = search_products(qs, query)
         return qs
 
+    def paginate_queryset(self, queryset, page_size):
+        # 검색 결과는 관련도 순으로 정렬되므로 페이지 번호 방식을 사용합니다.
+        if settings.MALL_CURSOR_PAGINATION and not self.request.GET.get("query"):
+            page = paginate_by_cursor(self.request, queryset, page_size)
+            return None, page, page.object_list, page.has_other_pages()
+        return super().paginate_queryset(queryset, page_size)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # 상품 목록은 조각 캐시에 저장되므로 캐시가 유효하면 상품 조회 쿼리를 하지 않습니다.
+        context["catalog_version"] = get_catalog_version()
+        context["product_list_cache_timeout"] = settings.PRODUCT_LIST_CACHE_TIMEOUT
+        context["query"] = self.request.GET.get("query", "")
+        return context
+
 
 product_list = ProductListview.as_view()
 
@@ -71,85 +100,90 @@ class ProductDetailView(DetailView):
 product_detail = ProductDetailView.as_view()
 
 
-@login_required
 @require_POST
 def add_to_cart(request, product_pk):
     try:
         data = json.loads(request.body.decode("utf-8"))
         quantity = int(data.get("product_quantity", 1))
         selected_option_id = data.get("product_option")
-        product_qs = Product.objects.filter(status=Product.Status.ACTIVE)
-        product = get_object_or_404(product_qs, pk=product_pk)
-
-        if not selected_option_id:
-            return HttpResponse("옵션을 선택해 주세요.", status=400)
-
-        selected_option = get_object_or_404(ProductOption, pk=selected_option_id)
-
-        cart_product, is_created = CartProduct.objects.get_or_create(
-            user=request.user,
-            product=product,
-            option=selected_option,
-            defaults={"quantity": quantity},
-        )
+        if selected_option_id:
+            selected_option_id = int(selected_option_id)
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+        return HttpResponse("잘못된 요청입니다.", status=400)
 
-        if not is_created:
-            cart_product.quantity += quantity
-            cart_product.save()
+    if not selected_option_id:
+        return HttpResponse("옵션을 선택해 주세요.", status=400)
+    if quantity < 1:
+        return HttpResponse("수량은 1개 이상이어야 합니다.", status=400)
 
-        return HttpResponse("ok")
-
-    except json.JSONDecodeError:
-        return HttpResponse("잘못된 요청입니다.", status=400)
+    # 비회원은 세션의 장바구니에 담고, 로그인하면 회원 장바구니에 합칩니다. (mall.cart 참고)
+    store = cart.get_cart(request)
+    if store.add(product_pk, selected_option_id, quantity) is None:
+        raise Http404("판매 중인 상품의 옵션이 아닙니다.")
+    return HttpResponse("ok")
 
 
 @login_required
 def order_list(request):
-    order_qs = Order.objects.all().filter(user=request.user)
+    order_qs = Order.objects.filter(user=request.user).with_summary().order_by("-pk")
+    if settings.MALL_CURSOR_PAGINATION:
+        page_obj = paginate_by_cursor(request, order_qs, ORDER_LIST_PAGINATE_BY)
+    else:
+        paginator = Paginator(order_qs, ORDER_LIST_PAGINATE_BY)
+        page_obj = paginator.get_page(request.GET.get("page"))
     return render(
         request,
         "mall/order_list.html",
         {
-            "order_list": order_qs,
+            "order_list": page_obj.object_list,
+            "page_obj": page_obj,
         },
     )
 
 
-@login_required
 def cart_detail(request):
-    cart_products_qs = (
-        CartProduct.objects.filter(user=request.user)
-        .select_related("product")
-        .order_by("product__name")
-    )
+    store = cart.get_cart(request)
+    line_list = store.get_lines()
 
-    CartProductFormSet = modelformset_factory(
-        model=CartProduct,
-        form=CartProductForm,
-        can_delete=True,
-        extra=0,
-    )
+    CartLineFormSet = formset_factory(CartLineForm, can_delete=True, extra=0)
+    initial = [
+        {
+            "product_id": line.product.pk,
+            "option_id": line.option.pk if line.option else None,
+            "quantity": line.quantity,
+        }
+        for line in line_list
+    ]
     if request.method == "POST":
-        formset = CartProductFormSet(
-            data=request.POST,
-            queryset=cart_products_qs,
-        )
+        formset = CartLineFormSet(data=request.POST, initial=initial)
         if formset.is_valid():
-            formset.save()
+            quantity_dict = {
+                (data["product_id"], data["option_id"]): data["quantity"]
+                for data in initial
+            }
+            delete_key_list = []
+            for form in formset:
+                key = (form.cleaned_data["product_id"], form.cleaned_data["option_id"])
+                quantity = form.cleaned_data["quantity"]
+                if form.cleaned_data.get("DELETE"):
+                    delete_key_list.append(key)
+                elif key in quantity_dict and quantity_dict[key] != quantity:
+                    store.set_quantity(*key, quantity)
+            store.remove(delete_key_list)
             messages.success(request, "장바구니를 수정했습니다.")
             return redirect("cart_detail")
     else:
-        formset = CartProductFormSet(
-            queryset=cart_products_qs,
-        )
+        formset = CartLineFormSet(initial=initial)
 
-    total_price = sum(cart_product.amount for cart_product in cart_products_qs)
+    for form, line in zip(formset, line_list):
+        form.line = line
+    total_price = store.get_total(line_list)
 
     return render(
         request,
         "mall/cart_detail.html",
         {
-            "cart_products_list": cart_products_qs,
+            "cart_products_list": line_list,
             "formset": formset,
             "total_price": total_price,
         },
@@ -158,25 +192,66 @@ def cart_detail(request):
 
 @login_required
 def order_new(request):
-    cart_product_qs = CartProduct.objects.filter(user=request.user)
-
-    order = Order.create_from_cart(request.user, cart_product_qs)
-    # 장바구니 상품을 세션에 저장
-    request.session["cart_product_ids"] = list(
-        cart_product_qs.values_list("id", flat=True)
+    store = cart.get_cart(request)
+    try:
+        order = Order.create_from_cart(request.user, store)
+    except OutOfStockError as e:
+        messages.error(request, str(e))
+        return redirect("cart_detail")
+
+    # 결제가 끝나면 주문한 장바구니 상품만 지우도록, 주문에 담긴 상품/옵션을 세션에 저장합니다.
+    request.session["cart_line_keys"] = list(
+        order.orderedproduct_set.values_list("product_id", "option_id")
     )
-
     return redirect("order_pay", order.pk)
 
 
 @login_required()
 def order_pay(request, pk):
-    order = get_object_or_404(Order, pk=pk, user=request.user)
+    order = get_object_or_404(
+        Order.objects.select_related("user"), pk=pk, user=request.user
+    )
 
     if not order.can_pay():
         return redirect(order)
 
-    payment = OrderPayment.create_by_order(order)
+    try:
+        payment = OrderPayment.get_or_create_by_order(order)
+    except PaymentAttemptLimitError as e:
+        messages.error(request, str(e))
+        return redirect(order)
+    return render(
+        request,
+        "mall/order_pay.html",
+        get_order_pay_context(order, payment),
+    )
+
+
+@login_required
+async def async_order_pay(request, pk):
+    """order_pay 의 비동기 버전입니다. (MALL_ASYNC_VIEWS)"""
+    user = await request.auser()
+    order = await aget_object_or_404(
+        Order.objects.select_related("user"), pk=pk, user=user
+    )
+
+    if not order.can_pay():
+        return redirect(order)
+
+    try:
+        payment = await OrderPayment.aget_or_create_by_order(order)
+    except PaymentAttemptLimitError as e:
+        messages.error(request, str(e))
+        return redirect(order)
+    # 템플릿에서 request.user 를 지연 조회하므로 렌더링은 동기 컨텍스트에서 수행합니다.
+    return await sync_to_async(render)(
+        request,
+        "mall/order_pay.html",
+        get_order_pay_context(order, payment),
+    )
+
+
+def get_order_pay_context(order, payment):
     payment_props = {
         "merchant_uid": payment.merchant_uid,
         "name": payment.name,
@@ -184,17 +259,12 @@ def order_pay(request, pk):
         "buyer_email": payment.buyer_email,
         "buyer_name": payment.buyer_name,
     }
-
-    return render(
-        request,
-        "mall/order_pay.html",
-        {
-            "portone_shop_id": settings.PORTONE_SHOP_ID,
-            "payment_props": payment_props,
-            "next_url": reverse("order_check", args=[order.pk, payment.pk]),
-            "pre_url": reverse("cart_detail"),
-        },
-    )
+    return {
+        "portone_shop_id": settings.PORTONE_SHOP_ID,
+        "payment_props": payment_props,
+        "next_url": reverse("order_check", args=[order.pk, payment.pk]),
+        "pre_url": reverse("cart_detail"),
+    }
 
 
 @login_required()
@@ -203,8 +273,24 @@ def order_check(request, order_pk, payment_pk):
     payment.portone_check()
     if payment.is_paid_ok:
         # 결제가 성공했을 때만 장바구니 상품 삭제
-        cart_product_ids = request.session.pop("cart_product_ids", [])
-        CartProduct.objects.filter(id__in=cart_product_ids).delete()
+        cart_line_keys = request.session.pop("cart_line_keys", [])
+        cart.get_cart(request).remove(cart_line_keys)
+
+    return redirect("order_detail", order_pk)
+
+
+@login_required
+async def async_order_check(request, order_pk, payment_pk):
+    """order_check 의 비동기 버전입니다. (MALL_ASYNC_VIEWS)"""
+    user = await request.auser()
+    payment = await aget_object_or_404(
+        OrderPayment.objects.select_related("order"), pk=payment_pk, order__user=user
+    )
+    await payment.aportone_check()
+    if payment.is_paid_ok:
+        # 결제가 성공했을 때만 장바구니 상품 삭제
+        cart_line_keys = await request.session.apop("cart_line_keys", [])
+        await sync_to_async(cart.get_user_cart(user).remove)(cart_line_keys)
 
     return redirect("order_detail", order_pk)
 
@@ -219,3 +305,36 @@ def order_detail(request, pk):
             "order": order,
         },
     )
+
+
+@deny_from_untrusted_hosts(settings.MALL_METRICS_ALLOWED_IPS)
+def metrics(request):
+    """
+    Prometheus 텍스트 형식의 지표.
+
+    URL 이름별 요청 프로파일 히스토그램(mall.profiling)과 이 프로세스의 포트원 조회 캐시,
+    결제 검증 작업 큐 상태를 내보냅니다.
+    """
+    line_list = profiling.render_histograms()
+
+    cache_stats = get_cache_stats()
+    for name in ("hits", "misses", "coalesced"):
+        line_list.append(f"# TYPE mall_portone_cache_{name}_total counter")
+        line_list.append(f"mall_portone_cache_{name}_total {cache_stats[name]}")
+
+    queue_stats = PaymentVerificationJob.queue_stats()
+    line_list.append("# TYPE mall_payment_jobs gauge")
+    for status in PaymentVerificationJob.Status.values:
+        line_list.append(
+            f'mall_payment_jobs{{status="{status}"}} {queue_stats[status]}'
+        )
+    line_list.append("# TYPE mall_payment_jobs_oldest_pending_seconds gauge")
+    line_list.append(
+        "mall_payment_jobs_oldest_pending_seconds "
+        f"{queue_stats['oldest_pending_seconds']}"
+    )
+
+    return HttpResponse(
+        "\n".join(line_list) + "\n",
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
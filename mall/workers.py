@@ -0,0 +1,198 @@
+"""
+결제 검증/결제 취소 작업 워커와 상품 이미지 렌디션 워커.
+
+스레드/프로세스 어디에서든 실행될 수 있도록 모델은 함수 안에서 import 합니다.
+(spawn 방식의 프로세스에서는 django.setup() 이전에 이 모듈이 import 됩니다.)
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class StaleRequeuer:
+    """
+    리스 시간마다 한 번씩 model.requeue_stale() 을 호출합니다.
+
+    작업을 선점할 때마다 RUNNING 작업 전체를 훑지 않도록 워커 루프에서 run_if_due() 를
+    부릅니다. 명령이 시작할 때 한 번 호출하므로 첫 호출은 리스 시간이 지난 뒤입니다.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.interval = getattr(settings, model.LEASE_TIMEOUT_SETTING)
+        self.next_run_at = time.monotonic() + self.interval
+
+    def run_if_due(self) -> int:
+        now = time.monotonic()
+        if now < self.next_run_at:
+            return 0
+        self.next_run_at = now + self.interval
+        return self.model.requeue_stale()
+
+
+def run_payment_worker(stop_event, processed_counter, poll_interval=1.0, once=False):
+    """
+    결제 검증 작업을 하나씩 선점해서 처리합니다.
+
+    once=True 이면 처리할 작업이 없을 때 종료합니다.
+    """
+    from mall.models import PaymentVerificationJob
+
+    stale_requeuer = StaleRequeuer(PaymentVerificationJob)
+    try:
+        while not stop_event.is_set():
+            stale_requeuer.run_if_due()
+            job = PaymentVerificationJob.claim_next()
+            if job is None:
+                if once:
+                    break
+                stop_event.wait(poll_interval)
+                continue
+
+            try:
+                job.run()
+            except Exception as e:
+                logger.exception("결제 검증 작업 처리 실패: %s", job)
+                job.retry_or_fail(str(e))
+
+            with processed_counter.get_lock():
+                processed_counter.value += 1
+    finally:
+        connections.close_all()
+
+
+def run_payment_worker_process(*args, **kwargs):
+    if not apps.ready:
+        django.setup()
+    run_payment_worker(*args, **kwargs)
+
+
+class RateLimiter:
+    """
+    여러 스레드가 함께 쓰는 초당 호출 수 제한 (토큰 버킷).
+
+    rate 가 0 이하이면 제한하지 않습니다. burst 만큼은 기다리지 않고 연달아 호출할 수 있습니다.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def run_cancellation_worker(
+    stop_event, processed_counter, rate_limiter, poll_interval=1.0, once=False
+):
+    """
+    결제 취소 작업을 하나씩 선점해서 처리합니다.
+
+    포트원 취소 요청 전에 rate_limiter 를 거치므로 워커 수와 관계없이 호출 수가 제한됩니다.
+    once=True 이면 처리할 작업이 없을 때 종료합니다.
+    """
+    from mall.models import PaymentCancellation
+
+    stale_requeuer = StaleRequeuer(PaymentCancellation)
+    try:
+        while not stop_event.is_set():
+            stale_requeuer.run_if_due()
+            cancellation = PaymentCancellation.claim_next()
+            if cancellation is None:
+                if once:
+                    break
+                stop_event.wait(poll_interval)
+                continue
+
+            rate_limiter.acquire()
+            try:
+                cancellation.run()
+            except Exception as e:
+                logger.exception("결제 취소 작업 처리 실패: %s", cancellation)
+                cancellation.retry_or_fail("ERROR", str(e))
+
+            with processed_counter.get_lock():
+                processed_counter.value += 1
+    finally:
+        connections.close_all()
+
+
+_rendition_executor = None
+_rendition_executor_lock = threading.Lock()
+
+
+def get_rendition_executor() -> ThreadPoolExecutor:
+    global _rendition_executor
+    if _rendition_executor is None:
+        with _rendition_executor_lock:
+            if _rendition_executor is None:
+                _rendition_executor = ThreadPoolExecutor(
+                    max_workers=settings.MALL_IMAGE_RENDITION_WORKERS,
+                    thread_name_prefix="rendition",
+                )
+    return _rendition_executor
+
+
+def submit_image_renditions(product_image_pk):
+    """
+    상품 이미지의 렌디션 변환을 웹 프로세스의 백그라운드 스레드에 맡깁니다.
+
+    MALL_IMAGE_RENDITION_WORKERS 가 0 이면 generate_image_renditions 명령이 처리합니다.
+    프로세스가 변환 중에 종료되어도 이미지는 PENDING/RUNNING 상태로 남으며, RUNNING 은
+    MALL_IMAGE_RENDITION_LEASE_TIMEOUT 이 지나면 명령이 다시 변환합니다.
+    """
+    if settings.MALL_IMAGE_RENDITION_WORKERS <= 0:
+        return
+    get_rendition_executor().submit(run_image_rendition_thread, product_image_pk)
+
+
+def run_image_rendition_thread(product_image_pk):
+    try:
+        run_image_rendition(product_image_pk)
+    finally:
+        connections.close_all()
+
+
+def run_image_rendition(product_image_pk, spec_list=None) -> bool:
+    """렌디션을 만들고 성공 여부를 반환합니다. (선점하지 못했으면 False)"""
+    from mall.imaging import get_rendition_spec_list, render_renditions
+    from mall.models import ProductImage
+
+    if not ProductImage.claim(product_image_pk):
+        return False
+    product_image = ProductImage.objects.get(pk=product_image_pk)
+    try:
+        rendered_list = render_renditions(
+            product_image.read_image(), spec_list or get_rendition_spec_list()
+        )
+        product_image.save_renditions(rendered_list)
+    except Exception:
+        logger.exception("상품 이미지 렌디션 생성 실패: %s", product_image_pk)
+        product_image.mark_rendition_failed()
+        return False
+    return True
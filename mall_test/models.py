@@ -1,13 +1,11 @@
 import logging
 from uuid import uuid4
-import requests
 
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.http import Http404
 
-from iamport import Iamport
-from PaymentPractice import settings
+from mall.portone import PortOneError, get_client
 
 logger = logging.getLogger("portone")
 
@@ -45,17 +43,12 @@ class Payment(models.Model):
     # TODO: 포트원 REST API를 통해서 결제를 검증해야만 합니다.
     def portone_check(self, commit=True):
         try:
-            response = requests.get(
-                f"https://api.portone.io/payments/{self.merchant_uid}",
-                headers={"Authorization": f"PortOne {settings.PORTONE_API_SECRET}"},
-            )
+            meta = get_client().get_payment(self.merchant_uid)
 
-        except (Iamport.ResponseError, Iamport.HttpError) as e:
+        except PortOneError as e:
             logger.error(str(e), exc_info=e)
             raise Http404(str(e))
 
-        meta = response.json()  # JSON 응답을 파싱합니다.
-
         self.status = meta["status"]
         self.is_paid_ok = (
             meta["status"] == "PAID" and meta["amount"]["total"] == self.amount